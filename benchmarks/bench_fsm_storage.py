@@ -0,0 +1,85 @@
+"""Бенчмарк FSM-хранилищ: пропускная способность get/set при конкурентных апдейтах.
+
+Каждый «пользователь» проходит типичный сценарий бота: set_state, update_data,
+несколько get_data/get_state. Для SQLite отдельно меряется холодное чтение:
+новое хранилище на том же файле читает сессии всех пользователей с диска.
+Если задан REDIS_URL, меряется и RedisStorage.
+
+Запуск: python benchmarks/bench_fsm_storage.py [пользователей] [шагов]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiogram.fsm.storage.base import StorageKey  # noqa: E402
+from aiogram.fsm.storage.memory import MemoryStorage  # noqa: E402
+
+from services.fsm_storage import BoundedMemoryStorage, SQLiteStorage, make_storage  # noqa: E402
+
+BOT_ID = 1
+
+
+async def user_flow(storage, user_id: int, steps: int) -> int:
+    key = StorageKey(bot_id=BOT_ID, chat_id=user_id, user_id=user_id)
+    ops = 0
+    for step in range(steps):
+        await storage.set_state(key, "Form:country")
+        await storage.set_data(key, {"country": f"country-{step}"})
+        await storage.set_state(key, "Form:section")
+        for _ in range(3):
+            data = await storage.get_data(key)
+            await storage.get_state(key)
+            assert data["country"] == f"country-{step}"
+        ops += 9
+    return ops
+
+
+async def cold_read(storage, user_id: int, steps: int) -> int:
+    key = StorageKey(bot_id=BOT_ID, chat_id=user_id, user_id=user_id)
+    assert await storage.get_state(key) == "Form:section"
+    assert (await storage.get_data(key))["country"] == f"country-{steps - 1}"
+    return 2
+
+
+def report(name: str, users: int, ops: int, elapsed: float) -> None:
+    print(f"{name:>12} {users:>6} {ops:>9} {elapsed:9.2f} {ops / elapsed:12.0f}")
+
+
+async def run(name: str, storage, users: int, steps: int) -> None:
+    start = time.perf_counter()
+    ops = sum(await asyncio.gather(*(user_flow(storage, u, steps) for u in range(users))))
+    elapsed = time.perf_counter() - start
+    await storage.close()
+    report(name, users, ops, elapsed)
+
+
+async def run_cold(name: str, storage, users: int, steps: int) -> None:
+    """Чтение сессий, записанных предыдущим прогоном: в памяти ничего нет, всё с диска"""
+    start = time.perf_counter()
+    ops = sum(await asyncio.gather(*(cold_read(storage, u, steps) for u in range(users))))
+    elapsed = time.perf_counter() - start
+    await storage.close()
+    report(name, users, ops, elapsed)
+
+
+async def main(users: int, steps: int):
+    print(f"{'storage':>12} {'users':>6} {'ops':>9} {'sec':>9} {'ops/sec':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        batched_db, direct_db = os.path.join(tmp, "fsm.sqlite3"), os.path.join(tmp, "fsm-direct.sqlite3")
+        await run("memory", MemoryStorage(), users, steps)
+        await run("bounded", BoundedMemoryStorage(max_sessions=users), users, steps)
+        await run("sqlite", SQLiteStorage(batched_db), users, steps)
+        # без пачек: каждая запись — отдельная транзакция
+        await run("sqlite-tx", SQLiteStorage(direct_db, batched=False), users, steps)
+        await run_cold("sqlite-cold", SQLiteStorage(batched_db), users, steps)
+        if os.getenv("REDIS_URL"):
+            await run("redis", make_storage(os.getenv("REDIS_URL"), "", 3600), users, steps)
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:3]]
+    asyncio.run(main(*args) if len(args) == 2 else main(500, 10))
@@ -0,0 +1,76 @@
+"""Микробенчмарк: клавиатура и запрос на каждый ответ против FrozenKeyboard и model_construct.
+
+Меряется подготовка одного sendMessage с клавиатурой стран (30 кнопок) и
+клавиатурой разделов вплоть до готовых полей формы: время и пик памяти
+(tracemalloc) на запрос.
+
+Запуск: python benchmarks/bench_keyboards.py
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiogram import Bot  # noqa: E402
+from aiogram.methods import SendMessage  # noqa: E402
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup  # noqa: E402
+
+from callbacks import COUNTRY, SECTION, SECTION_BACK, SECTION_IDS, CountryIds, pack  # noqa: E402
+from keyboards import FrozenKeyboard  # noqa: E402
+from services.countries_service import CountriesService  # noqa: E402
+
+REQUESTS = 2000
+
+
+def section_rows() -> list:
+    return [[(section[:12], pack(SECTION, sid))] for section, sid in SECTION_IDS.items()] + \
+        [[("⬅️ Назад", pack(SECTION, SECTION_BACK))]]
+
+
+def main():
+    names = CountriesService().keys()
+    ids = CountryIds(names)
+    country_rows = [[(c, pack(COUNTRY, ids.id(c)))] for c in names]
+    bot = Bot(token="1:bench")
+
+    def before(rows):
+        # как раньше: модели с валидацией на каждый ответ
+        markup = InlineKeyboardMarkup(inline_keyboard=[
+            [InlineKeyboardButton(text=text, callback_data=data) for text, data in row] for row in rows
+        ])
+        method = SendMessage(chat_id=42, text="🌍 Выберите страну:", reply_markup=markup)
+        return bot.session.build_form_data(bot, method)
+
+    frozen = {id(country_rows): FrozenKeyboard(country_rows)}
+    sections = section_rows()
+    frozen[id(sections)] = FrozenKeyboard(sections)
+
+    def after(rows):
+        keyboard = frozen[id(rows)]
+        method = SendMessage.model_construct(chat_id=42, text="🌍 Выберите страну:", reply_markup=keyboard.json)
+        return bot.session.build_form_data(bot, method)
+
+    print(f"{'keyboard':>10} {'variant':>8} {'us/req':>8} {'peak KB/req':>12}")
+    for label, rows in (("countries", country_rows), ("sections", sections)):
+        for variant, fn in (("before", before), ("after", after)):
+            fn(rows)  # прогрев: схемы pydantic строятся лениво
+            start = time.perf_counter()
+            for _ in range(REQUESTS):
+                fn(rows)
+            per_request = (time.perf_counter() - start) / REQUESTS
+
+            tracemalloc.start()
+            peaks = []
+            for _ in range(200):
+                tracemalloc.reset_peak()
+                base = tracemalloc.get_traced_memory()[0]
+                fn(rows)
+                peaks.append(tracemalloc.get_traced_memory()[1] - base)
+            tracemalloc.stop()
+            print(f"{label:>10} {variant:>8} {per_request * 1e6:8.1f} {sum(peaks) / len(peaks) / 1024:12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Микробенчмарк: накладные расходы HandlerMetrics и ApiMetrics на один апдейт.
+
+Сравнивается вызов пустого обработчика (и пустого запроса к API) напрямую и
+через middleware метрик; разница — цена инструментирования.
+
+Запуск: python benchmarks/bench_metrics.py
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiogram.methods import SendMessage  # noqa: E402
+
+from metrics import ApiMetrics, HandlerMetrics  # noqa: E402
+
+CALLS = 100000
+
+
+class _Handler:
+    async def callback(self):
+        pass
+
+
+async def handler(event, data):
+    return None
+
+
+async def make_request(bot, method):
+    return None
+
+
+async def measure(fn) -> float:
+    await fn()  # прогрев
+    start = time.perf_counter()
+    for _ in range(CALLS):
+        await fn()
+    return (time.perf_counter() - start) / CALLS
+
+
+async def main():
+    data = {"handler": _Handler()}
+    handler_metrics = HandlerMetrics()
+    api_metrics = ApiMetrics()
+    method = SendMessage(chat_id=42, text="bench")
+
+    results = [
+        ("handler", await measure(lambda: handler(None, data)),
+         await measure(lambda: handler_metrics(handler, None, data))),
+        ("api", await measure(lambda: make_request(None, method)),
+         await measure(lambda: api_metrics(make_request, None, method))),
+    ]
+    print(f"{'layer':>8} {'direct, us':>11} {'metrics, us':>12} {'overhead, us':>13}")
+    for label, direct, instrumented in results:
+        print(f"{label:>8} {direct * 1e6:11.2f} {instrumented * 1e6:12.2f} {(instrumented - direct) * 1e6:13.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,54 @@
+"""Бенчмарк RouteService.plan на маршрутах от 3 до 200 точек.
+
+Запуск: python benchmarks/bench_routes.py
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.geo_service import Place  # noqa: E402
+from services.route_service import (  # noqa: E402
+    EXACT_LIMIT, RouteService, distance_matrix, nearest_neighbour, path_length, solve_exact, solve_heuristic,
+)
+
+SIZES = [3, 5, 8, 9, 12, 20, 50, 100, 200]
+
+
+def random_places(n: int, rng: random.Random) -> list:
+    # точки в пределах «страны» размером с Францию
+    return [Place("bench", f"p{i}", f"p{i}", rng.uniform(43, 51), rng.uniform(-4, 8)) for i in range(n)]
+
+
+def main(seed: int = 1):
+    rng = random.Random(seed)
+    service = RouteService()
+    print(f"{'n':>4} {'solver':>9} {'cold, ms':>10} {'memo, us':>9} {'km':>9} {'nn km':>9} {'gap':>7}")
+    for n in SIZES:
+        places = random_places(n, rng)
+        dist = distance_matrix(places)
+
+        start = time.perf_counter()
+        route = service.plan(places)
+        cold = time.perf_counter() - start
+        start = time.perf_counter()
+        service.plan(list(reversed(places)))
+        memo = time.perf_counter() - start
+
+        index = {id(p): i for i, p in enumerate(places)}
+        length = path_length([index[id(p)] for p in route], dist)
+        nn = min(path_length(nearest_neighbour(dist, s), dist) for s in range(n))
+        if n <= EXACT_LIMIT:
+            # эвристика против точного решения на тех же точках
+            gap = path_length(solve_heuristic(dist), dist) / path_length(solve_exact(dist), dist) - 1
+            gap_text = f"{gap:7.1%}"
+        else:
+            gap_text = f"{'-':>7}"
+        solver = "exact" if n <= EXACT_LIMIT else "nn+2opt"
+        print(f"{n:>4} {solver:>9} {cold * 1000:10.2f} {memo * 1e6:9.1f} {length:9.0f} {nn:9.0f} {gap_text}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Бенчмарк SendScheduler против поддельного Bot API с лимитами Telegram.
+
+Много пользователей одновременно открывают разделы (альбом + сообщение с
+клавиатурой, иногда повторное нажатие), параллельно идёт рассылка. Без
+планировщика часть отправок получает 429 и теряется.
+
+Запуск: python benchmarks/bench_send_scheduler.py [пользователей] [рассылка]
+"""
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiogram import Bot  # noqa: E402
+from aiogram.client.session.aiohttp import AiohttpSession  # noqa: E402
+from aiogram.client.telegram import TelegramAPIServer  # noqa: E402
+from aiogram.exceptions import TelegramRetryAfter  # noqa: E402
+from aiogram.types import InputMediaPhoto  # noqa: E402
+
+from benchmarks.fake_bot_api import FakeBotAPI, start  # noqa: E402
+from services.send_scheduler import BROADCAST, SendScheduler, priority  # noqa: E402
+
+PORT = 8798
+
+
+async def timed(coro, latencies: list, failures: list):
+    start_at = time.perf_counter()
+    try:
+        await coro
+    except TelegramRetryAfter:
+        failures.append(1)
+        return
+    latencies.append(time.perf_counter() - start_at)
+
+
+async def open_section(bot: Bot, chat_id: int, latencies: list, failures: list):
+    media = [InputMediaPhoto(media=f"photo-{i}") for i in range(3)]
+    await timed(bot.send_media_group(chat_id, media), latencies, failures)
+    await timed(bot.send_message(chat_id, "Выберите раздел:"), latencies, failures)
+    # двойное нажатие: тот же ответ ещё раз
+    await asyncio.gather(
+        timed(bot.send_message(chat_id, "🛂 Документы"), latencies, failures),
+        timed(bot.send_message(chat_id, "🛂 Документы"), latencies, failures),
+    )
+
+
+async def broadcast(bot: Bot, chats: list, latencies: list, failures: list):
+    with priority(BROADCAST):
+        await asyncio.gather(*(timed(bot.send_message(c, "Новости"), latencies, failures) for c in chats))
+
+
+def percentile(values: list, q: float) -> float:
+    if not values:
+        return 0.0
+    return statistics.quantiles(values, n=100)[q - 1] if len(values) > 1 else values[0]
+
+
+async def run(name: str, scheduler, users: int, broadcast_size: int):
+    api = FakeBotAPI()
+    runner = await start(api, PORT)
+    bot = Bot(token="1:fake", session=AiohttpSession(api=TelegramAPIServer.from_base(f"http://127.0.0.1:{PORT}")))
+    if scheduler is not None:
+        bot.session.middleware(scheduler)
+    interactive, background, failures = [], [], []
+    start_at = time.perf_counter()
+    await asyncio.gather(
+        broadcast(bot, list(range(10_000, 10_000 + broadcast_size)), background, failures),
+        *(open_section(bot, chat_id, interactive, failures) for chat_id in range(1, users + 1)),
+    )
+    elapsed = time.perf_counter() - start_at
+    await bot.session.close()
+    await runner.cleanup()
+    print(
+        f"{name:>10} {elapsed:7.1f} {len(interactive) + len(background):>6} {len(failures):>6} {api.count(429):>5} "
+        f"{percentile(interactive, 50):7.2f} {percentile(interactive, 95):7.2f} "
+        f"{percentile(background, 50):7.2f} {percentile(background, 95):7.2f}"
+    )
+    if scheduler is not None:
+        print(f"{'':>10} {scheduler.stats}")
+
+
+async def main(users: int, broadcast_size: int):
+    print(f"{'':>10} {'sec':>7} {'ok':>6} {'lost':>6} {'429':>5} "
+          f"{'ui p50':>7} {'ui p95':>7} {'bc p50':>7} {'bc p95':>7}")
+    await run("direct", None, users, broadcast_size)
+    await run("scheduler", SendScheduler(), users, broadcast_size)
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:3]]
+    asyncio.run(main(*args) if len(args) == 2 else main(40, 60))
@@ -0,0 +1,180 @@
+"""Бенчмарк холодного старта: время до первого ответа и пик памяти бота.
+
+Бот (bot.py) запускается отдельным процессом против поддельного Bot API, как
+на хостинге, который будит заснувший инстанс первым запросом: апдейт /start
+отправляется в /webhook, как только порт начинает принимать соединения.
+Время считается от запуска процесса:
+
+- listen — порт принимает соединения;
+- webhook — бот сверил webhook (getWebhookInfo и, если что-то изменилось, setWebhook);
+- first — пришёл ответ на /start (время до первого ответа);
+- photos — задержка первого раздела с фото.
+
+Пик памяти — VmHWM процесса после этих шагов. Кэш file_id переживает
+запуски внутри одного прогона, как media_cache.json на диске хостинга.
+
+Запуск: python benchmarks/bench_startup.py [--runs 5] [--latency 0.1] [--save benchmarks/startup_history.jsonl]
+С --save медианы дописываются строкой JSON с коммитом, чтобы сравнивать коммиты.
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import aiohttp
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.fake_bot_api import FakeBotAPI, start  # noqa: E402
+from benchmarks.load_test import SECRET, callback_update, message_update  # noqa: E402
+from callbacks import COUNTRY, SECTION, SECTION_IDS, CountryIds, pack  # noqa: E402
+from services.countries_service import CountriesService  # noqa: E402
+
+CHAT_ID = 4242
+COUNTRY_NAME = "Япония"
+METRICS = ("listen", "webhook", "first", "photos")
+
+
+def peak_rss_kb(pid: int) -> int:
+    """VmHWM процесса; без /proc — максимум по завершившимся дочерним процессам"""
+    try:
+        with open(f"/proc/{pid}/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+class StartupBenchmark:
+    def __init__(self, args):
+        self.args = args
+        self.api = FakeBotAPI(latency=args.latency, limits=False)
+        self.url = f"http://127.0.0.1:{args.port}/webhook"
+        self.headers = {"X-Telegram-Bot-Api-Secret-Token": SECRET}
+        self.country_id = CountryIds(CountriesService().keys()).id(COUNTRY_NAME)
+
+    def spawn(self, tmp: str) -> subprocess.Popen:
+        env = dict(
+            os.environ,
+            BOT_TOKEN="1:startup-bench",
+            TELEGRAM_API_URL=f"http://127.0.0.1:{self.args.api_port}",
+            PORT=str(self.args.port),
+            WEBHOOK_SECRET=SECRET,
+            COUNTRY_META_REFRESH_INTERVAL="0",
+            FSM_STORAGE="memory",
+            MEDIA_CACHE_FILE=os.path.join(tmp, "media_cache.json"),
+            WEBHOOK_STATE_FILE=os.path.join(tmp, "webhook_state.json"),
+        )
+        return subprocess.Popen(
+            [sys.executable, os.path.join(ROOT, "bot.py")], env=env, cwd=ROOT, stdout=subprocess.DEVNULL,
+        )
+
+    async def step(self, session: aiohttp.ClientSession, update: dict) -> float:
+        reply = self.api.expect_reply(CHAT_ID)
+        started = time.perf_counter()
+        async with session.post(self.url, json=update, headers=self.headers) as resp:
+            resp.raise_for_status()
+        await asyncio.wait_for(reply, self.args.timeout)
+        return time.perf_counter() - started
+
+    async def first_request(self, session: aiohttp.ClientSession, process: subprocess.Popen, started: float) -> float:
+        """Слать /start, пока порт не примет соединение; вернуть момент, когда принял"""
+        reply = self.api.expect_reply(CHAT_ID)
+        deadline = started + self.args.timeout
+        while time.perf_counter() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError("bot exited during startup")
+            try:
+                async with session.post(self.url, json=message_update(CHAT_ID, "/start"), headers=self.headers) as resp:
+                    listen = time.perf_counter()
+                    resp.raise_for_status()
+                    break
+            except aiohttp.ClientConnectionError:
+                await asyncio.sleep(0.005)
+        else:
+            raise RuntimeError(f"bot did not start in {self.args.timeout}s")
+        await asyncio.wait_for(reply, self.args.timeout)
+        return listen
+
+    async def run_once(self, tmp: str) -> dict:
+        calls_before = len(self.api.calls)
+        started_at = time.monotonic()
+        started = time.perf_counter()
+        process = self.spawn(tmp)
+        try:
+            async with aiohttp.ClientSession() as session:
+                listen = await self.first_request(session, process, started)
+                first = time.perf_counter()
+                await self.step(session, callback_update(CHAT_ID, pack(COUNTRY, self.country_id)))
+                photos = await self.step(session, callback_update(
+                    CHAT_ID, pack(SECTION, SECTION_IDS["Популярные места для посещения"]),
+                ))
+            rss = peak_rss_kb(process.pid)
+        finally:
+            process.terminate()
+            process.wait(10)
+        webhook = max(
+            (call.at - started_at for call in self.api.calls[calls_before:]
+             if call.method in ("getWebhookInfo", "setWebhook")),
+            default=float("nan"),
+        )
+        return {
+            "listen": listen - started,
+            "webhook": webhook,
+            "first": first - started,
+            "photos": photos,
+            "rss_mb": (rss or resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss) / 1024,
+        }
+
+    async def run(self) -> None:
+        runner = await start(self.api, self.args.api_port)
+        results = []
+        try:
+            with tempfile.TemporaryDirectory() as tmp:
+                for i in range(self.args.runs):
+                    result = await self.run_once(tmp)
+                    results.append(result)
+                    print(f"run {i + 1}: " + "  ".join(f"{name}={result[name] * 1000:.0f}ms" for name in METRICS)
+                          + f"  rss={result['rss_mb']:.1f}MB")
+        finally:
+            await runner.cleanup()
+        median = {key: statistics.median(r[key] for r in results) for key in (*METRICS, "rss_mb")}
+        print(f"{'median':>6}: " + "  ".join(f"{name}={median[name] * 1000:.0f}ms" for name in METRICS)
+              + f"  rss={median['rss_mb']:.1f}MB")
+        if self.args.save:
+            record = {"commit": git_commit(), "date": time.strftime("%Y-%m-%d %H:%M:%S"), "runs": self.args.runs}
+            record.update({f"{name}_ms": round(median[name] * 1000, 1) for name in METRICS})
+            record["peak_rss_mb"] = round(median["rss_mb"], 1)
+            with open(self.args.save, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.1, help="задержка ответа Bot API, с (как до api.telegram.org)")
+    parser.add_argument("--timeout", type=float, default=60, help="сколько ждать каждого шага, с")
+    parser.add_argument("--save", help="дописать медианы в JSON-lines файл")
+    parser.add_argument("--port", type=int, default=8794, help="порт бота")
+    parser.add_argument("--api-port", type=int, default=8795, help="порт поддельного Bot API")
+    asyncio.run(StartupBenchmark(parser.parse_args()).run())
+
+
+if __name__ == "__main__":
+    main()
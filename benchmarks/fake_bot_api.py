@@ -0,0 +1,197 @@
+"""Поддельный Bot API для нагрузочных тестов: отвечает как Telegram и так же ограничивает частоту.
+
+Лимиты как у Telegram: ~30 сообщений в секунду на бота и ~1 в секунду на чат
+(с небольшим запасом на всплеск), правки сообщений в чате — отдельно и чаще;
+превышение — ответ 429 с retry_after.
+Дополнительно можно задать задержку ответа и долю случайных 429. Все запросы
+записываются в calls, загруженные файлы принимаются и учитываются.
+
+Запуск отдельно: python benchmarks/fake_bot_api.py [порт]
+Бот подключается через TELEGRAM_API_URL=http://127.0.0.1:<порт>.
+"""
+import asyncio
+import itertools
+import json
+import math
+import os
+import random
+import sys
+import time
+from typing import Optional
+
+from aiohttp import web
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.send_scheduler import TokenBucket  # noqa: E402
+
+DEFAULT_PORT = 8081
+LIMITED_PREFIXES = ("send", "copy", "forward", "edit")
+
+
+class Call:
+    __slots__ = ("at", "method", "chat_id", "status", "has_markup", "upload_bytes")
+
+    def __init__(self, at: float, method: str, chat_id: Optional[str], status: int, has_markup: bool, upload_bytes: int):
+        self.at = at
+        self.method = method
+        self.chat_id = chat_id
+        self.status = status
+        self.has_markup = has_markup
+        self.upload_bytes = upload_bytes
+
+
+class FakeBotAPI:
+    def __init__(
+        self,
+        global_rate: float = 30,
+        chat_rate: float = 1,
+        chat_burst: float = 3,
+        edit_rate: float = 5,
+        edit_burst: float = 6,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        seed: int = 1,
+        limits: bool = True,
+    ):
+        self.global_rate = global_rate
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.edit_rate = edit_rate
+        self.edit_burst = edit_burst
+        self.latency = latency
+        self.error_rate = error_rate
+        self.limits = limits
+        self.calls = []
+        self._random = random.Random(seed)
+        self._global = TokenBucket(global_rate, global_rate, time.monotonic())
+        self._chats = {}
+        self._message_ids = itertools.count(1)
+        self._reply_waiters = {}  # chat_id -> [Future], ждут сообщения с клавиатурой
+        self.webhook = {"url": "", "has_custom_certificate": False, "pending_update_count": 0}
+
+    def app(self) -> web.Application:
+        app = web.Application(client_max_size=50 * 1024 * 1024)
+        app.router.add_post("/bot{token}/{method}", self.handle)
+        return app
+
+    def _limited(self, chat_id: str, cost: int, edit: bool = False) -> float:
+        """0, если отправка разрешена, иначе retry_after в секундах"""
+        if self.error_rate and self._random.random() < self.error_rate:
+            return 1.0
+        if not self.limits:
+            return 0.0
+        now = time.monotonic()
+        chat = self._chats.get((chat_id, edit))
+        if chat is None:
+            chat = self._chats[(chat_id, edit)] = (
+                TokenBucket(self.edit_rate, self.edit_burst, now) if edit
+                else TokenBucket(self.chat_rate, self.chat_burst, now)
+            )
+        # Telegram не копит долг: запрос сверх лимита просто отклоняется
+        wait = max(chat.wait_time(now), self._global.wait_time(now, cost))
+        if wait > 0:
+            return wait
+        chat.take()
+        self._global.take(cost)
+        return 0.0
+
+    def _message(self, chat_id: str, extra: dict) -> dict:
+        chat = {"id": int(chat_id), "type": "private" if int(chat_id) > 0 else "group"}
+        if chat["type"] == "group":
+            chat["title"] = "group"
+        return {"message_id": next(self._message_ids), "date": int(time.time()), "chat": chat, **extra}
+
+    async def _form(self, request: web.Request) -> tuple:
+        """Поля запроса и объём загруженных файлов"""
+        if not request.content_type.startswith("multipart"):
+            return dict(await request.post()), 0
+        form, uploaded = {}, 0
+        async for part in await request.multipart():
+            data = await part.read()
+            if part.filename is None:
+                form[part.name] = data.decode(errors="replace")
+            else:
+                form[part.name] = part.filename
+                uploaded += len(data)
+        return form, uploaded
+
+    def _record(self, method: str, chat_id: Optional[str], status: int, form: dict, uploaded: int) -> None:
+        has_markup = "reply_markup" in form
+        self.calls.append(Call(time.monotonic(), method, chat_id, status, has_markup, uploaded))
+        if status == 200 and has_markup and chat_id is not None:
+            for future in self._reply_waiters.pop(chat_id, []):
+                if not future.done():
+                    future.set_result(None)
+
+    def expect_reply(self, chat_id) -> asyncio.Future:
+        """Future, которое выполнится при следующем успешном сообщении с клавиатурой в чат.
+
+        Любой экран бота заканчивается таким сообщением; подписываться нужно до
+        отправки апдейта, чтобы не пропустить быстрый ответ.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._reply_waiters.setdefault(str(chat_id), []).append(future)
+        return future
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        form, uploaded = await self._form(request)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        chat_id = form.get("chat_id")
+        media = json.loads(form["media"]) if "media" in form and method == "sendMediaGroup" else []
+        if chat_id is not None and method.startswith(LIMITED_PREFIXES):
+            retry_after = self._limited(chat_id, len(media) or 1, method.startswith("edit"))
+            if retry_after:
+                self._record(method, chat_id, 429, form, uploaded)
+                seconds = math.ceil(retry_after)
+                return web.json_response({
+                    "ok": False,
+                    "error_code": 429,
+                    "description": f"Too Many Requests: retry after {seconds}",
+                    "parameters": {"retry_after": seconds},
+                })
+        self._record(method, chat_id, 200, form, uploaded)
+
+        photo = [{"file_id": f"photo-{next(self._message_ids)}", "file_unique_id": "u", "width": 1, "height": 1}]
+        if method == "getMe":
+            result = {"id": 1, "is_bot": True, "first_name": "fake", "username": "fake_bot"}
+        elif method == "getWebhookInfo":
+            result = self.webhook
+        elif method == "setWebhook":
+            # как Telegram: параметры запоминаются и видны в getWebhookInfo, секрет — нет
+            self.webhook = {**self.webhook, "url": form.get("url", "")}
+            if "allowed_updates" in form:
+                self.webhook["allowed_updates"] = json.loads(form["allowed_updates"])
+            result = True
+        elif method == "deleteWebhook":
+            self.webhook = {"url": "", "has_custom_certificate": False, "pending_update_count": 0}
+            result = True
+        elif method == "sendMediaGroup":
+            result = [self._message(chat_id, {"photo": photo}) for _ in media]
+        elif method in ("sendPhoto", "editMessageMedia"):
+            result = self._message(chat_id, {"photo": photo, "caption": form.get("caption", "")})
+        elif method == "sendLocation":
+            result = self._message(chat_id, {"location": {
+                "latitude": float(form["latitude"]), "longitude": float(form["longitude"]),
+            }})
+        elif method.startswith(("send", "edit")) and chat_id is not None:
+            result = self._message(chat_id, {"text": form.get("text", "")})
+        else:
+            result = True
+        return web.json_response({"ok": True, "result": result})
+
+    def count(self, status: int) -> int:
+        return sum(1 for call in self.calls if call.status == status)
+
+
+async def start(api: FakeBotAPI, port: int = DEFAULT_PORT) -> web.AppRunner:
+    runner = web.AppRunner(api.app())
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+    return runner
+
+
+if __name__ == "__main__":
+    web.run_app(FakeBotAPI().app(), host="127.0.0.1", port=int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_PORT)
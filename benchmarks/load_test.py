@@ -0,0 +1,190 @@
+"""Сквозной нагрузочный тест: бот в отдельном процессе, поддельный Bot API и генератор апдейтов.
+
+Бот (bot.py) запускается с TELEGRAM_API_URL, указывающим на FakeBotAPI, и
+получает апдейты в /webhook. Каждый синтетический пользователь проходит
+сценарий /start → страна → раздел с текстом → раздел с фото → назад;
+пользователи приходят с заданной частотой (пуассоновский поток, seed
+фиксирован). Задержка шага — от POST апдейта до сообщения с клавиатурой,
+которым бот заканчивает экран.
+
+Запуск: python benchmarks/load_test.py --users 100 --rate 20 [--latency 0.05] [--error-rate 0.01]
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import aiohttp
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.fake_bot_api import FakeBotAPI, start  # noqa: E402
+from callbacks import COUNTRY, SECTION, SECTION_BACK, SECTION_IDS, country_id, pack  # noqa: E402
+from services.countries_service import CountriesService  # noqa: E402
+
+SECRET = "load-test-secret"
+STEPS = [
+    ("start", None),
+    ("country", None),
+    ("text", pack(SECTION, SECTION_IDS["Важные правила и особенности"])),
+    ("photos", pack(SECTION, SECTION_IDS["Популярные места для посещения"])),
+    ("back", pack(SECTION, SECTION_BACK)),
+]
+
+ids = itertools.count(1)
+
+
+def message_update(chat_id: int, text: str) -> dict:
+    message = {
+        "message_id": next(ids), "date": int(time.time()), "text": text,
+        "chat": {"id": chat_id, "type": "private"},
+        "from": {"id": chat_id, "is_bot": False, "first_name": "load"},
+    }
+    if text.startswith("/"):
+        message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+    return {"update_id": next(ids), "message": message}
+
+
+def callback_update(chat_id: int, data: str) -> dict:
+    return {"update_id": next(ids), "callback_query": {
+        "id": str(next(ids)), "chat_instance": "load", "data": data,
+        "from": {"id": chat_id, "is_bot": False, "first_name": "load"},
+        "message": {"message_id": 1, "date": int(time.time()), "text": "…", "chat": {"id": chat_id, "type": "private"}},
+    }}
+
+
+def percentile(values: list, q: int) -> float:
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100)[q - 1]
+
+
+class LoadTest:
+    def __init__(self, args):
+        self.args = args
+        self.api = FakeBotAPI(latency=args.latency, error_rate=args.error_rate, seed=args.seed, limits=not args.no_limits)
+        self.latencies = {name: [] for name, _ in STEPS}
+        self.errors = {name: 0 for name, _ in STEPS}      # не 200 от webhook
+        self.timeouts = {name: 0 for name, _ in STEPS}    # ответа не дождались
+        self.updates = 0
+        self.random = random.Random(args.seed)
+        self.countries = CountriesService().keys()
+
+    async def start_bot(self, tmp: str) -> subprocess.Popen:
+        env = dict(
+            os.environ,
+            BOT_TOKEN="1:load-test",
+            TELEGRAM_API_URL=f"http://127.0.0.1:{self.args.api_port}",
+            PORT=str(self.args.port),
+            WEBHOOK_SECRET=SECRET,
+            COUNTRY_META_REFRESH_INTERVAL="0",
+            FSM_STORAGE="memory",
+            MEDIA_CACHE_FILE=os.path.join(tmp, "media_cache.json"),
+            WEBHOOK_STATE_FILE=os.path.join(tmp, "webhook_state.json"),
+        )
+        process = subprocess.Popen([sys.executable, os.path.join(ROOT, "bot.py")], env=env, cwd=ROOT)
+        deadline = time.monotonic() + 60
+        async with aiohttp.ClientSession() as session:
+            while time.monotonic() < deadline:
+                if process.poll() is not None:
+                    raise RuntimeError("bot exited during startup")
+                try:
+                    # пустое тело: поднявшийся бот ответит 400, значит, старт закончен
+                    async with session.post(self.url, json={}, headers={"X-Telegram-Bot-Api-Secret-Token": SECRET}):
+                        return process
+                except aiohttp.ClientConnectionError:
+                    await asyncio.sleep(0.2)
+        process.kill()
+        raise RuntimeError("bot did not start in 60s")
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.args.port}/webhook"
+
+    async def step(self, session: aiohttp.ClientSession, chat_id: int, name: str, update: dict) -> None:
+        reply = self.api.expect_reply(chat_id)
+        started = time.perf_counter()
+        self.updates += 1
+        async with session.post(self.url, json=update, headers={"X-Telegram-Bot-Api-Secret-Token": SECRET}) as resp:
+            if resp.status != 200:
+                self.errors[name] += 1
+                reply.cancel()
+                return
+        try:
+            await asyncio.wait_for(reply, self.args.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts[name] += 1
+            return
+        self.latencies[name].append(time.perf_counter() - started)
+
+    async def user(self, session: aiohttp.ClientSession, chat_id: int, delay: float) -> None:
+        await asyncio.sleep(delay)
+        country = self.random.choice(self.countries)
+        for name, data in STEPS:
+            if name == "start":
+                update = message_update(chat_id, "/start")
+            elif name == "country":
+                update = callback_update(chat_id, pack(COUNTRY, country_id(country)))
+            else:
+                update = callback_update(chat_id, data)
+            await self.step(session, chat_id, name, update)
+
+    async def run(self) -> None:
+        runner = await start(self.api, self.args.api_port)
+        with tempfile.TemporaryDirectory() as tmp:
+            process = await self.start_bot(tmp)
+            try:
+                calls_before = len(self.api.calls)
+                delays = list(itertools.accumulate(self.random.expovariate(self.args.rate) for _ in range(self.args.users)))
+                started = time.perf_counter()
+                async with aiohttp.ClientSession() as session:
+                    await asyncio.gather(*(
+                        self.user(session, 100000 + i, delay) for i, delay in enumerate(delays)
+                    ))
+                elapsed = time.perf_counter() - started
+            finally:
+                process.terminate()
+                process.wait(10)
+        await runner.cleanup()
+        self.report(self.api.calls[calls_before:], elapsed)
+
+    def report(self, calls: list, elapsed: float) -> None:
+        print(f"users={self.args.users} rate={self.args.rate}/s latency={self.args.latency}s "
+              f"error_rate={self.args.error_rate} seed={self.args.seed}")
+        print(f"{'step':>8} {'n':>6} {'p50, ms':>9} {'p95, ms':>9} {'p99, ms':>9} {'errors':>7} {'timeouts':>9}")
+        for name, _ in STEPS:
+            values = self.latencies[name]
+            print(f"{name:>8} {len(values):>6} {percentile(values, 50) * 1000:9.0f} {percentile(values, 95) * 1000:9.0f} "
+                  f"{percentile(values, 99) * 1000:9.0f} {self.errors[name]:>7} {self.timeouts[name]:>9}")
+        failed = sum(self.errors.values()) + sum(self.timeouts.values())
+        limited = sum(1 for call in calls if call.status == 429)
+        uploaded = sum(call.upload_bytes for call in calls)
+        print(f"updates: {self.updates} in {elapsed:.1f}s ({self.updates / elapsed:.1f}/s), "
+              f"failed {failed} ({failed / max(self.updates, 1):.1%})")
+        print(f"outbound calls: {len(calls)} ({len(calls) / max(self.updates, 1):.2f} per update), "
+              f"429: {limited} ({limited / max(len(calls), 1):.1%}), uploaded {uploaded / 1024 / 1024:.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--rate", type=float, default=10, help="новых пользователей в секунду")
+    parser.add_argument("--latency", type=float, default=0.0, help="задержка ответа Bot API, с")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="доля случайных 429")
+    parser.add_argument("--no-limits", action="store_true", help="не ограничивать частоту в Bot API")
+    parser.add_argument("--timeout", type=float, default=30, help="сколько ждать ответа на шаг, с")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--port", type=int, default=8796, help="порт бота")
+    parser.add_argument("--api-port", type=int, default=8797, help="порт поддельного Bot API")
+    asyncio.run(LoadTest(parser.parse_args()).run())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,45 @@
+import asyncio
+import gc
+import hashlib
+import hmac
+import logging
 import os
-from aiogram import Bot, Dispatcher, types
-from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup, InputFile
-from aiogram.filters import CommandStart
+import time
+from typing import Optional
+from aiogram import Bot, Dispatcher, F, types
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.methods import EditMessageText, SendMessage
+from aiogram.types import BufferedInputFile, InputMediaPhoto
+from aiogram.filters import Command, CommandObject, CommandStart
+from aiogram.exceptions import TelegramAPIError, TelegramBadRequest
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import StatesGroup, State
-from aiogram.fsm.storage.memory import MemoryStorage
 from aiohttp import web
-from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiogram.webhook.aiohttp_server import setup_application
+from keyboards import FrozenKeyboard
+from metrics import REGISTRY, ApiMetrics, HandlerMetrics, monitor_loop_lag, render as render_metrics
+from tracing import (
+    Profile, ProfilingMiddleware, SamplingProfiler, TracedStorage, Tracer, TracingMiddleware,
+    TracingRequestMiddleware, make_exporter,
+)
+from callbacks import (
+    COUNTRY, PAGE, SECTION, SECTION_BACK, SECTION_IDS, SECTIONS_BY_ID, CountryIds, pack, unpack,
+)
+from services.image_optimizer import check_manifest, optimize as optimize_images
+from services.api_service import ApiService
+from services.countries_service import CountriesService
+from services.country_search import CountrySearch
+from services.country_meta_service import CountryMetaService
+from services.fsm_storage import make_storage
+from services.geo_service import GeoService
+from services.images_service import ImageIndex, normalize_name, summarize_report
+from services.media_cache import MediaCacheService
+from services.route_service import RouteService
+from services.send_scheduler import SendScheduler
+from services.update_executor import ExecutorRequestHandler
+from services.webhook_service import WebhookService
+from utils import flag_emoji, format_country_meta, format_nearest
 
 # ==============================
 # CONFIG
@@ -17,15 +50,67 @@ if not TOKEN:
 
 WEBHOOK_PATH = "/webhook"
 WEBHOOK_URL = f"https://trevelbot-2.onrender.com{WEBHOOK_PATH}"
+# Telegram присылает его в X-Telegram-Bot-Api-Secret-Token; по умолчанию выводится из токена,
+# чтобы все воркеры и перезапуски использовали один и тот же секрет
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET") or hashlib.sha256(f"webhook:{TOKEN}".encode()).hexdigest()
 PORT = int(os.getenv("PORT", 10000))
+# свой Bot API сервер (локальный telegram-bot-api или benchmarks/fake_bot_api.py); по умолчанию api.telegram.org
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL")
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+IMAGES_DIR = os.path.join(BASE_DIR, "images")
+OPTIMIZED_IMAGES_DIR = os.path.join(BASE_DIR, "images_optimized")
+# images_optimized/ не в git: недостающие копии собираются в фоне после старта; 0 — не собирать
+OPTIMIZE_IMAGES_ON_START = os.getenv("OPTIMIZE_IMAGES_ON_START", "1") != "0"
+COUNTRIES_RELOAD_INTERVAL = float(os.getenv("COUNTRIES_RELOAD_INTERVAL", 30))
+# 0 — не обновлять справку о странах из restcountries
+COUNTRY_META_REFRESH_INTERVAL = float(os.getenv("COUNTRY_META_REFRESH_INTERVAL", 24 * 3600))
+# обновления справки хранятся отдельно от services/countries_meta.json из репозитория
+COUNTRY_META_FILE = os.getenv("COUNTRY_META_FILE", os.path.join(BASE_DIR, "countries_meta.json"))
+# FSM: Redis при заданном REDIS_URL (requirements-redis.txt), иначе FSM_STORAGE — sqlite (по умолчанию) или memory;
+# сессии старше FSM_TTL забываются, в памяти держится не больше FSM_MAX_SESSIONS
+REDIS_URL = os.getenv("REDIS_URL")
+FSM_STORAGE = os.getenv("FSM_STORAGE", "sqlite")
+FSM_DB = os.getenv("FSM_DB", os.path.join(BASE_DIR, "fsm.sqlite3"))
+FSM_TTL = float(os.getenv("FSM_TTL", 7 * 24 * 3600))
+FSM_MAX_SESSIONS = int(os.getenv("FSM_MAX_SESSIONS", 10000))
+# апдейты разных чатов обрабатываются параллельно, не больше UPDATE_WORKERS одновременно;
+# сверх UPDATE_QUEUE_LIMIT ждущих апдейтов Telegram получает 503 и повторит позже
+UPDATE_WORKERS = int(os.getenv("UPDATE_WORKERS", 16))
+UPDATE_QUEUE_LIMIT = int(os.getenv("UPDATE_QUEUE_LIMIT", 1000))
+MEDIA_CACHE_FILE = os.getenv("MEDIA_CACHE_FILE", os.path.join(BASE_DIR, "media_cache.json"))
+# отпечаток зарегистрированного webhook: пока он совпадает, setWebhook на старте не вызывается
+WEBHOOK_STATE_FILE = os.getenv("WEBHOOK_STATE_FILE", os.path.join(BASE_DIR, "webhook_state.json"))
+# трассы апдейтов: в OTLP/HTTP коллектор (TRACE_OTLP_URL, например http://localhost:4318/v1/traces)
+# или в JSON-lines файл (TRACE_FILE); без них трассировка выключена
+TRACE_FILE = os.getenv("TRACE_FILE")
+TRACE_OTLP_URL = os.getenv("TRACE_OTLP_URL")
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", 1))
+# /metrics отдаётся только с заголовком "Authorization: Bearer <METRICS_TOKEN>"; без токена его нет
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+# чат, которому доступны служебные команды (/profile); 0 — никому
+ADMIN_CHAT_ID = int(os.getenv("ADMIN_CHAT_ID") or 0)
 
 def img(name: str):
-    return os.path.join(BASE_DIR, "images", name)
-
-bot = Bot(token=TOKEN)
-dp = Dispatcher(storage=MemoryStorage())
+    return os.path.join(IMAGES_DIR, name)
+
+bot = Bot(
+    token=TOKEN,
+    session=AiohttpSession(api=TelegramAPIServer.from_base(TELEGRAM_API_URL)) if TELEGRAM_API_URL else None,
+)
+trace_exporter = make_exporter(TRACE_FILE, TRACE_OTLP_URL)
+tracer = Tracer(trace_exporter, TRACE_SAMPLE_RATE)
+# спан запроса снаружи планировщика: в него входят и ожидание лимитов, и повторы после 429
+bot.session.middleware(TracingRequestMiddleware())
+# все запросы бота идут через планировщик: лимиты Telegram, retry_after, склейка дублей
+send_scheduler = SendScheduler()
+bot.session.middleware(send_scheduler)
+storage = make_storage(REDIS_URL, FSM_DB, FSM_TTL, FSM_STORAGE, FSM_MAX_SESSIONS)
+dp = Dispatcher(storage=TracedStorage(storage) if tracer.enabled else storage)
+media_cache = MediaCacheService(MEDIA_CACHE_FILE, BASE_DIR, bot.id)
+# оригинал -> сжатая копия из images_optimized/; манифест проверяется при прогреве
+# (sha256 оригиналов), до этого отдаются оригиналы
+optimized_images = {}
 
 # ==============================
 # FSM
@@ -37,938 +122,21 @@ class Form(StatesGroup):
 # ==============================
 # DATA
 # ==============================
-countries_info = {
-    "Австралия": {
-        "Важные правила и особенности": (
-            "🇦🇺 Австралия — многонациональная страна 🌏 с высоким уровнем жизни и особой культурой общения.\n"
-            "🎲 Австралийцы любят азартные игры и традиционные выезды на барбекю большими компаниями.\n"
-            "🤝 В стране развита благотворительность: средства часто собирают через продажи (например, выпечка на улицах), а не через прямые пожертвования.\n"
-            "🏪 В Рождество, Новый год и в День АНЗАК (день чествования ветеранов) большинство магазинов, кафе и ресторанов закрыты.\n"
-            "🏇 Весной проходит Кубок Мельбурна — знаменитые скачки, участие в ставках считается почти национальной традицией.\n"
-            "🌞 Важно помнить, что сезоны противоположны европейским: декабрь–январь — разгар лета."
-        ),
-        "Требуемые документы": (
-            "🛂 Заграничный паспорт с визой — действителен не менее 6 месяцев после окончания поездки.\n"
-            "📄 Миграционная карта туриста и/или таможенная декларация (при необходимости).\n"
-            "✈️ Обратные билеты или билеты в третью страну.\n"
-            "🏨 Подтверждение брони проживания или туристический ваучер.\n"
-            "💳 Подтверждение финансовой состоятельности (наличные, банковские карты).\n"
-            "🏥 Медицинская страховка — обязательна."
-        ),
-        "Список вещей, которые стоит взять": (
-            "👕 Одежду и обувь по сезону и маршруту путешествия.\n"
-            "🩳 Для летнего периода (декабрь–январь): шорты, лёгкую одежду, панаму, кроссовки.\n"
-            "🧥 Для автопутешествий и экскурсий: ветровку, дождевик, удобную разношенную обувь.\n"
-            "🧢 Средства защиты от солнца и качественные репелленты.\n"
-            "💊 Аптечку первой помощи.\n"
-            "🏔️ Для горнолыжного отдыха — часть снаряжения, чтобы избежать аренды на месте."
-        ),
-        "Популярные места для посещения": ["Большой Барьерный риф", "Скалы Двенадцать Апостолов", "Великая океанская дорога"],
-        "Национальная кухня": ["Пирог-поплавок", "Блюда из рыбы баррамунди", "Цыплята Мельбурн", "Эльфийский хлеб"],
-    },
-
-    "Армения": {
-        "Важные правила и особенности": (
-            "🇦🇲 Армения — одна из древнейших стран мира ⛪, в 301 году ставшая первым государством. \n"
-            "принявшим христианство в качестве официальной религии. Это сильно повлияло на культуру, архитектуру и традиции.\n"
-            "🏛️ По всей стране расположены сотни древних монастырей и церквей.\n"
-            "🗣️ Официальный язык — армянский. Многие жители говорят по-русски, молодёжь часто знает английский. "
-            "Даже несколько фраз на армянском всегда воспринимаются с теплотой.\n"
-            "🚰 В Ереване и других городах можно пить воду из-под крана — она чистая и часто поступает из фонтанчиков «пулпулаков».\n"
-            "⚠️ Избегайте обсуждения чувствительных политических тем, особенно связанных с Нагорным Карабахом.\n"
-            "👕 При посещении храмов рекомендуется скромная одежда: закрытые плечи и колени, "
-            "женщинам желательно иметь платок.\n"
-            "🙏 Неуважение к истории и религии считается крайне неприемлемым.\n"
-            "🥃 Национальный напиток — армянский коньяк.\n"
-            "🏙️ Ереван — один из древнейших городов мира, основанный раньше Рима."
-        ),
-        "Требуемые документы": (
-            "🛂 Для граждан РФ — внутренний паспорт (при прямом авиаперелёте) или заграничный паспорт.\n"
-            "🌍 Для граждан других стран — заграничный паспорт и виза (при необходимости).\n"
-            "✈️ Обратный билет или подтверждение дальнейшего маршрута.\n"
-            "💳 Подтверждение финансовых средств.\n"
-            "🏥 Медицинская страховка — рекомендуется."
-        ),
-        "Список вещей, которые стоит взять": (
-            "👟 Удобную обувь для прогулок и горных маршрутов.\n"
-            "🧥 Тёплую одежду — в горах прохладно даже летом.\n"
-            "🧢 Солнцезащитные очки и головной убор.\n"
-            "📷 Фотоаппарат.\n"
-            "🧴 Средства личной гигиены.\n"
-            "💊 Аптечку.\n"
-            "🔌 Переходник для розеток."
-        ),
-        "Популярные места для посещения": ["Монастырь Гегард", "Озеро Севан", "Эчмиадзинский кафедральный собор"],
-        "Национальная кухня": ["Хоровац", "Хаш", "Толма"],
-    },
-
-    "Бали": {
-        "Важные правила и особенности": (
-            "🇮🇩 Бали — популярная туристическая провинция Индонезии 🏝️, "
-            "расположенная в Юго-Восточной Азии. Столица — Денпасар, а Убуд считается культурным центром острова 🎨.\n"
-            "🌦️ Климат тропический: влажный сезон с ноября по март и сухой с апреля по октябрь, "
-            "температура держится около 26–31 °C круглый год.\n"
-            "🙏 Уважайте религию и традиции: перед входом в дома и некоторые храмы принято снимать обувь.\n"
-            "👕 В храмах требуется скромная одежда — закрытые плечи и колени, часто необходим саронг.\n"
-            "🛕 Не наступайте на религиозные подношения (canang sari), лежащие на улицах — это считается неуважением.\n"
-            "🤲 Используйте правую руку при передаче предметов и приветствиях.\n"
-            "🗣️ Традиционное приветствие — «Om Swastiastu».\n"
-            "💑 Сдерживайте проявления чувств в общественных местах.\n"
-            "🛂 Нарушение визового режима строго наказывается штрафами, депортацией или арестом.\n"
-            "🚫 Наркотики полностью запрещены и караются крайне жёстко по законам Индонезии."
-        ),
-        "Требуемые документы": (
-            "🛂 Заграничный паспорт — действителен не менее 6 месяцев с даты въезда.\n"
-            "📄 Виза по прибытии (VOA) — 30 дней с возможностью продления ещё на 30 дней.\n"
-            "✈️ Обратные билеты — часто обязательны для получения VOA.\n"
-            "🏨 Подтверждение брони проживания.\n"
-            "🏥 Туристическая страховка с медицинским покрытием.\n"
-            "📱 Цифровая въездная декларация (All Indonesia app) — обязательна.\n"
-            "🛵 Международное водительское удостоверение — при аренде скутера."
-        ),
-        "Список вещей, которые стоит взять": (
-            "📁 Документы и их копии (паспорт, виза/VOA, страховка, билеты).\n"
-            "💳 Наличные в рупиях и банковские карты.\n"
-            "🔌 Зарядные устройства и адаптеры.\n"
-            "📱 Телефон и портативный аккумулятор.\n"
-            "👕 Лёгкая и дышащая одежда.\n"
-            "🧣 Саронг или шарф для храмов.\n"
-            "🏖️ Купальные принадлежности.\n"
-            "🩴 Сандалии или шлёпанцы.\n"
-            "🧢 Головной убор и солнцезащитные очки.\n"
-            "🌧️ Лёгкий дождевик (во влажный сезон).\n"
-            "💊 Аптечка, солнцезащитный крем SPF и репеллент.\n"
-            "🎒 Небольшой рюкзак для экскурсий."
-        ),
-        "Популярные места для посещения": ["Убуд", "Нуса-Пенида", "Храм Тирта Эмпул"],
-        "Национальная кухня": ["Nasi Goreng", "Soto Ayam", "Gado-gado"],
-    },
-
-    "Беларусь": {
-    "Важные правила и особенности": (
-            "🇧🇾 Беларусь — спокойная и ухоженная страна Восточной Европы 🌿 с высоким уровнем общественной безопасности.\n"
-            "📷 Запрещено фотографировать охраняемые объекты и военную инфраструктуру: объекты связи, "
-            "некоторые государственные здания, мосты, военные части и пограничные зоны.\n"
-            "🚯 За мусор в общественных местах и парках предусмотрены штрафы, особенно в туристических районах.\n"
-            "🚭 Курение запрещено вблизи остановок, в подземных переходах, возле школ, больниц и во многих общественных пространствах.\n"
-            "🗣️ Официальные языки — белорусский и русский; русский широко используется в повседневном общении.\n"
-            "🛡️ Беларусь считается одной из самых безопасных стран Европы — прогулки по городам возможны даже поздно вечером."
-        ),
-        "Требуемые документы": (
-            "🛂 Для граждан России — внутренний паспорт гражданина РФ.\n"
-            "🌍 Для граждан других стран — заграничный паспорт и виза (при необходимости).\n"
-            "🏥 Медицинская страховка — рекомендуется.\n"
-            "🏨 Подтверждение брони жилья и обратные билеты могут быть запрошены на паспортном контроле.\n"
-            "💳 Наличные и банковские карты: карты «Мир» работают, международные Visa/Mastercard (не РФ) обычно принимаются."
-        ),
-        "Список вещей, которые стоит взять": (
-            "🧥 Тёплую одежду (особенно осенью и зимой).\n"
-            "👟 Удобную обувь для длительных прогулок.\n"
-            "🌧️ Дождевик или зонт.\n"
-            "🧴 Средства личной гигиены.\n"
-            "💊 Аптечку с необходимыми медикаментами.\n"
-            "🔌 Переходник для розеток (при необходимости).\n"
-            "📷 Фотоаппарат."
-        ),
-        "Популярные места для посещения": ["Мирский замок", "Несвижский замок", "Национальный парк «Беловежская пуща»"],
-        "Национальная кухня": ["Драники", "Мачанка", "Клецки"],
-    },
-
-    "Бразилия": {
-        "Важные правила и особенности": (
-            "🇧🇷 Бразилия — яркая и эмоциональная страна Южной Америки 🎶, известная оптимизмом, дружелюбием и любовью к праздникам.\n"
-            "⚽ Музыка (самба, босса-нова), танцы и футбол — неотъемлемая часть повседневной жизни бразильцев.\n"
-            "🗣️ Это единственная португалоязычная страна континента. Знание базовых фраз на португальском значительно облегчает общение.\n"
-            "✈️ Расстояния между городами огромны — внутренние авиаперелёты часто самый удобный способ передвижения.\n"
-            "🎭 Если вы попали на Карнавал или местный праздник — обязательно участвуйте, это важная часть культуры.\n"
-            "⚠️ Не демонстрируйте ценности: дорогие украшения, часы и крупные суммы наличных лучше не показывать на улице.\n"
-            "👜 В туристических местах, транспорте и на пляжах возможны карманные кражи — будьте бдительны.\n"
-            "🌙 Избегайте прогулок в одиночку ночью, особенно в незнакомых районах.\n"
-            "🚫 При попытке ограбления не сопротивляйтесь (популярная фраза: «Não reaja!» — «Не реагируй!»).\n"
-            "🏘️ Посещение фавел рекомендуется только в составе организованных и проверенных экскурсий."
-        ),
-        "Требуемые документы": (
-            "🛂 Для граждан РФ — заграничный паспорт, виза не требуется для туристических поездок до 90 дней.\n"
-            "🌍 Для граждан других стран — заграничный паспорт и виза (при необходимости).\n"
-            "🏥 Медицинская страховка — обязательна.\n"
-            "✈️ Обратный билет или билет в третью страну.\n"
-            "💳 Подтверждение достаточных финансовых средств (наличные, выписки, карты).\n"
-            "🏨 Подтверждение бронирования жилья или письмо-приглашение.\n"
-            "📄 Миграционная карта (Cartão de Entrada/Saída) — заполняется при въезде и сохраняется до выезда."
-        ),
-        "Список вещей, которые стоит взять": (
-            "👕 Лёгкую одежду из натуральных тканей.\n"
-            "🏖️ Купальный костюм.\n"
-            "🧴 Солнцезащитный крем с высоким SPF.\n"
-            "🦟 Репеллент от насекомых.\n"
-            "👟 Удобную обувь для города и пляжа.\n"
-            "🧢 Головной убор.\n"
-            "🌧️ Дождевик (особенно для тропических регионов).\n"
-            "🔌 Адаптер для розеток.\n"
-            "📷 Фотоаппарат.\n"
-            "🧴 Средства личной гигиены.\n"
-            "💵 Небольшую сумму наличных (USD или EUR для обмена)."
-        ),
-        "Популярные места для посещения": ["Статуя Христа-Искупителя (Рио-де-Жанейро)", "Водопады Игуасу", "Амазонские джунгли"],
-        "Национальная кухня": ["Фейжоада", "Шурраско", "Мокека"],
-    },
-
-    "Великобритания": {
-        "Важные правила и особенности": (
-            "🇬🇧 Великобритания — страна с богатыми традициями и строгими социальными нормами 🇬🇧.\n"
-            "🚗 В стране действует левостороннее движение — историческое наследие, уходящее корнями в Средневековье.\n"
-            "📏 В общественных местах ценится порядок и соблюдение негласных правил поведения — их нарушение может вызвать недовольство окружающих.\n"
-            "🤝 Приветствие обычно ограничивается быстрым рукопожатием — задерживать руку считается невежливым.\n"
-            "🙂 В общении принято сдерживать эмоции: корректная отстранённость и вежливая улыбка — норма.\n"
-            "🍽️ За столом не принято шептаться — разговор должен быть общим. Чаевые демонстративно оставлять неприлично, их кладут незаметно под тарелку или салфетку.\n"
-            "🏠 В гости приходят только по заранее полученному приглашению, опаздывать не рекомендуется.\n"
-            "☕ Чаепитие — известная британская традиция, хотя классический «five o’clock tea» сегодня чаще носит символический характер.\n"
-            "📅 Bank Holidays — государственные выходные дни с особыми традициями (например, Boxing Day — 26 декабря).\n"
-            "🍖 Sunday Roast — традиционный воскресный обед с жареным мясом, овощами и йоркширским пудингом.\n"
-            "🎆 Guy Fawkes Night (5 ноября) отмечается кострами и фейерверками в память о событиях 1605 года."
-        ),
-        "Требуемые документы": (
-            "🛂 Для граждан РФ — обязательна туристическая виза Standard Visitor visa (до 6 месяцев пребывания).\n"
-            "📄 Заграничный паспорт — действителен на весь период поездки, с минимум одной пустой страницей.\n"
-            "📝 Заполненная онлайн-анкета на английском языке.\n"
-            "💼 Справка с места работы (или учёбы) с указанием дохода.\n"
-            "💳 Выписка с банковского счёта (рекомендуется от 50 £ на человека в день).\n"
-            "🏨 Документы, подтверждающие цель поездки: бронь жилья, билеты, маршрут.\n"
-            "🔗 Подтверждение связи со страной проживания (семья, недвижимость и т.д.).\n"
-            "👶 Документы на детей — при путешествии с несовершеннолетними.\n"
-            "📑 Подтверждение записи на подачу документов и чек об оплате визового сбора.\n"
-            "🌍 Все документы на русском языке должны иметь заверенный перевод на английский."
-        ),
-        "Список вещей, которые стоит взять": (
-            "📁 Документы и их копии.\n"
-            "👕 Одежду и обувь по сезону — погода переменчивая.\n"
-            "🌧️ Дождевик или зонт.\n"
-            "👟 Удобную обувь для прогулок.\n"
-            "📱 Технику и гаджеты с зарядными устройствами.\n"
-            "💊 Аптечку с базовыми медикаментами."
-        ),
-        "Популярные места для посещения": ["Биг-Бен (Лондон)", "Вестминстерское аббатство", "Музей Виктории и Альберта"],
-        "Национальная кухня": ["Ростбиф", "Говядина Веллингтон", "Пастуший пирог"],
-    },
-
-    "Германия": {
-        "Важные правила и особенности": (
-            "🇩🇪 Германия — страна порядка, пунктуальности и чётких правил жизни.\n"
-            "🗣️ Официальный язык — немецкий; в крупных городах широко говорят по-английски, в провинции — реже.\n"
-            "💶 Валюта — евро (EUR). Банковские карты принимают почти везде, но наличные всё ещё полезны.\n"
-            "⏱️ Пунктуальность крайне важна — опоздания на встречи, поезда и экскурсии считаются неуважением.\n"
-            "🔇 Существуют «тихие часы» (Ruhezeiten): вечером и по воскресеньям запрещены шумные работы и громкая музыка; магазины в воскресенье закрыты.\n"
-            "♻️ Раздельный сбор мусора обязателен: бумага (Papier), упаковка/пластик (Gelber Sack), биоотходы (Bio), остальное (Restmüll). Нарушения могут привести к штрафам.\n"
-            "🚆 Железные дороги Deutsche Bahn удобны и пунктуальны; билеты выгоднее покупать заранее.\n"
-            "🚗 На автобанах есть участки без ограничения скорости, но правила и безопасность строго соблюдаются.\n"
-            "🚦 Переход улицы на красный свет запрещён и может повлечь штраф.\n"
-            "🚭 Курение в закрытых общественных местах чаще всего запрещено.\n"
-            "🍺 Алкоголь разрешён: пиво и вино — с 16 лет, крепкий алкоголь — с 18.\n"
-            "🚴 Германия известна развитой велосипедной инфраструктурой и большим количеством пешеходных зон."
-        ),
-        "Требуемые документы": (
-            "🛂 Гражданам ЕС/ЕЭЗ — ID-карта или паспорт.\n"
-            "🌍 Гражданам других стран — заграничный паспорт и шенгенская виза (если требуется).\n"
-            "📅 Паспорт должен быть действителен минимум 3–6 месяцев после поездки.\n"
-            "🚘 Для вождения — национальные водительские права; иногда полезно международное удостоверение.\n"
-            "🏥 Медицинская страховка — обязательна (для граждан ЕС — EHIC, если применимо).\n"
-            "🏨 Подтверждение брони жилья и обратных билетов.\n"
-            "💊 Рецепты и оригинальные упаковки лекарств — при ввозе рецептурных препаратов.\n"
-            "📁 Копии документов — бумажные и электронные."
-        ),
-        "Список вещей, которые стоит взять": (
-            "📁 Паспорт/ID, виза, страховка и копии документов.\n"
-            "💳 Банковская карта и немного наличных евро.\n"
-            "🔌 Зарядные устройства, power bank, адаптер (тип F, подходит также C).\n"
-            "👟 Удобную обувь и многослойную одежду.\n"
-            "🌧️ Дождевик или зонт.\n"
-            "💊 Аптечку (обезболивающие, пластыри, средства от простуды).\n"
-            "🎒 Рюкзак для дневных прогулок, бутылку для воды (вода из-под крана питьевая).\n"
-            "📱 Офлайн-карты и приложения для транспорта (например, DB Navigator).\n"
-            "❄️ Зимой — тёплую одежду; ☀️ летом — солнцезащитный крем.\n"
-            "🧾 Билеты и распечатки бронирований."
-        ),
-        "Популярные места для посещения": ["Бранденбургские ворота (Берлин)", "Английский сад (Мюнхен)", "Эльбская филармония (Гамбург)"],
-        "Национальная кухня": ["Bratwurst (братвурст)", "Schnitzel (шницель)", "Pretzel / Brezel (бретцель)"],
-    },
-
-    "Греция": {
-        "Важные правила и особенности": (
-            "🇬🇷 Греция — страна с древней историей, православными традициями и богатой культурой.\n"
-            "🛂 Для въезда нужна шенгенская виза. Паспорт должен быть действителен минимум 3 месяца после окончания поездки.\n"
-            "🍷 Есть ограничения на ввоз алкоголя, сигарет и некоторых продуктов. Вывозить древности, камни с раскопок и находки с морского дна запрещено.\n"
-            "🔫 Ношение перцовых баллончиков, ножей с лезвием >10 см и других средств самообороны ограничено; для ввоза нужна лицензия.\n"
-            "✝️ Главные праздники — православные: Пасха и Рождество. В деревнях можно увидеть жителей в традиционной одежде на фестивалях, свадьбах и крестинах.\n"
-            "🎉 День ангела (именины) празднуют шире, чем день рождения; имена часто дают в честь святых."
-        ),
-        "Требуемые документы": (
-            "📝 Шенгенская виза типа C (для туристических поездок).\n"
-            "📄 Анкета (онлайн-заполненная, распечатанная и подписанная заявителем; для ребёнка — подписывает родитель/опекун).\n"
-            "📸 Два цветных фото размером 3,5 x 4 см на белом фоне, сделанные не ранее 6 месяцев назад.\n"
-            "🛂 Загранпаспорт, действительный минимум 3 месяца после окончания поездки, минимум 2 пустые страницы.\n"
-            "📑 Копия российского паспорта (личные данные, регистрация, сведения о браке, предыдущие паспорта).\n"
-            "🏨 Подтверждение проживания — бронь отеля или договор аренды.\n"
-            "✈️ Авиабилеты туда и обратно.\n"
-            "🏥 Медицинская страховка — покрытие минимум 30 000 евро на весь период.\n"
-            "💼 Дополнительно: справка с работы, выписка с банковского счёта, спонсорское письмо (если оплачивает родственник), биометрия (для всех старше 12 лет, если не сдавали за последние 5 лет)."
-        ),
-        "Список вещей, которые стоит взять": (
-            "📁 Паспорт/копии, виза, страховка.\n"
-            "👕 Одежда и обувь по сезону, удобная для прогулок.\n"
-            "📱 Техника и гаджеты с зарядными устройствами.\n"
-            "💊 Аптечка и средства личной гигиены.\n"
-            "🧴 Солнцезащитные средства, головной убор.\n"
-            "🎒 Рюкзак на день и бутылка для воды."
-        ),
-        "Популярные места для посещения": ["Акрополь (Афины) — Парфенон, Эрехтейон и храм Ники Аптерос", "Древняя Агора (Афины) — руины храмов, храм Гефеста", "Метеоры (Фессалия) — шесть монастырей на высоких скалах"],
-        "Национальная кухня": ["Долмадес — виноградные листья с рисом, луком, специями, иногда с мясом", "Мусака — запеканка из баклажанов, картофеля и мясного фарша под соусом бешамель", "Сувлаки — мясо на шпажках, маринованное в оливковом масле, лимоне и специях, жареное на гриле"],
-    },
-
-    "Грузия": {
-        "Важные правила и особенности": (
-            "🇬🇪 Грузия — страна с богатой историей, культурой и гостеприимством.\n"
-            "💰 Не оставляйте ценности в автомобиле на парковках у достопримечательностей.\n"
-            "💵 Не носите с собой крупные суммы наличных.\n"
-            "🗄️ Храните документы в сейфе отеля.\n"
-            "🌙 Не гуляйте поздно ночью в одиночку по тёмным проулкам."
-        ),
-        "Требуемые документы": (
-            "🛂 Для граждан России виза не требуется.\n"
-            "📄 Заграничный паспорт.\n"
-            "🏥 Медицинская страховка.\n"
-            "📑 Документы, подтверждающие цель поездки (бронь отеля, билеты и т.д.)."
-        ),
-        "Список вещей, которые стоит взять": (
-            "👕 Лёгкая одежда по сезону.\n"
-            "📱 Техника и гаджеты.\n"
-            "💊 Аптечка.\n"
-            "📁 Документы и их копии."
-        ),
-        "Популярные места для посещения": ["Старый город (Тбилиси) — исторический центр города", "Крепость Нарикала — расположена на скалистой возвышенности над рекой Кура", "Сионский собор — храм, освящённый в честь Успения Пресвятой Богородицы"],
-        "Национальная кухня": ["Хачапури — лепёшка с сырной начинкой", "Харчо — суп из говядины с рисом, грецкими орехами и тклапи/соусом ткемали", "Бадриджани — рулетики из баклажанов с начинкой из грецких орехов и специй"],
-    },
-
-    "Египет": {
-        "Важные правила и особенности": (
-            "🇪🇬 Египет — страна с древней историей, пирамидами и культурой Нила.\n"
-            "🕌 Уважайте религиозные и культурные традиции. В мечети и религиозных местах желательно прикрывать плечи и колени; снимать обувь перед входом — обязательно.\n"
-            "👗 Скромная одежда для женщин — предпочтительна, особенно вне туристических зон.\n"
-            "🤝 Приветствия обычно включают рукопожатие. Не прикасайтесь к людям без согласия, особенно к противоположному полу.\n"
-            "🚨 Будьте внимательны на улицах, особенно в Каире и Александрии: карманные кражи встречаются в многолюдных местах.\n"
-            "🌞 В солнечное время обязательно использовать солнцезащитный крем, носить головной убор и пить достаточно воды.\n"
-            "🚖 Такси и услуги транспорта — договаривайтесь о цене заранее или пользуйтесь официальными службами.\n"
-            "🚫 Запрещено фотографировать военные объекты, аэропорты, полицию и правительственные здания."
-        ),
-        "Требуемые документы": (
-            "🛂 Заграничный паспорт — действителен минимум 6 месяцев с момента въезда.\n"
-            "🎫 Виза — оформляется заранее или по прибытии в аэропорту (Visa on Arrival, обычно 30 дней).\n"
-            "✈️ Билеты туда и обратно — для подтверждения намерения покинуть страну.\n"
-            "🏨 Подтверждение брони проживания (отель, апартаменты, турпакет).\n"
-            "🏥 Медицинская страховка — рекомендуется иметь полис с покрытием лечения и репатриации.\n"
-            "💳 Подтверждение финансовой состоятельности — наличные, карты, выписка из банка."
-        ),
-        "Список вещей, которые стоит взять": (
-            "👕 Лёгкая одежда из натуральных тканей, закрывающая плечи и колени.\n"
-            "🥿 Удобная обувь для прогулок и экскурсий.\n"
-            "👒 Головной убор, солнцезащитные очки и крем с высоким SPF.\n"
-            "💦 Бутылка для воды, особенно для поездок в пустыню.\n"
-            "📱 Техника и гаджеты с зарядными устройствами, адаптеры для розеток типа C/F.\n"
-            "💊 Аптечка с необходимыми медикаментами.\n"
-            "🎒 Рюкзак на день для экскурсий.\n"
-            "🩱 Купальные принадлежности — для пляжей Красного моря и бассейнов."
-        ),
-        "Популярные места для посещения": ["Пирамиды Гизы и Сфинкс — одно из чудес света, символ Древнего Египта", "Луксор — Долина царей, Храм Карнака и Луксорский храм", "Асуан и Храм Филе — живописные места на Ниле, включая Абу-Симбел"],
-        "Национальная кухня": ["Кушари — блюдо из риса, макарон, чечевицы с томатным соусом и жареным луком", "Фул медамес — тушёные бобы с оливковым маслом, специями и лимоном", "Фалафель (Тaмея) — жареные шарики из нута и специй, популярная уличная еда"],
-    },
-
-    "Испания": {
-        "Важные правила и особенности": (
-            "🇪🇸 Испания — солнечная страна на Пиренейском полуострове ☀️, "
-            "включающая Канарские и Балеарские острова 🏝️. Климат разнообразный: "
-            "от средиземноморского на побережье до более континентального в центре.\n"
-            "😊 Испанцы общительные и доброжелательные, ценят уважение к традициям и местному ритму жизни.\n"
-            "😴 Во многих регионах существует сиеста — магазины могут закрываться с 14:00 до 17:00.\n"
-            "🍽️ Ужин начинается поздно: рестораны часто открываются после 20:00–21:00.\n"
-            "🔇 Шум в жилых районах во время сиесты и ночью может вызвать недовольство местных.\n"
-            "🚫 Запрещено распитие алкоголя на улице в туристических и ночных зонах — возможны штрафы.\n"
-            "🚭 На многих пляжах курение запрещено (зависит от региона).\n"
-            "👜 В крупных городах возможны карманные кражи — будьте внимательны.\n"
-            "🚨 Единый номер экстренных служб — 112."
-        ),
-        "Требуемые документы": (
-            "🛂 Заграничный паспорт — действителен минимум 3 месяца после выезда из Шенгенской зоны.\n"
-            "📄 Шенгенская виза или разрешение ETIAS (для граждан стран вне ЕС).\n"
-            "🏨 Подтверждение брони проживания.\n"
-            "✈️ Билеты туда и обратно или далее.\n"
-            "💶 Подтверждение финансовых средств.\n"
-            "🏥 Медицинская страховка — настоятельно рекомендуется.\n"
-            "👶 Для детей — свидетельство о рождении и нотариальное согласие при необходимости."
-        ),
-        "Список вещей, которые стоит взять": (
-            "📁 Документы и копии (паспорт, виза/ETIAS, страховка, билеты).\n"
-            "👟 Удобная обувь для прогулок.\n"
-            "👕 Лёгкая одежда для жаркой погоды.\n"
-            "🧥 Ветровка или свитер для вечеров.\n"
-            "🏖️ Купальник и пляжная одежда.\n"
-            "🕶️ Солнцезащитные очки и крем SPF.\n"
-            "💊 Мини-аптечка.\n"
-            "🔌 Зарядные устройства и переходник.\n"
-            "🔋 Портативный аккумулятор."
-        ),
-        "Популярные места для посещения": ["Собор Севильи", "Дворец Альгамбра (Гранада)", "Коста-Брава и Коста-дель-Соль"],
-        "Национальная кухня": ["Паэлья", "Хамон", "Тортилья"],
-    },
-
-    "Италия": {
-        "Важные правила и особенности": (
-            "🇮🇹 Италия — страна с богатой культурой, историей и семейными традициями.\n"
-            "👪 Семейные традиции: часто под одной крышей живут три поколения, пожилые родители активно участвуют в воспитании внуков.\n"
-            "🎉 Праздничные традиции: карнавал Венеции, Рождество, Новый год.\n"
-            "🤝 Обращение на «ты» — итальянцы обычно не используют «вы», даже с незнакомыми людьми, что воспринимается как дружеское отношение.\n"
-            "🌍 Региональное разнообразие: каждая область имеет свои кулинарные и культурные особенности; например, сицилийская кухня с арабскими влияниями, северные регионы с австрийским и французским влиянием, Неаполь — родина пиццы."
-        ),
-        "Требуемые документы": (
-            "📝 Распечатанная и подписанная анкета на визу.\n"
-            "🛂 Заграничный паспорт.\n"
-            "📄 Копии всех страниц паспорта с личными данными, штампами и визами.\n"
-            "🏨 Подтверждение брони проживания.\n"
-            "✈️ Бронь авиабилетов.\n"
-            "🏥 Медицинская страховка."
-        ),
-        "Список вещей, которые стоит взять": (
-            "👕 Одежда и удобная обувь.\n"
-            "🕶 Солнцезащитные очки.\n"
-            "👒 Головные уборы.\n"
-            "🧣 Лёгкий шарф (для храмов или прохладной погоды).\n"
-            "🔌 Зарядные устройства и беспроводная зарядка.\n"
-            "💊 Аптечка с необходимыми медикаментами."
-        ),
-        "Популярные места для посещения": ["Музеи Ватикана (Musei Vaticani) — комплекс музеев на территории Ватикана", "Колизей (Амфитеатр Флавиев) — памятник архитектуры Древнего Рима, Рим", "Галерея Боргезе (Galleria Borghese) — художественная коллекция семьи Боргезе в Риме"],
-        "Национальная кухня": ["Пицца Маргарита — с помидорами, моцареллой и базиликом", "Минестроне — густой овощной суп с пастой или рисом, иногда с мясом или бульоном", "Паста Каннеллони — трубочки пасты с начинкой из мяса, рикотты, шпината или грибов"],
-    },
-
-    "Казахстан": {
-        "Важные правила и особенности": (
-            "🇰🇿 Казахстан — огромная страна в Центральной Азии 🌏 с разнообразными ландшафтами: "
-            "от бескрайних степей до высоких гор и каньонов. Девятая по размеру страна мира с множеством природных чудес и красивых озёр 🏞️.\n"
-            "🗣 Официальный язык — казахский, но широко используется русский.\n"
-            "🤝 Местные традиции гостеприимства очень сильны: угощения, приглашения в юрты и семейные обеды.\n"
-            "🕌 Большая часть населения исповедует ислам, страна светская — религиозные свободы защищены.\n"
-            "👗 В религиозных местах стоит соблюдать умеренный стиль одежды и уважительное поведение.\n"
-            "🚦 В крупных городах соблюдайте ПДД: штрафы высокие, камеры фиксируют нарушения.\n"
-            "🌿 В заповедниках и каньонах важно соблюдать охрану природы и не оставлять мусор."
-        ),
-        "Требуемые документы": (
-            "🛂 Заграничный паспорт — действителен весь срок поездки.\n"
-            "💻 Виза/безвиз: для некоторых стран нужна виза или e-visa.\n"
-            "📄 Приглашение или подтверждение цели поездки (для визы).\n"
-            "✈️ Билеты туда-обратно.\n"
-            "🏨 Подтверждение проживания (бронь отеля/апартаментов).\n"
-            "🏥 Медицинская страховка.\n"
-            "👶 Если с детьми — разрешения/свидетельства.\n"
-            "⏳ Пребывание более 30 дней — разрешение от принимающей стороны."
-        ),
-        "Список вещей, которые стоит взять": (
-            "📁 Документы и копии (паспорт, виза/безвиз, страховка, билеты, подтверждение проживания, карты + наличные 💰).\n"
-            "👟 Удобная обувь.\n"
-            "🧥 Одежда по сезону: летом жарко, зимой холодно ❄️.\n"
-            "🧥 Теплая куртка для горных районов.\n"
-            "🕶 Солнцезащитные очки, крем, головной убор.\n"
-            "💊 Мини-аптечка.\n"
-            "🔌 Зарядные устройства + переходники.\n"
-            "🗺 Карты/приложения для навигации.\n"
-            "📖 Бумажные путеводители/контакты посольства."
-        ),
-        "Популярные места для посещения": ["Монумент Байтерек", "ТЦ «Хан-Шатыр»", "Дворец мира"],
-        "Национальная кухня": ["Бешбармак", "Казы", "Кумыс и шубат"],
-    },
-
-    "Канада": {
-        "Важные правила и особенности": (
-            "🇨🇦 Канада — многоязычная страна с двумя официальными языками: английским и французским. "
-            "В крупных городах большинство говорит по-английски, в Квебеке и некоторых регионах преобладает французский.\n"
-            "🤝 Канадцы вежливы и дружелюбны — используйте слова 'пожалуйста' и 'спасибо'.\n"
-            "🪶 Проявляйте уважение к культуре коренных народов (инуиты, индейцы).\n"
-            "🚭 Соблюдайте законы: запрещено курение в общественных местах, следите за правилами дорожного движения.\n"
-            "📚 Соблюдайте этикет в общественных местах: тишина в библиотеках, корректное поведение в транспорте.\n"
-            "⚠️ Будьте внимательны к личной безопасности и ценным вещам."
-        ),
-        "Требуемые документы": (
-            "🛂 Заграничный паспорт с визой — действителен на весь период поездки.\n"
-            "🏥 Медицинская страховка не обязательна, но рекомендуется из-за высокой стоимости медицины."
-        ),
-        "Список вещей, которые стоит взять": (
-            "💻 Электроприборы с поддержкой 110V и переходники.\n"
-            "🧥 Зимняя одежда и удобная обувь.\n"
-            "💊 Аптечка с привычными лекарствами.\n"
-            "📱 Техника, ноутбук, по желанию русская клавиатура.\n"
-            "📚 Детские книги на русском языке (по необходимости)."
-        ),
-        "Популярные места для посещения": ["Ниагарский водопад — знаменитый водопад на границе с США.", "Телебашня CN Tower (Торонто) — панорама города с вращающегося ресторана.", "Базилика Нотр-Дам в Монреале — крупнейший колокол в Северной Америке.", "Национальный парк Банф — горы, леса и альпийские озера, объект ЮНЕСКО."],
-        "Национальная кухня": ["Путин — картофель фри с сыром и мясной подливой.", "Туртьер — рождественский мясной пирог.", "Пирог Раппи — картофельная запеканка с мясом, популярная у франкоязычных канадцев."],
-    },
-
-    "Китай": {
-        "Важные правила и особенности": (
-            "🇨🇳 Официальный язык — путунхуа (мандарин). В туристических центрах часто говорят по-английски, "
-            "в провинции — реже. Полезно знать несколько фраз на китайском или иметь офлайн‑переводчик.\n"
-            "💳 Платежи: WeChat Pay и Alipay доминируют, карты Visa/Mastercard принимают не везде, лучше иметь наличные.\n"
-            "🌐 Доступ к Google, Facebook, WhatsApp, YouTube ограничен — многие используют VPN.\n"
-            "🙇‍♂️ Уважение к старшим и общественному порядку ценится. В храмах и монастырях ведите себя тихо, носите скромную одежду.\n"
-            "🥢 За столом: не втыкать палочки в рис вертикально, не тыкать палочками в людей.\n"
-            "⚠️ Что нельзя: обсуждать чувствительные политические темы, фотографировать военные объекты, ввоз/вывоз запрещённых товаров и наркотиков.\n"
-            "🚄 Интересные факты: крупнейшая сеть скоростных поездов в мире, тысячелетняя история, разнообразие региональных кухонь, чайная культура, традиционная медицина."
-        ),
-        "Требуемые документы": (
-            "🛂 Паспорт — действителен на весь период поездки (желательно +6 месяцев).\n"
-            "📝 Виза — туристическая виза L (для россиян действует безвиз с 15.09.2025 по 14.09.2026).\n"
-            "✈️ Билеты туда и обратно, подтверждение проживания.\n"
-            "🏥 Медицинская страховка — рекомендуется.\n"
-            "🚗 Водительские права — международные обычно не признаются; для аренды авто нужны китайские права или временное разрешение.\n"
-            "📄 Копии документов — паспорта, визы, страховки, билетов."
-        ),
-        "Список вещей, которые стоит взять": (
-            "📄 Документы: паспорт, виза, копии, страховка, билеты, брони отелей.\n"
-            "📱 Электроника: телефон, зарядные, power bank, переходник (тип I и A/C, 220V/50Hz).\n"
-            "💳 SIM/eSIM: местная SIM или роуминг; для регистрации нужен паспорт.\n"
-            "💵 Наличные: немного юаней (CNY) для рынков и мелких кафе.\n"
-            "👟 Удобная обувь, одежда по сезону, многослойная для гор и провинций.\n"
-            "💊 Медикаменты: личные лекарства + рецепты с переводом.\n"
-            "😷 Маски и средства гигиены (в городах возможен смог).\n"
-            "🗺️ Карта офлайн, навигация, офлайн-переводчик, небольшой рюкзак на день, бутылка воды.\n"
-            "🔌 Адаптер/разветвитель, флешка с копиями документов, портативный Wi‑Fi (опционально)."
-        ),
-        "Популярные места для посещения": ["Запретный город (Forbidden City) — императорский дворец на Площади Тяньаньмэнь, Летний дворец.", "Набережная Бунд (Bund) в Шанхае.", "Центр по разведению панд (Giant Panda Breeding Center) в Чэнду."],
-        "Национальная кухня": ["Пекинская утка (Peking duck) — хрустящая кожа, тонкие блинчики, соус.", "Сычуаньская кухня: острый hotpot, Mapo tofu.", "Суповые и паровые бао (xiaolongbao — суповые пельмени Шанхая)."],
-    },
-
-    "Норвегия": {
-        "Важные правила и особенности": (
-            "🇳🇴 Курение запрещено в общественных местах: рестораны, кафе, транспорт, рабочие места, парки и детские площадки.\n"
-            "📸 Фотографировать запрещено в военных зонах и на частных территориях.\n"
-            "🎆 Фейерверки разрешены только в новогоднюю ночь с 18:00 31 декабря до 03:00 1 января.\n"
-            "🙇‍♂️ Норвежцы ценят личное пространство, редко общаются с незнакомцами. Традиция выходного дня — 'фрилюфтслив' — жизнь на свежем воздухе.\n"
-            "⚠️ Туристам: не оставляйте ценные вещи без присмотра, соблюдайте экологические правила, сохраняйте чеки и документы."
-        ),
-        "Требуемые документы": (
-            "🛂 Гражданам России нужна шенгенская виза.\n"
-            "📝 Базовый комплект: сопроводительное письмо, квитанция об оплате госпошлины, загранпаспорт (действителен ≥3 мес после выезда), фото 3,5×4 см, копии страниц внутреннего паспорта, чек-лист документов, страховой полис (≥30 000 €, Шенген), финансовые документы (выписка с банковского счёта/карты за 3 месяца)."
-        ),
-        "Список вещей, которые стоит взять": (
-            "🧥 Одежда и обувь для переменчивой погоды, многослойность.\n"
-            "📱 Техника: телефон, зарядные устройства, переходники.\n"
-            "💊 Аптечка и личные лекарства.\n"
-            "📄 Документы: паспорт, визы, страховка, билеты, брони отелей."
-        ),
-        "Популярные места для посещения": ["Гейрангер-фьорд — объект Всемирного наследия ЮНЕСКО.", "Берген — 'город семи гор', район Брюгген включён в список ЮНЕСКО.", "Согне-фьорд — самый длинный и глубокий фьорд страны, 205 км, живописные деревни на берегах."],
-        "Национальная кухня": ["Лютефиск — сушёная треска, вымоченная в щёлоке, подается с гороховым пюре, картофелем, беконом и сливочным соусом.", "Форикол — тушёная баранина с капустой и чёрным перцем, часто с варёным картофелем.", "Юлекаке — рождественский дрожжевой пирог с кардамоном, цукатами, изюмом и миндалём."],
-    },
-
-    "ОАЭ": {
-        "Важные правила и особенности": (
-            "🇦🇪 ОАЭ — страна Персидского залива с современной инфраструктурой и богатой культурой 🏙️.\n"
-            "🕌 Официальный язык — арабский, но в туристических местах широко используется английский.\n"
-            "👗 Следует носить скромную одежду: шорты выше колен и открытые плечи лучше избегать.\n"
-            "🍹 Алкоголь разрешён только в лицензированных барах, ресторанах и отелях; пить на улице запрещено.\n"
-            "🤝 Публичное проявление чувств (поцелуи, объятия) запрещено.\n"
-            "📸 Запрещено фотографировать государственные учреждения, аэропорты и военные объекты.\n"
-            "⚠️ Агрессия, оскорбления и использование нецензурной лексики караются штрафами или арестом."
-        ),
-        "Требуемые документы": (
-            "🛂 Загранпаспорт — действителен минимум 6 месяцев.\n"
-            "📄 Виза — туристическая (оформляется онлайн или по прибытию для граждан России).\n"
-            "✈️ Билеты туда и обратно, подтверждение проживания (бронь отеля или апартаментов).\n"
-            "🏥 Медицинская страховка — рекомендуется.\n"
-            "🚗 Для поездок на автомобиле — международные водительские права."
-        ),
-        "Список вещей, которые стоит взять": (
-            "🧥 Лёгкая, дышащая одежда из натуральных тканей, головной убор, солнцезащитные очки.\n"
-            "👟 Удобная обувь для прогулок и экскурсий.\n"
-            "💊 Аптечка с основными лекарствами, солнцезащитный крем.\n"
-            "📱 Техника: телефон, зарядные устройства, переходник (тип G, 220V).\n"
-            "📁 Документы: паспорт, виза, страховка, билеты, брони жилья."
-        ),
-        "Популярные места для посещения": ["Бурдж-Халифа (Дубай)", "Пальмовый остров (Дубай)", "Шейх-Зайед мечеть (Абу-Даби)", "Дубайский фонтан"],
-        "Национальная кухня": ["Шаурма", "Мачбус", "Лукум и финики"],
-    },
-
-    "Португалия": {
-        "Важные правила и особенности": (
-            "🇵🇹 Официальный язык — португальский, в городах и туристических зонах многие говорят по-английски.\n"
-            "🤝 Португальцы ценят вежливость: используйте приветствия и благодарности.\n"
-            "🚭 Курение запрещено в общественных местах, транспорте и некоторых пляжах.\n"
-            "👗 В религиозных зданиях носите скромную одежду (закрытые плечи, юбки ниже колен).\n"
-            "💰 Чаевые 5–10% обычно оставляют незаметно.\n"
-            "🕊️ Безопасно гулять в любое время суток, но не оставляйте ценности без присмотра.\n"
-            "💧 Вода из-под крана пригодна для питья, но в некоторых регионах лучше покупать бутилированную.\n"
-            "🏥 Аптеки работают в обычные часы, в случае страхового случая звоните в страховую или гиду."
-        ),
-        "Требуемые документы": (
-            "🛂 Загранпаспорт с визой.\n"
-            "✈️ Авиабилеты.\n"
-            "🏨 Бронь отеля.\n"
-            "🏥 Медицинская страховка.\n"
-            "🚗 Водительское удостоверение (для аренды авто).\n"
-            "💳 Банковские карты и наличные.\n"
-            "📸 4–6 фото 3x4 на случай утери документов."
-        ),
-        "Список вещей, которые стоит взять": (
-            "🧥 Лёгкая одежда, пара тёплых вещей на вечер.\n"
-            "☔ Зонтик для дождливых дней.\n"
-            "👟 Удобная обувь для прогулок по мощёным улицам.\n"
-            "🎩 Одежда для мероприятий с дресс-кодом: костюм для мужчин, вечернее платье для женщин."
-        ),
-        "Популярные места для посещения": ["Монастырь Жеронимуш", "Башня Белен", "Мыс Рока"],
-        "Национальная кухня": ["Пири-пири — куриные бёдрышки с острым перцем", "Калду верде — густой суп с капустой, картофелем и чорисо", "Сома же перде — суп из камней"],
-    },
-
-    "Россия": {
-        "Важные правила и особенности": (
-            "🇷🇺 Россия — крупнейшая страна мира 🌍, раскинувшаяся от Европы до Азии. "
-            "Климат сильно различается: от суровых зим ❄️ в Сибири до мягкой погоды на юге ☀️.\n"
-            "🛂 Иностранцам необходимо соблюдать миграционные правила: регистрация по месту проживания обязательна.\n"
-            "🚨 Полиция может проверить документы — всегда имейте при себе паспорт или копию.\n"
-            "🚇 Общественный транспорт развит, особенно в крупных городах (метро 🚉, электрички).\n"
-            "🚭 Курение запрещено в общественных местах.\n"
-            "⚠️ Алкоголь нельзя пить на улице.\n"
-            "🕌 Посещая храмы, соблюдайте дресс-код и правила поведения.\n"
-            "🤝 Русские могут выглядеть сдержанными, но ценят вежливость и уважение."
-        ),
-        "Требуемые документы": (
-            "🛂 Заграничный паспорт — обязателен для въезда.\n"
-            "📄 Виза — требуется большинству иностранцев (кроме стран с безвизовым режимом).\n"
-            "🏨 Миграционная карта — заполняется при въезде.\n"
-            "📍 Регистрация по месту пребывания (обычно оформляет отель).\n"
-            "✈️ Обратные билеты.\n"
-            "🏥 Медицинская страховка — рекомендуется."
-        ),
-        "Список вещей, которые стоит взять": (
-            "📁 Документы и копии.\n"
-            "🧥 Тёплая одежда по сезону.\n"
-            "👟 Удобная обувь.\n"
-            "💳 Банковские карты и наличные.\n"
-            "🔌 Зарядные устройства.\n"
-            "💊 Аптечка."
-        ),
-        "Популярные места для посещения": ["Красная площадь", "Эрмитаж", "Байкал"],
-        "Национальная кухня": ["Борщ", "Пельмени", "Блины"],
-    },
-
-    "Румыния": {
-        "Важные правила и особенности": (
-            "🇷🇴 Въезд: с 2025 года Румыния в Шенгене. Для россиян нужна шенгенская виза или румынская виза.\n"
-            "🤝 Приветствия: рукопожатие, женщинам иногда целуют руку. Гостеприимство широко развито.\n"
-            "💬 Открытость: румыны могут обсуждать политику, религию, доходы.\n"
-            "🚗 Транспорт и безопасность: соблюдайте правила движения, будьте осторожны на горных трассах."
-        ),
-        "Требуемые документы": (
-            "🛂 Загранпаспорт (действителен минимум 3 месяца).\n"
-            "📄 Виза: транзитная (A, B), краткосрочная (C), национальная (D).\n"
-            "✈️ Билеты туда/обратно, бронь жилья.\n"
-            "🏥 Медицинская страховка рекомендуется."
-        ),
-        "Список вещей, которые стоит взять": (
-            "💊 Аптечка: обезболивающие, препараты от желудка, глазные капли, средства от аллергии.\n"
-            "🧥 Одежда: лёгкая для летних курортов, тёплая и спортивная для гор; купальник, зонт, шапка, шарф.\n"
-            "👟 Удобная обувь для прогулок и экскурсий.\n"
-            "📱 Техника: смартфон, планшет, пауэрбанк, водонепроницаемый чехол, наушники."
-        ),
-        "Популярные места для посещения": ["Замок Бран", "Замок Пелеш", "Трансфэгэрашское шоссе"],
-        "Национальная кухня": ["Salata de vinete — баклажанный салат с дымным вкусом", "Козунак — сладкий хлеб/пирог с орехами и изюмом", "Чорба — кислый суп с курицей и овощами"],
-    },
-
-    "Северная Корея": {
-        "Важные правила и особенности": (
-            "🇰🇵 Въезд только по организованному туру с аккредитованным туроператором.\n"
-            "🛂 Таможня: обязательная декларация ценных вещей; ограничен ввоз алкоголя и сигарет; запрещены печатные материалы, видео с критикой, оружие.\n"
-            "🚶‍♂️ Поведение: самостоятельные прогулки запрещены, турист сопровождается гидом; фото и видео только с разрешения.\n"
-            "⚠️ Темы, которых стоит избегать: Южная Корея, США, Япония, государственная идеология и лидеры.\n"
-            "🤝 Общение: вежливость и сдержанность обязательны, сарказм и громкие разговоры неприемлемы."
-        ),
-        "Требуемые документы": (
-            "🛂 Загранпаспорт, действительный минимум 3 месяца.\n"
-            "📄 Виза: отдельная визовая карточка, выдаваемая до поездки, изымается при выезде.\n"
-            "✈️ Тур бронируется заранее через туроператора (10–21 день на оформление визы)."
-        ),
-        "Список вещей, которые стоит взять": (
-            "💊 Аптечка: жаропонижающее, обезболивающее, средства от желудка, аллергии, антисептики.\n"
-            "🧥 Одежда: нейтральная, закрытые плечи и колени, сменная обувь, тёплый комплект для холодной погоды.\n"
-            "📱 Техника: универсальный адаптер, пауэрбанк, фотоаппарат или смартфон с камерой.\n"
-            "💵 Деньги: евро или юани, мелкие купюры."
-        ),
-        "Популярные места для посещения": ["Кымсусанский дворец Солнца", "Музей Корейской революции", "Гробница Конмин-вана"],
-        "Национальная кухня": ["Нэнмен — гречневая лапша с мясом, яйцом и кимчи", "Манду — северокорейские пельмени (жареные, на пару или варёные)", "Кимчи — ферментированные овощи, особенно пекинская капуста"],
-    },
-
-    "Сербия": {
-        "Важные правила и особенности": (
-            "🇷🇸 Сербия — гостеприимная страна Балкан с богатой историей 🏰 и культурой.\n"
-            "🤝 Сербы дружелюбны и открыты к туристам.\n"
-            "🗣 Широко используется сербский язык, но в туристических местах говорят по-английски.\n"
-            "🚭 Курение разрешено во многих кафе, но ограничения постепенно вводятся.\n"
-            "💶 Чаевые не обязательны, но приветствуются.\n"
-            "⚠️ Соблюдайте правила дорожного движения.\n"
-            "🕌 В религиозных местах соблюдайте скромный внешний вид."
-        ),
-        "Требуемые документы": (
-            "🛂 Заграничный паспорт.\n"
-            "📄 Безвизовый режим для многих стран (до 30–90 дней).\n"
-            "✈️ Обратные билеты.\n"
-            "🏨 Подтверждение проживания.\n"
-            "🏥 Медицинская страховка."
-        ),
-        "Список вещей, которые стоит взять": (
-            "📁 Документы и копии.\n"
-            "👟 Удобная обувь.\n"
-            "🧥 Одежда по сезону.\n"
-            "💳 Банковские карты и наличные.\n"
-            "📱 Смартфон с навигацией.\n"
-            "💊 Мини-аптечка."
-        ),
-        "Популярные места для посещения": ["Калемегдан", "Скадарлия", "Златибор"],
-        "Национальная кухня": ["Ćevapčići", "Pljeskavica", "Burek"],
-    },
-
-    "США": {
-        "Важные правила и особенности": (
-            "🇺🇸 США (Соединённые Штаты Америки) — огромная страна в Северной Америке 🌎 с 50 штатами, "
-            "от мегаполисов 🏙️ до национальных парков 🏞️, от Атлантического до Тихого океана 🌊. "
-            "Ландшафты и климат сильно различаются по регионам.\n"
-            "⚖️ Законы и правила отличаются по штатам — то, что разрешено в одном, может быть запрещено в другом (алкоголь 🍺, курение 🚬, штрафы 💵, налоги 📊).\n"
-            "🤝 В общественных местах уважайте других: не мусорьте 🚯, не шумите 🤫, соблюдайте очереди ⏳. "
-            "Индивидуализм и личное пространство ценятся.\n"
-            "💵 Чаевые — обычная практика: 15–20 % от суммы в ресторанах.\n"
-            "🛒 Цена на ценнике часто не включает налог штата, добавляется на кассе (5–10 % и выше).\n"
-            "🚨 Безопасность: будьте внимательны в крупных городах, не оставляйте вещи без присмотра.\n"
-            "📞 Номер экстренных служб — 911.\n"
-            "⚠️ В конце 2025 года обсуждаются предложения об изменении правил въезда, включая возможное предоставление соцсетей и биометрических данных (ESTA) — пока это предложения."
-        ),
-        "Требуемые документы": (
-            "🛂 Заграничный паспорт — действителен весь срок поездки.\n"
-            "💳 Виза США — туристическая B1/B2 требуется большинству стран (для граждан России почти всегда). "
-            "В рамках Visa Waiver Program 🇺🇸 можно до 90 дней по разрешению ESTA.\n"
-            "📝 Форма I-94 — иммиграционная карточка, сохраняйте до отъезда.\n"
-            "🏨 Подтверждение проживания (адрес отеля/апартаментов).\n"
-            "✈️ Билеты туда и обратно.\n"
-            "🏥 Медицинская страховка (рекомендуется).\n"
-            "👶 Для детей — свидетельства и при необходимости разрешение родителей/опекунов."
-        ),
-        "Список вещей, которые стоит взять": (
-            "📁 Документы и копии (паспорт, виза/ESTA, страховка, билеты, подтверждение проживания).\n"
-            "💵 Банковские карты и наличные USD — для чаевых, транспорта и мелких покупок.\n"
-            "👟 Удобная обувь и туристическая одежда.\n"
-            "👕 Одежда по сезону: летом жарко ☀️, зимой холодно ❄️.\n"
-            "🔌 Зарядные устройства + переходники (тип A/B, ~120 В).\n"
-            "💊 Аптечка с основными лекарствами.\n"
-            "🗺 Карты и приложения для навигации (Google Maps, Roadtrippers).\n"
-            "📞 Контакты консульства/посольства."
-        ),
-        "Популярные места для посещения": ["Статуя Свободы", "Голливуд", "Белый дом"],
-        "Национальная кухня": ["Бургер", "Стейк", "Пицца"],
-    },
-
-    "Таиланд": {
-        "Важные правила и особенности": (
-            "🇹🇭 Таиланд — гостеприимная страна Юго-Восточной Азии 🌴 с богатой культурой и древними традициями.\n"
-            "👑 Любые оскорбления королевской семьи строго запрещены и уголовно наказуемы.\n"
-            "🧠 Голова считается священной частью тела — нельзя трогать за голову взрослых и детей.\n"
-            "🚯 Запрещено разбрасывать мусор и курить в неположенных местах — предусмотрены штрафы.\n"
-            "😌 Публичная агрессия и потеря самообладания считаются крайне неприличными.\n"
-            "🙏 Традиционное приветствие — «wai» (ладони сложены в молитвенном жесте).\n"
-            "🚕 В такси рекомендуется заранее договариваться о цене или пользоваться таксометром.\n"
-            "💦 Тайский Новый год Сонгкран сопровождается массовыми водными праздниками по всей стране."
-        ),
-        "Требуемые документы": (
-            "🛂 Заграничный паспорт — действителен не менее 6 месяцев с даты въезда.\n"
-            "📄 Виза или Visa on Arrival — для краткосрочного пребывания граждан большинства стран.\n"
-            "✈️ Авиабилеты туда и обратно.\n"
-            "🏥 Медицинская страховка — настоятельно рекомендуется, особенно для активного отдыха."
-        ),
-        "Список вещей, которые стоит взять": (
-            "👕 Лёгкая одежда из хлопка или льна.\n"
-            "🏖️ Купальники и пляжная обувь.\n"
-            "🧢 Головной убор и солнцезащитные средства.\n"
-            "👟 Удобная обувь для экскурсий.\n"
-            "🦟 Репелленты от насекомых.\n"
-            "💊 Аптечка первой помощи (жаропонижающие, пластыри, средства от расстройства желудка)."
-        ),
-        "Популярные места для посещения": ["Бангкок — Королевский дворец", "Национальный парк Сиринат (Пхукет)", "Храм Ват Пхо (Лежащий Будда)"],
-        "Национальная кухня": ["Том Ям", "Пад Тай", "Сом Там"],
-    },
-
-    "Турция": {
-        "Важные правила и особенности": (
-            "🇹🇷 Уважение к исламу, мечетям и традициям местных жителей обязательно.\n"
-            "🕌 В мечетях: мужчины — длинные штаны и закрытые плечи, женщины — платок и закрытая одежда; нельзя громко разговаривать и фотографировать во время молитвы.\n"
-            "⚖️ Публичная демонстрация чувств, ругательства и критика правительства нежелательны.\n"
-            "📸 Не фотографировать местных без разрешения, особенно женщин в хиджабе.\n"
-            "🚭 Курение и алкоголь в общественных местах запрещены.\n"
-            "🕌 Традиции сочетаются с современным образом жизни в больших городах."
-        ),
-        "Требуемые документы": (
-            "🛂 Загранпаспорт.\n"
-            "🏥 Медицинская страховка.\n"
-            "✈️ Билеты."
-        ),
-        "Список вещей, которые стоит взять": (
-            "🧥 Одежда и обувь по сезону.\n"
-            "🕶 Солнцезащитный крем (летом).\n"
-            "💊 Аптечка.\n"
-            "📁 Документы и копии."
-        ),
-        "Популярные места для посещения": ["Собор Святой Софии (Айя-София)", "Археологический музей Стамбула", "Галатская башня (Galata Kulesi)"],
-        "Национальная кухня": ["Пахлава — сладкая многослойная выпечка с орехами", "Симит — турецкий бублик с кунжутом", "Лахмаджун — тонкая лепёшка с мясной начинкой"],
-    },
-
-    "Финляндия": {
-        "Важные правила и особенности": (
-            "🇫🇮 Официальный язык — финский и шведский, английский широко используется в городах и туристических местах.\n"
-            "🤝 Финны ценят личное пространство, вежливость и пунктуальность.\n"
-            "🚭 Курение запрещено в общественных местах, общественном транспорте и на детских площадках.\n"
-            "🛂 Публичное употребление алкоголя ограничено; пить на улице нельзя.\n"
-            "🛷 Зимой соблюдайте осторожность на скользких улицах и при езде на дорогах.\n"
-            "📸 Фотографировать людей без разрешения нежелательно, особенно в саунах и частных домах.\n"
-            "🌲 В Финляндии действует право свободного посещения природы (Everyman’s Right), но нельзя повреждать растения и нарушать частную собственность."
-        ),
-        "Требуемые документы": (
-            "🛂 Загранпаспорт, действительный не менее 3 месяцев после выезда.\n"
-            "📄 Шенгенская виза для граждан России.\n"
-            "✈️ Билеты туда и обратно.\n"
-            "🏨 Подтверждение проживания.\n"
-            "🏥 Медицинская страховка — рекомендуется."
-        ),
-        "Список вещей, которые стоит взять": (
-            "🧥 Тёплая одежда и термобельё для зимнего периода.\n"
-            "👟 Удобная обувь с противоскользящей подошвой.\n"
-            "🕶 Солнцезащитные очки и крем (летом).\n"
-            "💊 Аптечка с базовыми лекарствами.\n"
-            "📁 Документы и копии.\n"
-            "🔌 Зарядные устройства и переходник (тип F, 230V)."
-        ),
-        "Популярные места для посещения": ["Хельсинки — Сенатская площадь", "Лапландия — дом Санта-Клауса", "Национальный парк Лемменйоки — прогулки по дикой природе и саамская культура"],
-        "Национальная кухня": ["Карельские пирожки — тесто с рисовой или картофельной начинкой", "Лосось — запечённый или копчёный, часто подают с картофелем", "Рёсти — картофельная запеканка, популярное блюдо на завтрак"],
-    },
-
-    "Франция": {
-        "Важные правила и особенности": (
-            "🇫🇷 Франция — страна искусства 🎨, моды 👗 и гастрономии 🥐.\n"
-            "🤝 Вежливость важна: принято здороваться и благодарить.\n"
-            "🚇 Транспорт развит, билеты нужно сохранять до конца поездки.\n"
-            "🚭 Курение запрещено в закрытых общественных местах.\n"
-            "⚠️ В туристических районах возможны карманники.\n"
-            "🕌 В храмах соблюдайте скромный внешний вид.\n"
-            "💶 Чаевые не обязательны — сервис включён в счёт."
-        ),
-        "Требуемые документы": (
-            "🛂 Заграничный паспорт.\n"
-            "📄 Шенгенская виза (если требуется).\n"
-            "✈️ Билеты туда и обратно.\n"
-            "🏨 Подтверждение проживания.\n"
-            "🏥 Медицинская страховка."
-        ),
-        "Список вещей, которые стоит взять": (
-            "📁 Документы и копии.\n"
-            "👟 Удобная обувь.\n"
-            "🧥 Лёгкая куртка.\n"
-            "📷 Камера или смартфон.\n"
-            "💳 Банковские карты и наличные евро.\n"
-            "🔌 Переходник."
-        ),
-        "Популярные места для посещения": ["Эйфелева башня", "Лувр", "Версаль"],
-        "Национальная кухня": ["Круассаны", "Багеты", "Сыр"],
-    },
-
-    "Швейцария": {
-        "Важные правила и особенности": (
-            "🇨🇭 Шенгенская страна, въезд для россиян — по визе.\n"
-            "🛂 Для детей нужен отдельный загранпаспорт, при поездке с одним родителем — разрешение от второго.\n"
-            "🚫 Ввоз мяса, молочных продуктов, мёда и других продуктов животного происхождения запрещён.\n"
-            "🚋 Общественный транспорт — трамваи и автобусы, билеты покупаются в автоматах.\n"
-            "🔒 Не оставляйте вещи без присмотра, остерегайтесь карманников.\n"
-            "🌦 Погода переменчивая, особенно в горах — берите тёплую и водонепроницаемую одежду."
-        ),
-        "Требуемые документы": (
-            "🛂 Загранпаспорт — действителен минимум 3 месяца.\n"
-            "📄 Шенгенская или швейцарская виза.\n"
-            "🏥 Медицинская страховка с покрытием от 30 000 евро.\n"
-            "✈️ Билеты туда и обратно."
-        ),
-        "Список вещей, которые стоит взять": (
-            "💊 Аптечка — обезболивающее, жаропонижающее, препараты от желудка, наружные средства.\n"
-            "🧥 Многослойная одежда и тёплые вещи.\n"
-            "👟 Обувь с нескользкой подошвой.\n"
-            "🩱 Купальные костюмы для бассейнов.\n"
-            "🔌 Адаптер для розеток, пауэрбанк, наушники с шумоподавлением."
-        ),
-        "Популярные места для посещения": ["Железная дорога Горнерграт — панорамы Маттерхорна и Альп.", "Цюрихский зоопарк — более 4,5 тыс. животных, множество климатических зон.", "Шильонский замок — средневековая крепость и музей на Женевском озере."],
-        "Национальная кухня": ["Гешнетцельтес — телятина или курица в сливочном соусе с грибами.", "Холермус — традиционный завтрак из яиц, муки и сливок, с мясным или десертным наполнением.", "Цугер киршторт — знаменитый вишнёвый торт с кремом на основе кирша."],
-    },
-
-    "Южная Корея": {
-        "Важные правила и особенности": (
-            "🇰🇷 Южная Корея — современное государство в Восточной Азии 🌏, юг Корейского полуострова, "
-            "столица Сеул 🏙️, население более 50 млн.\n"
-            "🏯 Сочетает ультрасовременные мегаполисы ✨ с древними дворцами и храмами ⛩️.\n"
-            "🧹 Чистота важна: улицы без мусора 🚯, в транспорте тихо 🤫.\n"
-            "💰 Чаевые не обязательны.\n"
-            "👟 Снимать обувь при входе в дома, храмы и школы 🙏.\n"
-            "🚇 Общественный транспорт точный, чистый и удобный.\n"
-            "🛃 На таможне строго к продуктам 🥩🥕, растениям 🌱 и животным 🐾 — декларация 📄."
-        ),
-        "Требуемые документы": (
-            "🛂 Заграничный паспорт — действителен на весь срок поездки.\n"
-            "💻 K-ETA — электронное разрешение на въезд.\n"
-            "📅 До 60 дней без визы для большинства туристов.\n"
-            "🎓 Длительное пребывание или работа/учёба — отдельная виза.\n"
-            "✈️ Билеты туда и обратно.\n"
-            "🏨 Подтверждение проживания.\n"
-            "🏥 Медицинская страховка.\n"
-            "👶 Для детей — свидетельства и разрешения.\n"
-            "🛃 Биометрическая идентификация: отпечатки ✋ и фото 📸."
-        ),
-        "Список вещей, которые стоит взять": (
-            "📁 Документы и копии (паспорт, K-ETA, страховка, билеты, подтверждение проживания).\n"
-            "💳 Банковские карты и немного наличных ₩.\n"
-            "👟 Удобная обувь.\n"
-            "👕 Одежда по сезону: холодные зимы ❄️, жаркое лето ☀️💦.\n"
-            "🔌 Зарядные устройства и переходники.\n"
-            "💊 Мини-аптечка.\n"
-            "📞 Копии важных адресов/телефонов.\n"
-            "🗺 Карта города/приложения (Naver Maps, Kakao Maps)."
-        ),
-        "Популярные места для посещения": ["Дворец Кёнбоккун", "Улицы Мёндон и Хондэ", "Остров Чеджу"],
-        "Национальная кухня": ["Бибимбап", "Ттокпокки", "Сочжу"],
-    },
-
-    "Япония": {
-        "Важные правила и особенности": (
-            "🇯🇵 Япония — страна традиций ⛩️ и технологий 🤖.\n"
-            "🤫 В общественных местах принято вести себя тихо.\n"
-            "👟 Обувь снимают при входе в дома и храмы.\n"
-            "🚇 Транспорт работает точно по расписанию.\n"
-            "🚭 Курение разрешено только в специальных местах.\n"
-            "🗑️ Урн мало — мусор носят с собой.\n"
-            "💴 Чаевые не приняты."
-        ),
-        "Требуемые документы": (
-            "🛂 Заграничный паспорт.\n"
-            "📄 Виза или безвизовый режим (зависит от страны).\n"
-            "✈️ Билеты туда и обратно.\n"
-            "🏨 Подтверждение проживания.\n"
-            "🏥 Медицинская страховка."
-        ),
-        "Список вещей, которые стоит взять": (
-            "📁 Документы.\n"
-            "👟 Удобная обувь.\n"
-            "🎒 Рюкзак.\n"
-            "🔌 Переходник.\n"
-            "📱 Переводчик или SIM-карта.\n"
-            "🧦 Носки."
-        ),
-        "Популярные места для посещения": ["Токийская башня", "Киото", "Фудзи"],
-        "Национальная кухня": ["Суши", "Рамен", "Тэмпура"],
-    },
-}
+# Тексты стран лежат в services/countries.json и подгружаются по одной стране
+countries = CountriesService()
+
+@dp.update.outer_middleware()
+async def wait_countries(handler, event: types.Update, data: dict):
+    # апдейт, пришедший раньше конца прогрева, ждёт тот же поток загрузки индекса стран,
+    # а не собирает снимок заново прямо в event loop
+    await countries.ready()
+    return await handler(event, data)
+# координаты мест для /near и присланных геопозиций
+geo = GeoService()
+api = ApiService(geo=geo)
+route_service = RouteService(geo)
+# столица, валюта и т.п. из локального снимка, restcountries только обновляет его в фоне
+countries_meta = CountryMetaService(api, runtime_file=COUNTRY_META_FILE)
 
 # ==============================
 # Local images
@@ -1146,7 +314,7 @@ local_images = {
         "Кимчи": img("Кимчи.jpg"),
     },
     "Сербия": {
-        "Калемегданская крепость": img("калемегданская крепость.jpg"),
+        "Калемегдан": img("калемегданская крепость.jpg"),
         "Скадарлия": img("скадарлия.jpg"),
         "Национальный парк Тара и Златибор": img("национальный парк тара.jpg"),
         "cevapcici": img("Ćevapčići.jpg"),
@@ -1161,7 +329,7 @@ local_images = {
         "Стейк": img("Стейк.jpg"),
         "Пицца": img("Пицца.jpg"),
     },
-    "Тайланд": {
+    "Таиланд": {
         "Бангкок — Королевский дворец": img("Бангкок — Королевский дворец.jpg"),
         "Национальный парк Сиринат (Пхукет)": img("Национальный парк Сиринат.jpg"),
         "Храм Ват Пхо (Лежащий Будда)": img("Храм Ват Пхо.jpg"),
@@ -1219,34 +387,202 @@ local_images = {
     },
 }
 
+# Один проход по images/ при старте: дальше картинки ищутся только по словарю
+image_index = ImageIndex(IMAGES_DIR)
+item_images = {}
+
+country_screens = {}
+
+def country_screen(country: str) -> str:
+    """Текст экрана страны; пересчитывается, только когда обновилась справка о ней"""
+    meta = countries_meta.get(country)
+    cached = country_screens.get(country)
+    if cached is not None and cached[0] is meta:
+        return cached[1]
+    if meta:
+        text = f"{flag_emoji(meta['code'])} {country}\n\n{format_country_meta(meta)}\n\nВыберите раздел:"
+    else:
+        text = f"🌍 {country}. Выберите раздел:"
+    country_screens[country] = (meta, text)
+    return text
+
+def with_optimized(resolved: dict) -> dict:
+    """{пункт: путь} с путями к сжатым копиям, где они есть"""
+    return {item: optimized_images.get(path, path) for item, path in resolved.items()}
+
+def resolve_country_images(country: str, info: dict) -> dict:
+    """Сопоставить места и блюда страны с картинками; item_images не трогает, можно звать из потока"""
+    return with_optimized(image_index.resolve_items(info, local_images.get(country, {})))
+
+def country_images(country: str) -> dict:
+    """Картинки мест и блюд страны, сопоставляются при первом обращении"""
+    info = countries.get_country(country) or {}
+    cached = item_images.get(country)
+    # после перезагрузки countries.json запись страны — новый объект
+    if cached is not None and cached[0] is info:
+        return cached[1]
+    images = resolve_country_images(country, info)
+    item_images[country] = (info, images)
+    return images
+
+# id стран и поиск заполняет country_pages() при первом обращении или при прогреве после старта,
+# чтобы импорт не читал снимок стран
+country_ids = CountryIds(())
+
+# клавиатуры собираются один раз; страницы стран пересобираются только при смене списка стран
+COUNTRY_PROMPT = "🌍 Выберите страну или напишите её название:"
+PAGE_SIZE = 10  # стран на странице, по две в ряд
+country_search = CountrySearch(())
+_country_pages = (None, [])
+
+def country_button(country: str) -> tuple:
+    return country, pack(COUNTRY, country_ids.id(country))
+
+def country_pages() -> list:
+    """Страницы выбора страны по алфавиту: на каждой не больше PAGE_SIZE стран и ◀️ ▶️"""
+    global _country_pages
+    names = tuple(countries.keys())
+    if _country_pages[0] == names:
+        return _country_pages[1]
+    country_ids.update(names)
+    ordered = sorted(names, key=normalize_name)
+    country_search.update(ordered)
+    chunks = [ordered[i:i + PAGE_SIZE] for i in range(0, len(ordered), PAGE_SIZE)] or [[]]
+    pages = []
+    for page, chunk in enumerate(chunks):
+        rows = [[country_button(c) for c in chunk[i:i + 2]] for i in range(0, len(chunk), 2)]
+        if len(chunks) > 1:
+            # по подписи видно, какие буквы на странице: «А–Г · 1/3»
+            label = f"{chunk[0][0]}–{chunk[-1][0]} · {page + 1}/{len(chunks)}"
+            rows.append([
+                ("◀️", pack(PAGE, str((page - 1) % len(chunks)))),
+                (label, pack(PAGE, str(page))),
+                ("▶️", pack(PAGE, str((page + 1) % len(chunks)))),
+            ])
+        pages.append(FrozenKeyboard(rows))
+    _country_pages = (names, pages)
+    return pages
+
+def countries_keyboard(page: int = 0) -> FrozenKeyboard:
+    pages = country_pages()
+    return pages[page % len(pages)]
+
+def search_keyboard(found: list) -> FrozenKeyboard:
+    rows = [[country_button(c) for c in found[i:i + 2]] for i in range(0, len(found), 2)]
+    return FrozenKeyboard(rows + [[("🌍 Все страны", pack(PAGE, "0"))]])
+
+def section_button(text: str, section: str) -> tuple:
+    return text, pack(SECTION, SECTION_IDS[section])
+
+SECTION_KEYBOARD = FrozenKeyboard([
+    [
+        section_button("📌 Правила", "Важные правила и особенности"),
+        section_button("🛂 Документы", "Требуемые документы"),
+    ],
+    [
+        section_button("🎒 Что взять", "Список вещей, которые стоит взять"),
+        section_button("📍 Места", "Популярные места для посещения"),
+    ],
+    [section_button("🍽 Кухня", "Национальная кухня")],
+    [("⬅️ Назад", pack(SECTION, SECTION_BACK))],
+])
+
+def section_keyboard() -> FrozenKeyboard:
+    return SECTION_KEYBOARD
 
-text_sections = [
-    "Важные правила и особенности",
-    "Требуемые документы",
-    "Список вещей, которые стоит взять"
-]
-
-def countries_keyboard():
-    return InlineKeyboardMarkup(
-        inline_keyboard=[
-            [InlineKeyboardButton(text=c, callback_data=f"country:{c}")]
-            for c in countries_info
-        ]
-    )
+# ==============================
+# SENDING
+# ==============================
+MEDIA_GROUP_LIMIT = 10  # Telegram принимает в альбоме от 2 до 10 фото
+
+def is_not_modified(error: TelegramBadRequest) -> bool:
+    return "message is not modified" in error.message
+
+# запросы собираются через model_construct: поля уже проверены, а reply_markup — готовый JSON
+async def send_text(message, text: str, keyboard: FrozenKeyboard):
+    return await message.bot(SendMessage.model_construct(chat_id=message.chat.id, text=text, reply_markup=keyboard.json))
+
+async def edit_text(message: types.Message, text: str, keyboard: FrozenKeyboard):
+    return await message.bot(EditMessageText.model_construct(
+        chat_id=message.chat.id, message_id=message.message_id, text=text, reply_markup=keyboard.json,
+    ))
+
+async def show_screen(message, text: str, keyboard: FrozenKeyboard):
+    """Показать экран в том же сообщении, если можно; иначе — новым сообщением"""
+    if isinstance(message, types.Message) and message.text is not None:
+        if message.text == text and message.reply_markup == keyboard.markup:
+            return  # экран уже такой, лишний запрос не нужен
+        try:
+            await edit_text(message, text, keyboard)
+            return
+        except TelegramBadRequest as e:
+            if is_not_modified(e):
+                return
+            # сообщение удалено или слишком старое — просто отправим новое
+    await send_text(message, text, keyboard)
+
+async def show_photo_screen(message, img_path: str, caption: str, keyboard: FrozenKeyboard):
+    """Заменить фото в экране-фотографии; текстовый экран фото не станет, поэтому тогда — новое сообщение"""
+    async def show(photos):
+        photo = photos[0]
+        if isinstance(message, types.Message) and message.photo:
+            if message.caption == caption and message.photo[-1].file_id == photo and message.reply_markup == keyboard.markup:
+                return None
+            try:
+                return await message.edit_media(InputMediaPhoto(media=photo, caption=caption), reply_markup=keyboard.markup)
+            except TelegramBadRequest as e:
+                if is_not_modified(e):
+                    return None
+        return await message.answer_photo(photo=photo, caption=caption, reply_markup=keyboard.markup)
+
+    msg = await media_cache.send([img_path], show)
+    if isinstance(msg, types.Message):
+        media_cache.remember(img_path, msg)
+
+async def send_items(message: types.Message, country: str, items: list):
+    """Отправить места/блюда одним альбомом, а пункты без фото — текстом с клавиатурой"""
+    photos, texts = [], []
+    for item in items:
+        img_path = country_images(country).get(item)
+        if img_path:
+            photos.append((img_path, item))
+        else:
+            texts.append(item)
+
+    if not photos:
+        await show_screen(message, "\n".join(texts) or "Выберите раздел:", section_keyboard())
+        return
+    if len(photos) == 1 and not texts:
+        # одно фото с клавиатурой — это экран, его можно обновить на месте
+        img_path, item = photos[0]
+        await show_photo_screen(message, img_path, item, section_keyboard())
+        return
 
-def section_keyboard():
-    return InlineKeyboardMarkup(inline_keyboard=[
-        [
-            InlineKeyboardButton(text="📌 Правила", callback_data="section:Важные правила и особенности"),
-            InlineKeyboardButton(text="🛂 Документы", callback_data="section:Требуемые документы"),
-        ],
-        [
-            InlineKeyboardButton(text="🎒 Что взять", callback_data="section:Список вещей, которые стоит взять"),
-            InlineKeyboardButton(text="📍 Места", callback_data="section:Популярные места для посещения"),
-        ],
-        [InlineKeyboardButton(text="🍽 Кухня", callback_data="section:Национальная кухня")],
-        [InlineKeyboardButton(text="⬅️ Назад", callback_data="section:back")]
-    ])
+    for start in range(0, len(photos), MEDIA_GROUP_LIMIT):
+        chunk = photos[start:start + MEDIA_GROUP_LIMIT]
+        if len(chunk) == 1:
+            img_path, item = chunk[0]
+            # одиночное фото в конце без текстовых пунктов забирает клавиатуру себе
+            last = not texts and start + 1 == len(photos)
+            msg = await media_cache.send([img_path], lambda photos: message.answer_photo(
+                photo=photos[0],
+                caption=item,
+                reply_markup=section_keyboard().markup if last else None
+            ))
+            media_cache.remember(img_path, msg)
+            if last:
+                return
+            continue
+
+        msgs = await media_cache.send([img_path for img_path, _ in chunk], lambda photos: message.answer_media_group([
+            InputMediaPhoto(media=photo, caption=item)
+            for photo, (_, item) in zip(photos, chunk)
+        ]))
+        for (img_path, _), msg in zip(chunk, msgs):
+            media_cache.remember(img_path, msg)
+
+    # к альбому нельзя прикрепить клавиатуру, поэтому она уходит отдельным сообщением
+    await send_text(message, "\n".join(texts) or "Выберите раздел:", section_keyboard())
 
 # ==============================
 # HANDLERS
@@ -1255,68 +591,337 @@ def section_keyboard():
 async def start(message: types.Message, state: FSMContext):
     await state.clear()
     await state.set_state(Form.country)
-    await message.answer("🌍 Выберите страну:", reply_markup=countries_keyboard())
-
-@dp.callback_query(lambda c: c.data.startswith("country:"))
-async def country_chosen(call: types.CallbackQuery, state: FSMContext):
-    country = call.data.split(":", 1)[1]
+    await send_text(message, COUNTRY_PROMPT, countries_keyboard())
+
+@dp.message(Form.country, F.text, ~F.text.startswith("/"))
+async def country_typed(message: types.Message):
+    country_pages()  # обновляет и поиск, если список стран ещё не загружен или изменился
+    found = country_search.search(message.text)
+    if not found:
+        await send_text(message, f"🔍 Ничего не нашлось. {COUNTRY_PROMPT}", countries_keyboard())
+        return
+    await send_text(message, "🔍 Нашлось:", search_keyboard(found))
+
+async def page_chosen(call: types.CallbackQuery, state: FSMContext, page: str):
+    await show_screen(call.message, COUNTRY_PROMPT, countries_keyboard(int(page) if page.isdigit() else 0))
+
+async def country_chosen(call: types.CallbackQuery, state: FSMContext, cid: str):
+    country = country_ids.name(cid)
+    if country is None:
+        # список стран могли перечитать после правки countries.json
+        country_ids.update(countries.keys())
+        country = country_ids.name(cid)
+    if country is None:
+        await show_screen(call.message, f"Страна не найдена. {COUNTRY_PROMPT}", countries_keyboard())
+        return
     await state.update_data(country=country)
     await state.set_state(Form.section)
-    await call.message.answer(
-        f"🇦🇺 {country}. Выберите раздел:",
-        reply_markup=section_keyboard()
-    )
-    await call.answer()
+    await show_screen(call.message, country_screen(country), section_keyboard())
 
-@dp.callback_query(lambda c: c.data.startswith("section:"))
-async def section_chosen(call: types.CallbackQuery, state: FSMContext):
-    section = call.data.split(":", 1)[1]
-    data = await state.get_data()
-    country = data["country"]
-    info = countries_info[country]
+async def show_text(call: types.CallbackQuery, state: FSMContext, country: str, section: str):
+    await show_screen(call.message, countries.get_country_info(country, section), section_keyboard())
+
+async def show_places(call: types.CallbackQuery, state: FSMContext, country: str, section: str):
+    # места показываем в порядке удобного маршрута
+    items = route_service.order_items(country, countries.get_country(country)[section])
+    await send_items(call.message, country, items)
+
+async def show_food(call: types.CallbackQuery, state: FSMContext, country: str, section: str):
+    await send_items(call.message, country, countries.get_country(country)[section])
 
-    if section == "back":
+async def go_back(call: types.CallbackQuery, state: FSMContext, country: str, section: str):
+    await state.set_state(Form.country)
+    await show_screen(call.message, COUNTRY_PROMPT, countries_keyboard())
+
+# id раздела -> обработчик
+SECTION_HANDLERS = {
+    SECTION_IDS["Важные правила и особенности"]: show_text,
+    SECTION_IDS["Требуемые документы"]: show_text,
+    SECTION_IDS["Список вещей, которые стоит взять"]: show_text,
+    SECTION_IDS["Популярные места для посещения"]: show_places,
+    SECTION_IDS["Национальная кухня"]: show_food,
+    SECTION_BACK: go_back,
+}
+
+async def section_chosen(call: types.CallbackQuery, state: FSMContext, section_id: str):
+    handler = SECTION_HANDLERS.get(section_id)
+    if handler is None:
+        return
+    data = await state.get_data()
+    country = data.get("country")
+    if country is None or countries.get_country(country) is None:
+        # сессия истекла или потерялась — возвращаем к выбору страны
         await state.set_state(Form.country)
-        await call.message.answer("🌍 Выберите страну:", reply_markup=countries_keyboard())
-        await call.answer()
+        await show_screen(call.message, COUNTRY_PROMPT, countries_keyboard())
         return
+    await handler(call, state, country, SECTIONS_BY_ID.get(section_id))
+
+# префикс callback_data -> обработчик; один фильтр вместо цепочки startswith
+CALLBACK_HANDLERS = {
+    COUNTRY: country_chosen,
+    SECTION: section_chosen,
+    PAGE: page_chosen,
+}
+
+# подсказка на кнопке, пока идёт долгая отправка
+CALLBACK_TOASTS = {
+    show_places: "⏳ Загружаю фото…",
+    show_food: "⏳ Загружаю фото…",
+}
 
-    if section in ("rules", "docs", "items"):
-        await call.message.answer(info[section], reply_markup=section_keyboard())
+# время от приёма апдейта до ответа на callback (ack) и до конца обработки (total) по обработчикам
+CALLBACK_ACK_SECONDS = REGISTRY.histogram(
+    "bot_callback_ack_seconds", "Время от приёма callback до ответа на него", ("handler",),
+)
+CALLBACK_TOTAL_SECONDS = REGISTRY.histogram(
+    "bot_callback_total_seconds", "Время от приёма callback до конца обработки", ("handler",),
+)
+# webhook при перезапуске не сбрасывается, и нажатия, накопленные за это время, приходят
+# уже просроченными: ответить на них нельзя, но экран всё равно показывается
+CALLBACK_EXPIRED = REGISTRY.counter(
+    "bot_callback_expired_total", "Callback, ответить на которые уже поздно (query is too old)", ("handler",),
+)
+
+def record_timing(name: str, ack: float, total: float):
+    CALLBACK_ACK_SECONDS.labels(name).observe(ack)
+    CALLBACK_TOTAL_SECONDS.labels(name).observe(total)
+
+@dp.callback_query()
+async def callback_router(call: types.CallbackQuery, state: FSMContext, received_at: Optional[float] = None):
+    # received_at передаёт webhook-обработчик: момент, когда апдейт пришёл от Telegram
+    received_at = received_at or time.monotonic()
+    prefix, value = unpack(call.data or "")
+    handler = CALLBACK_HANDLERS.get(prefix)
+    target = SECTION_HANDLERS.get(value) if prefix == SECTION else handler
+    name = target.__name__ if target is not None else "unknown"
+    # отвечаем на callback сразу, чтобы кнопка не «крутилась» всё время отправки фото;
+    # просроченный query (например, после перезапуска) не повод не показать экран
+    try:
+        await call.answer(CALLBACK_TOASTS.get(target))
+    except TelegramAPIError as e:
+        if isinstance(e, TelegramBadRequest) and "query is too old" in e.message:
+            CALLBACK_EXPIRED.labels(name).inc()
+            logger.info("callback %s expired before it was answered, handling it anyway", name)
+        else:
+            logger.warning("callback answer failed: %s", e)
+    acked_at = time.monotonic()
+    if handler is not None:
+        await handler(call, state, value)
+    record_timing(name, acked_at - received_at, time.monotonic() - received_at)
+
+@dp.message(Command("near"))
+async def near_place(message: types.Message, command: CommandObject):
+    if not command.args:
+        await message.answer("📍 Напишите название места: /near Эйфелева башня")
+        return
+    place = geo.search(command.args)
+    if place is None:
+        await message.answer("🔍 Такое место не найдено")
+        return
+    await message.answer_location(latitude=place.lat, longitude=place.lon)
+    nearest = geo.nearest(place.lat, place.lon, exclude=place)
+    await message.answer(f"📍 {place.name} ({place.country})\n\nРядом:\n{format_nearest(nearest)}")
+
+@dp.message(F.location)
+async def location_sent(message: types.Message):
+    nearest = geo.nearest(message.location.latitude, message.location.longitude)
+    if not nearest:
+        return
+    place, _ = nearest[0]
+    await message.answer_location(latitude=place.lat, longitude=place.lon)
+    await message.answer(f"Ближайшие места:\n{format_nearest(nearest)}")
 
-    elif section in ("places", "food"):
-        items = info[section]
-        for i, item in enumerate(items):
-            img_path = local_images.get(country, {}).get(item)
-            markup = section_keyboard() if i == len(items) - 1 else None
+# ==============================
+# ADMIN
+# ==============================
+profiler = SamplingProfiler()
+
+async def send_profile(chat_id: int, profile: Profile):
+    summary = profile.summary()
+    await bot.send_document(
+        chat_id,
+        BufferedInputFile(profile.folded().encode(), filename="profile.folded"),
+        caption=summary[:1024],  # подпись к файлу ограничена 1024 символами
+    )
 
-            if img_path and os.path.exists(img_path):
-                await call.message.answer_photo(
-                    photo=InputFile(img_path),
-                    caption=item,
-                    reply_markup=markup
-                )
-            else:
-                await call.message.answer(item, reply_markup=markup)
+@dp.message(Command("profile"), F.chat.id == ADMIN_CHAT_ID)
+async def profile_command(message: types.Message, command: CommandObject):
+    args = (command.args or "").strip()
+    updates = int(args) if args.isdigit() and int(args) > 0 else 100
+    started = profiler.start(updates, lambda profile: run_background(send_profile(message.chat.id, profile)))
+    if not started:
+        await message.answer("🔬 Профилирование уже идёт")
+        return
+    await message.answer(
+        f"🔬 Профилирую следующие {updates} апдейтов. Пришлю файл folded stacks "
+        "для flamegraph.pl или speedscope.app"
+    )
 
-    await call.answer()
+# ==============================
+# METRICS & TRACING
+# ==============================
+def callback_handler_name(call: types.CallbackQuery, data: dict) -> str:
+    # все callback идут через callback_router, поэтому имя берётся по префиксу
+    handler = CALLBACK_HANDLERS.get(unpack(call.data or "")[0])
+    return handler.__name__ if handler is not None else "unknown"
+
+dp.update.outer_middleware(TracingMiddleware(tracer))
+dp.update.outer_middleware(ProfilingMiddleware(profiler))
+dp.message.middleware(HandlerMetrics())
+dp.callback_query.middleware(HandlerMetrics(callback_handler_name))
+# после планировщика: мерится сам запрос, без ожидания лимитов
+bot.session.middleware(ApiMetrics())
+
+webhook = WebhookService(bot, WEBHOOK_URL, WEBHOOK_SECRET, WEBHOOK_STATE_FILE)
+webhook_handler = ExecutorRequestHandler(
+    dispatcher=dp, bot=bot, secret_token=WEBHOOK_SECRET,
+    workers=UPDATE_WORKERS, max_pending=UPDATE_QUEUE_LIMIT,
+)
+
+def media_cache_ratio():
+    total = media_cache.stats["hits"] + media_cache.stats["misses"]
+    return media_cache.stats["hits"] / total if total else None
+
+def fsm_gauge(name: str):
+    # storage, а не dp.storage: с трассировкой тот обёрнут в TracedStorage; у Redis метрики пустые
+    gauges = getattr(storage, "gauges", None)
+    return gauges.get(name) if gauges is not None else None
+
+REGISTRY.counter_func(
+    "bot_media_cache_lookups_total", "Обращения к кэшу file_id", lambda: {
+        ("hit",): media_cache.stats["hits"], ("miss",): media_cache.stats["misses"],
+    }, ("result",),
+)
+REGISTRY.gauge_func("bot_media_cache_hit_ratio", "Доля отправок фото по file_id", media_cache_ratio)
+REGISTRY.gauge_func("bot_fsm_sessions", "Живые FSM-сессии (не старше FSM_TTL)", lambda: fsm_gauge("sessions"))
+REGISTRY.gauge_func("bot_fsm_memory_bytes", "Примерный объём FSM-сессий в памяти", lambda: fsm_gauge("bytes"))
+REGISTRY.gauge_func("bot_update_queue_depth", "Апдейты, ждущие обработки", lambda: webhook_handler.executor.gauges["pending"])
+REGISTRY.gauge_func("bot_update_workers_busy", "Занятые воркеры апдейтов", lambda: webhook_handler.executor.gauges["busy"])
+REGISTRY.counter_func(
+    "bot_updates_total", "Апдейты по исходу", lambda: {
+        (result,): webhook_handler.executor.stats[result] for result in ("processed", "failed", "shed")
+    }, ("result",),
+)
+REGISTRY.counter_func(
+    "bot_update_queue_wait_seconds_total", "Суммарное ожидание апдейтов в очереди",
+    lambda: webhook_handler.executor.stats["wait_total"],
+)
+REGISTRY.counter_func(
+    "bot_webhook_rejected_total", "Отклонённые и повторные запросы webhook",
+    lambda: {(reason,): count for reason, count in webhook_handler.stats.items()}, ("reason",),
+)
+REGISTRY.counter_func(
+    "bot_send_scheduler_total", "События планировщика отправки",
+    lambda: {(event,): count for event, count in send_scheduler.stats.items()}, ("event",),
+)
+
+async def metrics_endpoint(request: web.Request) -> web.Response:
+    # порт webhook открыт в интернет: без токена метрики не отдаём
+    authorization = request.headers.get("Authorization", "")
+    if not hmac.compare_digest(authorization.encode(), f"Bearer {METRICS_TOKEN}".encode()):
+        return web.Response(status=401, headers={"WWW-Authenticate": "Bearer"})
+    return web.Response(body=render_metrics().encode(), headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
 
 # ==============================
 # WEBHOOK
 # ==============================
+logger = logging.getLogger(__name__)
+
+background_tasks = set()
+
+def _background_done(task: asyncio.Task):
+    background_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("Background task %s failed", task.get_coro().__qualname__, exc_info=task.exception())
+
+def run_background(coro):
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(_background_done)
+    return task
+
+async def warm_up():
+    """Загрузить содержимое заранее, чтобы первые пользователи не ждали чтения с диска"""
+    # индекс стран читается в потоке; страницы стран заодно заполняют id и поиск
+    await countries.ready()
+    country_pages()
+    await asyncio.to_thread(geo.load)
+    optimized, stale_images = await asyncio.to_thread(check_manifest, IMAGES_DIR, OPTIMIZED_IMAGES_DIR)
+    optimized_images.update(optimized)
+    # записи стран читаются из снимка в потоке, в item_images они попадают уже в loop
+    def resolve_all() -> tuple:
+        infos = {country: countries.get_country(country) or {} for country in countries.keys()}
+        matched, report = image_index.resolve(infos, local_images)
+        return {country: (info, with_optimized(matched[country])) for country, info in infos.items()}, report
+    resolved, images_report = await asyncio.to_thread(resolve_all)
+    item_images.update(resolved)
+    if images_report["unresolved"] or images_report["orphaned"] or images_report["unknown_countries"]:
+        logger.warning("images: %s (python -m services.images_service)", summarize_report(images_report))
+    # хэши всех картинок: первые разделы с фото сразу уходят по file_id из кэша
+    paths = {path for _, images in resolved.values() for path in images.values()}
+    cached = await asyncio.to_thread(media_cache.warm, paths)
+    logger.info("Warm-up done: %d images, %d already have file_id", len(paths), cached)
+    return stale_images
+
+async def build_optimized_images(stale: list):
+    """Собрать недостающие сжатые копии (images_optimized/ не в git) и начать отдавать их"""
+    logger.info("Optimizing %d images missing from the manifest (%s)", len(stale), ", ".join(stale[:3]))
+    await asyncio.to_thread(optimize_images, IMAGES_DIR, OPTIMIZED_IMAGES_DIR, verbose=False)
+    optimized, stale = await asyncio.to_thread(check_manifest, IMAGES_DIR, OPTIMIZED_IMAGES_DIR)
+    optimized_images.clear()
+    optimized_images.update(optimized)
+    item_images.clear()  # пути картинок пересопоставятся при следующем обращении
+    logger.info("Optimized images ready: %d copies, %d still stale", len(optimized), len(stale))
+
+async def finish_startup(bot: Bot):
+    try:
+        # заодно открывает соединение с Bot API, которое переиспользуют первые ответы
+        await webhook.reconcile(dp.resolve_used_update_types())
+    except Exception:
+        logger.exception("Failed to reconcile webhook")
+    stale_images = await warm_up()
+    gc.freeze()  # загруженное прогревом тоже живёт до конца процесса
+    run_background(countries.watch(COUNTRIES_RELOAD_INTERVAL))
+    if COUNTRY_META_REFRESH_INTERVAL > 0:
+        run_background(countries_meta.watch(COUNTRY_META_REFRESH_INTERVAL))
+    if stale_images and OPTIMIZE_IMAGES_ON_START:
+        run_background(build_optimized_images(stale_images))
+
 async def on_startup(bot: Bot):
-    await bot.set_webhook(WEBHOOK_URL, drop_pending_updates=True)
+    # созданное при импорте (модели aiogram, клавиатуры) живёт до конца процесса: без freeze
+    # каждая полная сборка мусора обходит его и останавливает loop на десятки миллисекунд
+    gc.freeze()
+    # aiohttp открывает порт только после on_startup, поэтому здесь ничего не ждём:
+    # апдейты принимаются сразу, а webhook и прогрев идут следом в фоне
+    run_background(finish_startup(bot))
+    run_background(monitor_loop_lag())
+    if trace_exporter is not None:
+        run_background(trace_exporter.run())
 
 async def on_shutdown(bot: Bot):
-    await bot.delete_webhook()
-
-def main():
+    for task in list(background_tasks):
+        task.cancel()
+    await api.close()
+    await dp.storage.close()
+    await media_cache.save()
+    if trace_exporter is not None:
+        await trace_exporter.close()
+    # webhook остаётся: апдейты, пришедшие во время перезапуска, Telegram доставит после него
+
+def create_app() -> web.Application:
     app = web.Application()
-    SimpleRequestHandler(dispatcher=dp, bot=bot).register(app, path=WEBHOOK_PATH)
+    webhook_handler.register(app, path=WEBHOOK_PATH)
+    if METRICS_TOKEN:
+        app.router.add_get("/metrics", metrics_endpoint)
     setup_application(app, dp, bot=bot)
     dp.startup.register(on_startup)
     dp.shutdown.register(on_shutdown)
-    web.run_app(app, host="0.0.0.0", port=PORT, handle_signals=False)
+    return app
+
+def main():
+    # SIGTERM при деплое — штатная остановка: апдейты, на которые Telegram уже получил 200,
+    # дообрабатываются, FSM и кэш file_id сбрасываются на диск (on_shutdown)
+    web.run_app(create_app(), host="0.0.0.0", port=PORT)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
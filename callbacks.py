@@ -0,0 +1,72 @@
+"""Компактный формат callback_data: "<префикс>:<id>".
+
+Telegram ограничивает callback_data 64 байтами, а русские названия в UTF-8
+занимают по 2 байта на букву, поэтому в кнопки кладутся короткие id.
+"""
+import zlib
+from typing import Optional
+
+COUNTRY = "c"
+SECTION = "s"
+PAGE = "p"
+MAX_CALLBACK_BYTES = 64
+
+# id разделов; порядок не важен, значения менять нельзя — они живут в старых сообщениях
+SECTION_IDS = {
+    "Важные правила и особенности": "r",
+    "Требуемые документы": "d",
+    "Список вещей, которые стоит взять": "i",
+    "Популярные места для посещения": "p",
+    "Национальная кухня": "f",
+}
+SECTION_BACK = "b"
+SECTIONS_BY_ID = {section_id: section for section, section_id in SECTION_IDS.items()}
+
+
+def pack(prefix: str, value: str) -> str:
+    data = f"{prefix}:{value}"
+    if len(data.encode()) > MAX_CALLBACK_BYTES:
+        raise ValueError(f"callback_data is longer than {MAX_CALLBACK_BYTES} bytes: {data!r}")
+    return data
+
+
+def unpack(data: str) -> tuple:
+    prefix, _, value = data.partition(":")
+    return prefix, value
+
+
+def country_id(name: str) -> str:
+    """Стабильный короткий id страны: crc32 названия в base36 (не зависит от порядка стран)"""
+    n = zlib.crc32(name.encode())
+    digits = "0123456789abcdefghijklmnopqrstuvwxyz"
+    out = ""
+    while True:
+        n, r = divmod(n, 36)
+        out = digits[r] + out
+        if not n:
+            return out
+
+
+class CountryIds:
+    """Таблица id <-> название страны"""
+
+    def __init__(self, names):
+        self.ids = {}
+        self.names = {}
+        self.update(names)
+
+    def update(self, names) -> None:
+        ids, by_id = {}, {}
+        for name in names:
+            cid = country_id(name)
+            if cid in by_id and by_id[cid] != name:
+                raise ValueError(f"country id collision: {by_id[cid]!r} and {name!r}")
+            ids[name] = cid
+            by_id[cid] = name
+        self.ids, self.names = ids, by_id
+
+    def id(self, name: str) -> str:
+        return self.ids.get(name) or country_id(name)
+
+    def name(self, cid: str) -> Optional[str]:
+        return self.names.get(cid)
@@ -1,5 +1,34 @@
+import json
+
 from aiogram.types import ReplyKeyboardMarkup, KeyboardButton, InlineKeyboardMarkup, InlineKeyboardButton
 
+
+class FrozenKeyboard:
+    """Inline-клавиатура, собранная один раз.
+
+    markup — модель без валидации (model_construct) для сравнения с клавиатурой
+    сообщения, json — готовая строка reply_markup для запросов к Bot API.
+    rows — строки кнопок из пар (текст, callback_data).
+    """
+    __slots__ = ("markup", "json")
+
+    def __init__(self, rows):
+        rows = [[(text, data) for text, data in row] for row in rows]
+        self.markup = InlineKeyboardMarkup.model_construct(inline_keyboard=[
+            [InlineKeyboardButton.model_construct(text=text, callback_data=data) for text, data in row]
+            for row in rows
+        ])
+        self.json = json.dumps(
+            {"inline_keyboard": [[{"text": text, "callback_data": data} for text, data in row] for row in rows]},
+            ensure_ascii=False,
+        )
+
+    def __setattr__(self, name, value):
+        if hasattr(self, name):
+            raise AttributeError("FrozenKeyboard is immutable")
+        super().__setattr__(name, value)
+
+
 # Клавиатура с выбором стран
 def country_keyboard():
     countries = ["Россия", "Франция", "Япония"]  # список стран на русском
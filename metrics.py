@@ -0,0 +1,266 @@
+"""Минимальный реестр метрик в формате Prometheus (text exposition 0.0.4).
+
+Счётчики, gauge и гистограммы с метками, а также метрики-функции, значение
+которых считается при отдаче /metrics (статистика сервисов, очереди, кэши).
+Запись — несколько операций со словарём и списком, без блокировок: всё
+работает в одном event loop.
+"""
+import asyncio
+import os
+import time
+from bisect import bisect_left
+from typing import Callable, Optional
+
+from aiogram import BaseMiddleware
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.types import FSInputFile, InputFile
+
+# секунды: от быстрых ответов до долгих загрузок фото
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Metric:
+    def __init__(self, kind: str, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = ()):
+        self.kind = kind
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._children = {}
+        self._default = None if self.labelnames else self._child(())
+
+    def _child(self, values: tuple):
+        child = self._children.get(values)
+        if child is None:
+            child = self._children[values] = _Histogram(self.buckets) if self.kind == "histogram" else _Value()
+        return child
+
+    def labels(self, *values):
+        return self._child(values)
+
+    # метрика без меток работает как её единственное значение
+    def inc(self, amount: float = 1) -> None:
+        self._default.inc(amount)
+
+    def set(self, value: float) -> None:
+        self._default.set(value)
+
+    def observe(self, value: float) -> None:
+        self._default.observe(value)
+
+    def samples(self):
+        for values, child in list(self._children.items()):
+            if self.kind != "histogram":
+                yield self.name, _format_labels(self.labelnames, values), child.value
+                continue
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), child.counts):
+                cumulative += count
+                le = f'le="{_format_value(float(bound))}"'
+                yield f"{self.name}_bucket", _format_labels(self.labelnames, values, le), cumulative
+            yield f"{self.name}_sum", _format_labels(self.labelnames, values), child.sum
+            yield f"{self.name}_count", _format_labels(self.labelnames, values), child.count
+
+
+class FunctionMetric:
+    """Значение считается функцией при отдаче: число или {значения меток: число}"""
+
+    def __init__(self, kind: str, name: str, documentation: str, fn: Callable, labelnames: tuple = ()):
+        self.kind = kind
+        self.name = name
+        self.documentation = documentation
+        self.fn = fn
+        self.labelnames = tuple(labelnames)
+
+    def samples(self):
+        value = self.fn()
+        if value is None:
+            return
+        if not isinstance(value, dict):
+            value = {(): value}
+        for values, v in value.items():
+            values = values if isinstance(values, tuple) else (values,)
+            yield self.name, _format_labels(self.labelnames, values), v
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def _add(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: tuple = ()) -> Metric:
+        return self._add(Metric("counter", name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: tuple = ()) -> Metric:
+        return self._add(Metric("gauge", name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = LATENCY_BUCKETS) -> Metric:
+        return self._add(Metric("histogram", name, documentation, labelnames, buckets))
+
+    def gauge_func(self, name: str, documentation: str, fn: Callable, labelnames: tuple = ()) -> FunctionMetric:
+        return self._add(FunctionMetric("gauge", name, documentation, fn, labelnames))
+
+    def counter_func(self, name: str, documentation: str, fn: Callable, labelnames: tuple = ()) -> FunctionMetric:
+        return self._add(FunctionMetric("counter", name, documentation, fn, labelnames))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HANDLER_SECONDS = REGISTRY.histogram(
+    "bot_handler_seconds", "Время обработки апдейта по обработчикам", ("handler",),
+)
+HANDLER_ERRORS = REGISTRY.counter("bot_handler_errors_total", "Исключения в обработчиках", ("handler",))
+API_SECONDS = REGISTRY.histogram("bot_api_request_seconds", "Длительность запросов к Bot API по методам", ("method",))
+API_ERRORS = REGISTRY.counter("bot_api_errors_total", "Ошибки запросов к Bot API", ("method", "error"))
+UPLOAD_BYTES = REGISTRY.counter("bot_upload_bytes_total", "Объём загруженных в Telegram файлов", ("method",))
+LOOP_LAG = REGISTRY.histogram(
+    "bot_event_loop_lag_seconds", "Опоздание event loop относительно запланированного пробуждения",
+)
+
+
+class HandlerMetrics(BaseMiddleware):
+    """Middleware для роутеров событий: время и ошибки каждого обработчика.
+
+    name — функция (событие, data) -> имя обработчика; по умолчанию имя функции,
+    которую выбрал aiogram.
+    """
+
+    def __init__(self, name: Optional[Callable] = None):
+        self.name = name
+
+    async def __call__(self, handler, event, data):
+        name = self.name(event, data) if self.name is not None else None
+        if name is None:
+            handler_object = data.get("handler")
+            name = handler_object.callback.__name__ if handler_object is not None else "unknown"
+        start = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            HANDLER_ERRORS.labels(name).inc()
+            raise
+        finally:
+            HANDLER_SECONDS.labels(name).observe(time.perf_counter() - start)
+
+
+def _upload_size(value) -> int:
+    """Объём файлов в поле запроса: файл, InputMedia* или их список (альбом)"""
+    if isinstance(value, FSInputFile):
+        try:
+            return os.path.getsize(value.path)
+        except OSError:
+            return 0
+    if isinstance(value, InputFile):
+        return 0  # размер потоковых файлов заранее неизвестен
+    if isinstance(value, list):
+        return sum(_upload_size(item) for item in value)
+    media = getattr(value, "media", None)
+    return _upload_size(media) if media is not None else 0
+
+
+UPLOAD_FIELDS = ("photo", "media", "document", "video", "audio", "animation", "voice")
+
+
+class ApiMetrics(BaseRequestMiddleware):
+    """Middleware сессии бота: длительность запросов к Bot API, ошибки и объём загрузок.
+
+    Подключается после планировщика, чтобы мерить сам запрос без ожидания лимитов.
+    """
+
+    def __init__(self):
+        self._upload_fields = {}  # класс метода -> его поля с файлами
+
+    def _fields(self, method_type) -> tuple:
+        fields = self._upload_fields.get(method_type)
+        if fields is None:
+            fields = self._upload_fields[method_type] = tuple(
+                field for field in UPLOAD_FIELDS if field in method_type.model_fields
+            )
+        return fields
+
+    async def __call__(self, make_request, bot, method):
+        name = method.__api_method__
+        uploaded = sum(_upload_size(getattr(method, field)) for field in self._fields(type(method)))
+        start = time.perf_counter()
+        try:
+            response = await make_request(bot, method)
+        except Exception as e:
+            API_ERRORS.labels(name, type(e).__name__).inc()
+            raise
+        finally:
+            API_SECONDS.labels(name).observe(time.perf_counter() - start)
+        if uploaded:
+            UPLOAD_BYTES.labels(name).inc(uploaded)
+        return response
+
+
+async def monitor_loop_lag(interval: float = 0.5):
+    """Фоновая задача: насколько позже запланированного просыпается event loop"""
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        LOOP_LAG.observe(max(0.0, loop.time() - start - interval))
+
+
+def render() -> str:
+    return REGISTRY.render()
@@ -1,17 +1,140 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional
+from urllib.parse import quote
+
 import aiohttp
 
+from services.geo_service import GeoService
+
+
 class ApiService:
-    BASE_COUNTRY_URL = "https://restcountries.com/v3.1/name/"
+    BASE_URL = "https://restcountries.com/v3.1/"
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        cache_size: int = 256,
+        ttl: float = 24 * 3600,
+        stale_ttl: float = 7 * 24 * 3600,
+        connections: int = 20,
+        timeout: float = 10,
+        geo: Optional[GeoService] = None,
+    ):
+        # base_url позволяет подставить локальный сервер вместо restcountries
+        self.base_url = base_url or self.BASE_URL
+        self.cache_size = cache_size
+        self.ttl = ttl              # сколько ответ считается свежим
+        self.stale_ttl = stale_ttl  # сколько ещё отдаём устаревший ответ, обновляя его в фоне
+        self.connections = connections
+        self.timeout = timeout
+        self.geo = geo
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "coalesced": 0, "upstream": 0, "errors": 0}
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._cache = OrderedDict()  # ключ -> (свеж до, годен до, значение)
+        self._inflight = {}          # ключ -> задача загрузки
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Одна сессия на весь процесс: DNS, TCP и TLS переиспользуются"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.connections,
+                limit_per_host=self.connections,
+                ttl_dns_cache=300,
+                keepalive_timeout=60,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    def _store(self, key: str, value) -> None:
+        now = time.monotonic()
+        self._cache[key] = (now + self.ttl, now + self.ttl + self.stale_ttl, value)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    async def _run(self, key: str, loader: Callable[[], Awaitable]):
+        self.stats["upstream"] += 1
+        try:
+            value = await loader()
+        except Exception:
+            self.stats["errors"] += 1
+            raise
+        if value is not None:
+            self._store(key, value)
+        return value
+
+    def _load(self, key: str, loader: Callable[[], Awaitable]) -> asyncio.Future:
+        """Запуск загрузки; параллельные запросы одного ключа ждут одну задачу"""
+        task = self._inflight.get(key)
+        if task is not None:
+            self.stats["coalesced"] += 1
+            return task
+        task = asyncio.ensure_future(self._run(key, loader))
+        self._inflight[key] = task
+        task.add_done_callback(lambda t: self._inflight.pop(key, None))
+        return task
+
+    async def _cached(self, key: str, loader: Callable[[], Awaitable]):
+        entry = self._cache.get(key)
+        if entry is not None:
+            fresh_until, stale_until, value = entry
+            now = time.monotonic()
+            if now < fresh_until:
+                self.stats["hits"] += 1
+                self._cache.move_to_end(key)
+                return value
+            if now < stale_until:
+                self.stats["stale_hits"] += 1
+                task = self._load(key, loader)
+                # ошибка фонового обновления не должна всплыть как "never retrieved"
+                task.add_done_callback(lambda t: t.cancelled() or t.exception())
+                return value
+        self.stats["misses"] += 1
+        # shield: отмена одного ожидающего не отменяет загрузку для остальных
+        return await asyncio.shield(self._load(key, loader))
+
+    async def _get_json(self, url: str):
+        async with self._get_session().get(url) as resp:
+            if resp.status == 200:
+                return await resp.json()
+            return None
 
     async def fetch_country_info(self, country_name: str):
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f"{self.BASE_COUNTRY_URL}{country_name}") as resp:
-                if resp.status == 200:
-                    data = await resp.json()
-                    if isinstance(data, list) and len(data) > 0:
-                        return data[0]
-                return None
-
-    async def search_place(self, place_name: str, country_name: str):
-        # Заглушка: здесь можно добавить реальный поиск координат через API геокодера
-        return {"lat": 55.751244, "lon": 37.618423}  # Пример: Москва
\ No newline at end of file
+        async def loader():
+            data = await self._get_json(f"{self.base_url}name/{quote(country_name)}")
+            if isinstance(data, list) and len(data) > 0:
+                return data[0]
+            return None
+
+        return await self._cached(f"name:{country_name.casefold()}", loader)
+
+    async def fetch_countries(self, codes: list, fields: list, fresh: bool = False) -> list:
+        """Несколько стран по кодам ISO одним запросом; fresh=True — мимо кэша (ответ в него попадёт)"""
+        codes = sorted(code.lower() for code in codes)
+        url = f"{self.base_url}alpha?codes={','.join(codes)}&fields={','.join(fields)}"
+
+        async def loader():
+            data = await self._get_json(url)
+            return data if isinstance(data, list) else None
+
+        if fresh:
+            return await asyncio.shield(self._load(url, loader)) or []
+        return await self._cached(url, loader) or []
+
+    async def search_place(self, place_name: str, country_name: Optional[str] = None):
+        """Координаты места из локального справочника, без обращения к сети"""
+        if self.geo is None:
+            self.geo = GeoService()
+        place = self.geo.search(place_name, country_name)
+        if place is None:
+            return None
+        return {"name": place.name, "country": place.country, "lat": place.lat, "lon": place.lon}
@@ -1,18 +1,230 @@
+import asyncio
 import json
+import logging
+import mmap
 import os
+import pickle
+import struct
+import threading
+from typing import Optional
+
+from services.files import atomic_write
+from tracing import span
+
+logger = logging.getLogger(__name__)
+
+# Разделы страны и их типы; каждая запись проверяется при сборке и при загрузке
+SCHEMA = {
+    "Важные правила и особенности": str,
+    "Требуемые документы": str,
+    "Список вещей, которые стоит взять": str,
+    "Популярные места для посещения": list,
+    "Национальная кухня": list,
+}
+SNAPSHOT_VERSION = 1
+# длина заголовка снимка: 8 байт big-endian перед pickle с индексом
+_HEADER = struct.Struct(">Q")
+
+
+def validate_country(key: str, info) -> dict:
+    """Проверить запись страны по SCHEMA, ValueError при несовпадении"""
+    if not isinstance(info, dict):
+        raise ValueError(f"{key}: expected an object, got {type(info).__name__}")
+    for field, field_type in SCHEMA.items():
+        value = info.get(field)
+        if not isinstance(value, field_type):
+            raise ValueError(f"{key}: field {field!r} must be {field_type.__name__}")
+        if field_type is list and not all(isinstance(item, str) for item in value):
+            raise ValueError(f"{key}: field {field!r} must contain only strings")
+    unknown = set(info) - set(SCHEMA)
+    if unknown:
+        raise ValueError(f"{key}: unknown fields {sorted(unknown)}")
+    return info
+
+
+class _State:
+    """Срез данных одного снимка: читатели берут ссылку без блокировок.
+
+    Индекс и отображённый в память снимок после публикации не меняются, а
+    countries лишь дополняется прочитанными странами. Снимок отображён целиком,
+    поэтому пересборка (os.replace нового файла) не сдвигает под ним смещения:
+    старый файл живёт, пока на срез есть ссылки.
+    """
+    __slots__ = ("signature", "index", "data_offset", "countries", "snapshot")
+
+    def __init__(self, signature, index: dict, data_offset: int, countries: dict, snapshot=None):
+        self.signature = signature
+        self.index = index              # страна -> (смещение, длина) в снимке
+        self.data_offset = data_offset
+        self.countries = countries      # уже загруженные страны
+        self.snapshot = snapshot        # mmap файла, из которого прочитан index
+
 
 class CountriesService:
-    def __init__(self):
-        self.data_file = os.path.join(os.path.dirname(__file__), "countries.json")
+    def __init__(self, data_file: Optional[str] = None, snapshot_file: Optional[str] = None):
+        base_dir = os.path.dirname(__file__)
+        self.data_file = data_file or os.path.join(base_dir, "countries.json")
+        self.snapshot_file = snapshot_file or os.path.join(base_dir, "countries.snapshot")
+        self.stats = {"hits": 0, "misses": 0, "reloads": 0}
+        self._state = None
+        self._lock = threading.Lock()  # сборку состояния делает один поток за раз
+        self._loading: Optional[asyncio.Future] = None
 
-    def load(self) -> dict:
-        """Загрузить все страны из JSON"""
-        if not os.path.exists(self.data_file):
-            return {}
+    def _source_signature(self) -> list:
+        st = os.stat(self.data_file)
+        return [st.st_mtime_ns, st.st_size]
+
+    def compile(self) -> dict:
+        """Собрать бинарный снимок из countries.json; возвращает индекс стран"""
         with open(self.data_file, "r", encoding="utf-8") as f:
-            return json.load(f)
+            data = json.load(f)
+
+        blobs, index, offset = [], {}, 0
+        for key, info in data.items():
+            blob = pickle.dumps(validate_country(key, info), protocol=pickle.HIGHEST_PROTOCOL)
+            index[key] = (offset, len(blob))
+            blobs.append(blob)
+            offset += len(blob)
+
+        header = pickle.dumps({
+            "version": SNAPSHOT_VERSION,
+            "source": self._source_signature(),
+            "index": index,
+        }, protocol=pickle.HIGHEST_PROTOCOL)
+        with atomic_write(self.snapshot_file, "wb") as f:
+            f.write(_HEADER.pack(len(header)))
+            f.write(header)
+            f.writelines(blobs)
+        return index
+
+    def _map_snapshot(self) -> Optional[tuple]:
+        """Отобразить снимок в память и прочитать его заголовок: (mmap, заголовок)"""
+        try:
+            with open(self.snapshot_file, "rb") as f:
+                snapshot = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            (length,) = _HEADER.unpack_from(snapshot)
+            header = pickle.loads(snapshot[_HEADER.size:_HEADER.size + length])
+            if not isinstance(header, dict) or not isinstance(header.get("index"), dict):
+                raise ValueError("snapshot header has no index")
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            # пустой или обрезанный снимок (mmap, struct, pickle) — просто пересобрать
+            logger.warning("Countries snapshot %s is unreadable, rebuilding: %r", self.snapshot_file, e)
+            return None
+        header["data_offset"] = _HEADER.size + length
+        return snapshot, header
+
+    def _build_state(self, keep: tuple = ()) -> _State:
+        """Прочитать индекс снимка, пересобрав снимок, если JSON новее"""
+        signature = self._source_signature() if os.path.exists(self.data_file) else None
+        mapped = self._map_snapshot()
+        stale = (
+            mapped is None
+            or mapped[1].get("version") != SNAPSHOT_VERSION
+            or (signature is not None and mapped[1]["source"] != signature)
+        )
+        if stale:
+            if signature is None:
+                return _State(None, {}, 0, {})
+            self.compile()
+            # индекс и данные берутся из одного файла, даже если его уже
+            # заменил другой процесс
+            mapped = self._map_snapshot()
+            if mapped is None:
+                raise ValueError(f"countries snapshot {self.snapshot_file} is unreadable right after compile")
+        snapshot, header = mapped
+        state = _State(signature, header["index"], header["data_offset"], {}, snapshot)
+        # заранее подгружаем страны, которые уже спрашивали, чтобы после
+        # перезагрузки горячий путь не ходил на диск
+        for key in keep:
+            if key in state.index:
+                state.countries[key] = self._read_country(state, key)
+        return state
+
+    def _open(self) -> _State:
+        state = self._state
+        if state is None:
+            with self._lock:
+                state = self._state
+                if state is None:
+                    state = self._state = self._build_state()
+        return state
+
+    async def ready(self) -> None:
+        """Загрузить индекс в потоке; все, кто ждёт до конца загрузки, ждут одну и ту же"""
+        if self._state is not None:
+            return
+        loading = self._loading
+        if loading is None:
+            loading = self._loading = asyncio.ensure_future(asyncio.to_thread(self._open))
+            # после ошибки следующий вызов попробует снова
+            loading.add_done_callback(lambda _: setattr(self, "_loading", None))
+        await asyncio.shield(loading)
+
+    def _read_country(self, state: _State, country_key: str) -> dict:
+        offset, length = state.index[country_key]
+        start = state.data_offset + offset
+        with span("fs.read_country", country=country_key, bytes=length):
+            return validate_country(country_key, pickle.loads(state.snapshot[start:start + length]))
+
+    def reload_if_changed(self) -> bool:
+        """Перечитать данные, если у countries.json изменились mtime или размер"""
+        state = self._state
+        if state is None:
+            self._open()
+            return False
+        try:
+            signature = self._source_signature()
+        except FileNotFoundError:
+            return False
+        if signature == state.signature:
+            return False
+        with self._lock:
+            self._state = self._build_state(keep=tuple(state.countries))
+        self.stats["reloads"] += 1
+        return True
+
+    async def refresh(self) -> bool:
+        """Проверка и перезагрузка вне event loop"""
+        return await asyncio.to_thread(self.reload_if_changed)
+
+    async def watch(self, interval: float = 30.0) -> None:
+        """Фоновая задача: следить за изменениями countries.json"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.refresh()
+            except Exception:
+                # битая правка не должна останавливать слежение: остаются прежние данные
+                logger.exception("Failed to reload %s, keeping the previous data", self.data_file)
+
+    def keys(self) -> list:
+        """Список стран в порядке countries.json без загрузки их содержимого"""
+        return list(self._open().index)
+
+    def get_country(self, country_key: str) -> Optional[dict]:
+        """Страна из памяти или, при первом обращении, из снимка"""
+        state = self._open()
+        info = state.countries.get(country_key)
+        if info is not None:
+            self.stats["hits"] += 1
+            return info
+        if country_key not in state.index:
+            return None
+        self.stats["misses"] += 1
+        info = state.countries[country_key] = self._read_country(state, country_key)
+        return info
+
+    def load(self) -> dict:
+        """Загрузить все страны"""
+        return {key: self.get_country(key) for key in self.keys()}
 
     def get_country_info(self, country_key: str, field: str) -> str:
         """Получить конкретный раздел информации по стране"""
-        data = self.load()
-        return data.get(country_key, {}).get(field, "Информация отсутствует")
+        info = self.get_country(country_key) or {}
+        return info.get(field, "Информация отсутствует")
+
+
+if __name__ == "__main__":
+    print(f"{len(CountriesService().compile())} countries compiled")
@@ -0,0 +1,146 @@
+import asyncio
+import json
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Optional
+
+import aiohttp
+
+from services.api_service import ApiService
+from services.files import atomic_write
+
+logger = logging.getLogger(__name__)
+
+REFRESH_FIELDS = ["cca2", "currencies", "timezones", "idd"]
+
+
+def _calling_code(idd: dict) -> Optional[str]:
+    root = idd.get("root")
+    if not root:
+        return None
+    suffixes = idd.get("suffixes") or []
+    # у США/Канады десятки суффиксов-регионов, общий код — только root
+    return f"{root}{suffixes[0]}" if len(suffixes) == 1 else root
+
+
+class CountryMetaService:
+    """Столица, валюта, языки, часовые пояса и телефонный код из локального снимка.
+
+    Названия на русском собраны вручную в data_file (он лежит в репозитории и
+    не меняется). restcountries в фоне обновляет только поля, не зависящие от
+    языка (код валюты и символ, пояса, телефонный код); обновления хранятся
+    отдельно в runtime_file и накладываются на снимок при загрузке.
+    """
+
+    def __init__(self, api: ApiService, data_file: Optional[str] = None, runtime_file: Optional[str] = None):
+        self.api = api
+        self.data_file = data_file or os.path.join(os.path.dirname(__file__), "countries_meta.json")
+        self.runtime_file = runtime_file
+        self.updated_at = None
+        self._bundled = {}
+        self._countries = {}
+        self._load()
+
+    @staticmethod
+    def _read(path: str) -> dict:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _load(self) -> None:
+        if not os.path.exists(self.data_file):
+            return
+        snapshot = self._read(self.data_file)
+        self.updated_at = snapshot.get("updated_at")
+        self._bundled = self._countries = snapshot.get("countries", {})
+        if not self.runtime_file or not os.path.exists(self.runtime_file):
+            return
+        try:
+            runtime = self._read(self.runtime_file)
+        except (OSError, ValueError) as e:
+            logger.warning("country meta updates not loaded: %r", e)
+            return
+        self.updated_at = runtime.get("updated_at")
+        self._countries = self._overlay(runtime.get("countries", {}))
+
+    def _write(self, snapshot: dict) -> None:
+        with atomic_write(self.runtime_file) as f:
+            json.dump(snapshot, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+
+    def get(self, country_key: str) -> Optional[dict]:
+        """Данные страны из памяти, без обращения к сети"""
+        return self._countries.get(country_key)
+
+    def _merge(self, remote: list) -> dict:
+        """Обновления из ответа restcountries: страна -> поля, которые меняются поверх снимка"""
+        by_code = {item.get("cca2"): item for item in remote}
+        updates = {}
+        for key, meta in self._bundled.items():
+            item = by_code.get(meta["code"])
+            if item is None:
+                continue
+            update = {}
+            currencies = item.get("currencies") or {}
+            if currencies:
+                code = meta["currency"]["code"]
+                symbol = meta["currency"]["symbol"]
+                if code not in currencies:
+                    # название валюты — по-русски из снимка, его правят руками
+                    code, symbol = next(iter(currencies)), ""
+                    logger.warning("%s: currency is now %s, update its name in %s", key, code, self.data_file)
+                update["currency"] = {"code": code, "symbol": currencies[code].get("symbol") or symbol}
+            if item.get("timezones"):
+                update["timezones"] = item["timezones"]
+            calling_code = _calling_code(item.get("idd") or {})
+            if calling_code:
+                update["calling_code"] = calling_code
+            updates[key] = update
+        return updates
+
+    def _overlay(self, updates: dict) -> dict:
+        """Снимок с наложенными обновлениями; название валюты всегда из снимка"""
+        countries = {}
+        for key, meta in self._bundled.items():
+            update = updates.get(key)
+            if update:
+                meta = dict(meta, **update)
+                if "currency" in update:
+                    meta["currency"] = dict(self._bundled[key]["currency"], **update["currency"])
+            countries[key] = meta
+        return countries
+
+    async def refresh(self) -> bool:
+        """Обновить снимок из restcountries; при недоступности сети остаётся старый"""
+        codes = sorted({meta["code"] for meta in self._bundled.values()})
+        if not codes:
+            return False
+        try:
+            # кэш ApiService живёт столько же, сколько интервал обновления: идём мимо него
+            remote = await self.api.fetch_countries(codes, REFRESH_FIELDS, fresh=True)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.info("country meta refresh skipped: %r", e)
+            return False
+        if not remote:
+            return False
+
+        updates = self._merge(remote)
+        updated_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        if self.runtime_file:
+            try:
+                await asyncio.to_thread(self._write, {"updated_at": updated_at, "countries": updates})
+            except OSError as e:
+                logger.warning("country meta updates not saved: %r", e)
+        self._countries = self._overlay(updates)
+        self.updated_at = updated_at
+        return True
+
+    async def watch(self, interval: float = 24 * 3600) -> None:
+        """Фоновая задача: периодически обновлять снимок; первое обновление — через interval"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.refresh()
+            except Exception:
+                # неожиданный ответ restcountries не должен останавливать обновления
+                logger.exception("Country meta refresh failed, keeping the previous data")
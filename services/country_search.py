@@ -0,0 +1,75 @@
+import json
+import os
+from typing import Optional
+
+from services.images_service import normalize_name
+
+
+class _Node:
+    __slots__ = ("children", "names")
+
+    def __init__(self):
+        self.children = {}
+        self.names = set()  # страны, у которых есть ключ с этим префиксом
+
+
+class PrefixIndex:
+    """Префиксное дерево: поиск за длину запроса, без перебора всех ключей"""
+
+    def __init__(self):
+        self._root = _Node()
+
+    def add(self, key: str, name: str) -> None:
+        node = self._root
+        node.names.add(name)
+        for char in key:
+            node = node.children.setdefault(char, _Node())
+            node.names.add(name)
+
+    def find(self, prefix: str) -> set:
+        node = self._root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return set()
+        return node.names
+
+
+class CountrySearch:
+    """Поиск страны по началу названия, любого слова в нём или синонима.
+
+    Синонимы (английские названия, коды, разговорные варианты) берутся из
+    services/country_aliases.json.
+    """
+
+    def __init__(self, names, aliases_file: Optional[str] = None):
+        self.aliases_file = aliases_file or os.path.join(os.path.dirname(__file__), "country_aliases.json")
+        self.aliases = {}
+        if os.path.exists(self.aliases_file):
+            with open(self.aliases_file, "r", encoding="utf-8") as f:
+                self.aliases = json.load(f)
+        self.update(names)
+
+    def update(self, names) -> None:
+        index = PrefixIndex()
+        self._order = {}
+        for position, name in enumerate(names):
+            self._order[name] = position
+            for key in [name, *self.aliases.get(name, [])]:
+                key = normalize_name(key)
+                # «корея» находит и «Южную Корею», и «Северную Корею»
+                words = key.split(" ")
+                for i in range(len(words)):
+                    index.add(" ".join(words[i:]), name)
+        self._index = index
+
+    def search(self, query: str, limit: int = 10) -> list:
+        """Страны, подходящие под запрос"""
+        query = normalize_name(query)
+        if not query:
+            return []
+        # сначала страны, чьё название начинается с запроса, потом найденные по слову или синониму
+        return sorted(
+            self._index.find(query),
+            key=lambda name: (not normalize_name(name).startswith(query), self._order[name]),
+        )[:limit]
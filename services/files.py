@@ -0,0 +1,24 @@
+import contextlib
+import os
+import tempfile
+
+
+@contextlib.contextmanager
+def atomic_write(path: str, mode: str = "w", encoding: str = "utf-8"):
+    """Открыть файл на запись так, чтобы под именем path он появился целиком или не появился вовсе.
+
+    Пишется во временный файл с уникальным именем в том же каталоге (несколько
+    процессов не мешают друг другу), затем os.replace; при ошибке временный
+    файл удаляется, а старый path остаётся как был.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode, encoding=None if "b" in mode else encoding) as f:
+            yield f
+        os.chmod(tmp_path, 0o644)  # mkstemp создаёт файл с правами 0600
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        raise
@@ -0,0 +1,348 @@
+import asyncio
+import contextlib
+import json
+import logging
+import sqlite3
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Mapping, Optional
+
+from aiogram.exceptions import DataNotDictLikeError
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, StateType, StorageKey
+
+logger = logging.getLogger(__name__)
+
+_UPSERT = {
+    # какие поля записи перезаписываются при сбросе на диск
+    ("state", "data"): "state = excluded.state, data = excluded.data, updated_at = excluded.updated_at",
+    ("state",): "state = excluded.state, updated_at = excluded.updated_at",
+    ("data",): "data = excluded.data, updated_at = excluded.updated_at",
+}
+# после неудачного сброса пауза удваивается, но не дольше
+MAX_FLUSH_BACKOFF = 5.0
+
+
+class SQLiteStorage(BaseStorage):
+    """FSM-хранилище в SQLite (WAL): переживает рестарты и общее для нескольких процессов.
+
+    Записи копятся в памяти и сбрасываются одной транзакцией раз в flush_interval
+    секунд или по достижении batch_size; чтение сначала смотрит несброшенные записи.
+    С batched=False каждая запись — отдельная транзакция, set_* ждут её завершения.
+    Сессии, не менявшиеся дольше ttl секунд, считаются пустыми и удаляются.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl: float = 7 * 24 * 3600,
+        flush_interval: float = 0.05,
+        batch_size: int = 256,
+        purge_interval: float = 3600,
+        batched: bool = True,
+        count_interval: float = 10,
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.batched = batched
+        self.count_interval = count_interval
+        self.purge_interval = purge_interval
+        self.key_builder = DefaultKeyBuilder(with_bot_id=True, with_destiny=True)
+        # одно соединение и один поток: sqlite3 не любит конкурентный доступ к соединению
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="fsm-sqlite")
+        self._conn = None
+        self._pending: Dict[str, dict] = {}
+        self._flushing: Dict[str, dict] = {}  # пачка, которая прямо сейчас пишется на диск
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_now = None
+        self._last_purge = time.time()
+        self._sessions: Optional[int] = None  # живые сессии на диске, обновляется при сбросе
+        self._counted_at = 0.0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS fsm ("
+                "key TEXT PRIMARY KEY, state TEXT, data TEXT NOT NULL DEFAULT '{}', updated_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS fsm_updated_at ON fsm (updated_at)")
+            self._conn = conn
+            self._count(time.time())
+        return self._conn
+
+    @property
+    def gauges(self) -> dict:
+        """Живые сессии в базе (не старше ttl); None, пока база не открыта"""
+        return {"sessions": self._sessions}
+
+    def _count(self, now: float) -> None:
+        # COUNT идёт по индексу updated_at, но всё равно не чаще раза в count_interval
+        self._sessions = self._conn.execute(
+            "SELECT COUNT(*) FROM fsm WHERE updated_at >= ?", (now - self.ttl,)
+        ).fetchone()[0]
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    # ---------- чтение ----------
+
+    def _read_row(self, key: str) -> Optional[tuple]:
+        row = self._connect().execute(
+            "SELECT state, data, updated_at FROM fsm WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or row[2] < time.time() - self.ttl:
+            return None
+        return row[0], json.loads(row[1])
+
+    async def _get(self, key: str, field: str):
+        for records in (self._pending, self._flushing):
+            record = records.get(key)
+            if record is not None and field in record:
+                return record[field]
+        row = await self._run(self._read_row, key)
+        if row is None:
+            return None if field == "state" else {}
+        return row[0] if field == "state" else row[1]
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        return await self._get(self.key_builder.build(key), "state")
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        return dict(await self._get(self.key_builder.build(key), "data"))
+
+    # ---------- запись ----------
+
+    async def _write(self, key: str, field: str, value) -> None:
+        if not self.batched:
+            await self._run(self._flush_batch, {key: {field: value}})
+            return
+        self._pending.setdefault(key, {})[field] = value
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_now = asyncio.Event()
+            self._flush_task = asyncio.create_task(self._flush_loop())
+        if len(self._pending) >= self.batch_size:
+            self._flush_now.set()
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        await self._write(self.key_builder.build(key), "state", state.state if isinstance(state, State) else state)
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        if not isinstance(data, dict):
+            raise DataNotDictLikeError(f"Data must be a dict or dict-like object, got {type(data).__name__}")
+        await self._write(self.key_builder.build(key), "data", dict(data))
+
+    def _flush_batch(self, batch: Dict[str, dict]) -> None:
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN")
+        try:
+            # просроченная сессия не должна «ожить» при частичной записи
+            conn.executemany(
+                "DELETE FROM fsm WHERE key = ? AND updated_at < ?",
+                [(key, now - self.ttl) for key in batch],
+            )
+            for key, record in batch.items():
+                fields = tuple(f for f in ("state", "data") if f in record)
+                conn.execute(
+                    "INSERT INTO fsm (key, state, data, updated_at) VALUES (?, ?, ?, ?) "
+                    f"ON CONFLICT(key) DO UPDATE SET {_UPSERT[fields]}",
+                    (key, record.get("state"), json.dumps(record.get("data", {}), ensure_ascii=False), now),
+                )
+            if now - self._last_purge > self.purge_interval:
+                conn.execute("DELETE FROM fsm WHERE updated_at < ?", (now - self.ttl,))
+                self._last_purge = now
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        if now - self._counted_at > self.count_interval:
+            self._count(now)
+            self._counted_at = now
+
+    async def flush(self) -> None:
+        """Сбросить накопленные записи на диск"""
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, {}
+        self._flushing = batch
+        try:
+            await self._run(self._flush_batch, batch)
+        except BaseException:
+            # вернуть несохранённое, не затирая более свежие записи
+            for key, record in batch.items():
+                self._pending[key] = {**record, **self._pending.get(key, {})}
+            raise
+        finally:
+            self._flushing = {}
+
+    async def _flush_loop(self) -> None:
+        delay = self.flush_interval
+        while self._pending:
+            if delay > self.flush_interval:
+                # после ошибки ждём паузу целиком, даже если пачка уже набралась
+                await asyncio.sleep(delay)
+            else:
+                try:
+                    await asyncio.wait_for(self._flush_now.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+            self._flush_now.clear()
+            try:
+                await self.flush()
+            except Exception:
+                # записи остались в _pending: повторим, пока диск не оживёт
+                delay = min(delay * 2, MAX_FLUSH_BACKOFF)
+                logger.exception("FSM flush failed, %d sessions pending, retrying in %.2fs", len(self._pending), delay)
+            else:
+                delay = self.flush_interval
+
+    async def close(self) -> None:
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._flush_task
+        try:
+            await self.flush()
+        except Exception:
+            logger.exception("FSM flush on close failed, %d sessions not saved", len(self._pending))
+        if self._conn is not None:
+            await self._run(self._conn.close)
+            self._conn = None
+        self._executor.shutdown(wait=False)
+
+
+class _Session:
+    __slots__ = ("state", "data", "touched", "size")
+
+    def __init__(self):
+        self.state = None
+        self.data = None  # None вместо пустого dict экономит память
+        self.touched = 0.0
+        self.size = 0
+
+
+def _sizeof(key: tuple, session: _Session) -> int:
+    """Примерный объём сессии в байтах (запись, ключ, состояние и данные первого уровня)"""
+    size = sys.getsizeof(session) + sys.getsizeof(key) + sys.getsizeof(session.state)
+    if session.data:
+        size += sys.getsizeof(session.data)
+        size += sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in session.data.items())
+    return size
+
+
+class BoundedMemoryStorage(BaseStorage):
+    """FSM-хранилище в памяти процесса с ограниченным размером.
+
+    Держит не больше max_sessions сессий: при переполнении вытесняется та, к которой
+    дольше всего не обращались (LRU), а сессии без обращений дольше ttl секунд
+    забываются. Пустые сессии (без состояния и данных) не хранятся вовсе.
+    """
+
+    def __init__(self, max_sessions: int = 10000, ttl: float = 24 * 3600):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._sessions: "OrderedDict[tuple, _Session]" = OrderedDict()
+        self._bytes = 0
+        self._expired_at = 0.0
+        self.stats = {"evicted_lru": 0, "evicted_ttl": 0}
+
+    @property
+    def gauges(self) -> dict:
+        """Живые сессии и занятый ими объём"""
+        return {"sessions": len(self._sessions), "bytes": self._bytes}
+
+    @staticmethod
+    def _key(key: StorageKey) -> tuple:
+        # хэш кортежа считается в C, а у dataclass StorageKey — в Python при каждом обращении
+        return key.bot_id, key.chat_id, key.user_id, key.thread_id, key.business_connection_id, key.destiny
+
+    def _drop(self, key: tuple, reason: str) -> None:
+        session = self._sessions.pop(key)
+        self._bytes -= session.size
+        self.stats[reason] += 1
+
+    def _expire(self, now: float) -> None:
+        if now - self._expired_at < 1:
+            return
+        self._expired_at = now
+        # в начале OrderedDict — самые давние обращения, дальше можно не смотреть
+        while self._sessions:
+            key, session = next(iter(self._sessions.items()))
+            if session.touched >= now - self.ttl:
+                break
+            self._drop(key, "evicted_ttl")
+
+    def _session(self, key: tuple) -> Optional[_Session]:
+        now = time.monotonic()
+        self._expire(now)
+        session = self._sessions.get(key)
+        if session is not None and session.touched < now - self.ttl:
+            self._drop(key, "evicted_ttl")
+            return None
+        if session is not None:
+            session.touched = now
+            self._sessions.move_to_end(key)
+        return session
+
+    def _update(self, key: tuple, field: str, value) -> None:
+        session = self._session(key)
+        if session is None:
+            if not value:
+                return
+            session = self._sessions[key] = _Session()
+            session.touched = time.monotonic()
+        setattr(session, field, value or None)
+        if session.state is None and session.data is None:
+            self._bytes -= session.size
+            del self._sessions[key]
+            return
+        size = _sizeof(key, session)
+        self._bytes += size - session.size
+        session.size = size
+        while len(self._sessions) > self.max_sessions:
+            self._drop(next(iter(self._sessions)), "evicted_lru")
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        self._update(self._key(key), "state", state.state if isinstance(state, State) else state)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        session = self._session(self._key(key))
+        return session.state if session is not None else None
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        if not isinstance(data, dict):
+            raise DataNotDictLikeError(f"Data must be a dict or dict-like object, got {type(data).__name__}")
+        self._update(self._key(key), "data", dict(data))
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        session = self._session(self._key(key))
+        return dict(session.data) if session is not None and session.data else {}
+
+    async def close(self) -> None:
+        pass
+
+
+def make_storage(
+    redis_url: Optional[str], sqlite_path: str, ttl: float, kind: str = "sqlite", max_sessions: int = 10000,
+) -> BaseStorage:
+    """Redis, если задан REDIS_URL (пакет redis из requirements-redis.txt); иначе SQLite или память (kind="memory")"""
+    if redis_url:
+        try:
+            from aiogram.fsm.storage.redis import RedisStorage
+        except ImportError as e:
+            raise RuntimeError(
+                "REDIS_URL is set but the redis package is not installed: pip install -r requirements-redis.txt"
+            ) from e
+
+        return RedisStorage.from_url(redis_url, state_ttl=int(ttl), data_ttl=int(ttl))
+    if kind == "memory":
+        return BoundedMemoryStorage(max_sessions=max_sessions, ttl=ttl)
+    return SQLiteStorage(sqlite_path, ttl=ttl)
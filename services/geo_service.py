@@ -0,0 +1,155 @@
+import heapq
+import json
+import math
+import os
+from typing import Optional
+
+from services.images_service import name_variants, normalize_name
+
+EARTH_RADIUS_KM = 6371.0
+
+
+class Place:
+    __slots__ = ("country", "item", "name", "lat", "lon", "xyz")
+
+    def __init__(self, country: str, item: str, name: str, lat: float, lon: float):
+        self.country = country
+        self.item = item      # пункт как он записан в countries.json
+        self.name = name
+        self.lat = lat
+        self.lon = lon
+        self.xyz = to_xyz(lat, lon)
+
+    def __repr__(self):
+        return f"Place({self.name!r}, {self.lat}, {self.lon})"
+
+
+def to_xyz(lat: float, lon: float) -> tuple:
+    """Точка на единичной сфере: евклидово расстояние монотонно большому кругу"""
+    la, lo = math.radians(lat), math.radians(lon)
+    return (math.cos(la) * math.cos(lo), math.cos(la) * math.sin(lo), math.sin(la))
+
+
+def chord_to_km(chord: float) -> float:
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, chord / 2))
+
+
+def _trigrams(text: str) -> set:
+    text = f"  {text} "
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class _KDNode:
+    __slots__ = ("place", "axis", "left", "right")
+
+    def __init__(self, place: Place, axis: int, left, right):
+        self.place = place
+        self.axis = axis
+        self.left = left
+        self.right = right
+
+
+def _build_kdtree(places: list, depth: int = 0) -> Optional[_KDNode]:
+    if not places:
+        return None
+    axis = depth % 3
+    places = sorted(places, key=lambda p: p.xyz[axis])
+    mid = len(places) // 2
+    return _KDNode(
+        places[mid], axis,
+        _build_kdtree(places[:mid], depth + 1),
+        _build_kdtree(places[mid + 1:], depth + 1),
+    )
+
+
+class GeoService:
+    """Локальный геокодер по services/gazetteer.json: поиск по названию и ближайшие места"""
+
+    def __init__(self, data_file: Optional[str] = None):
+        self.data_file = data_file or os.path.join(os.path.dirname(__file__), "gazetteer.json")
+        self.places = []
+        self._by_name = {}      # нормализованное название/синоним -> Place
+        self._by_trigram = {}   # триграмма -> индексы мест
+        self._names = []        # (нормализованное название, Place) для нечёткого поиска
+        self._tree = None
+        self._loaded = False    # справочник читается при первом обращении или в load()
+
+    def load(self) -> None:
+        """Прочитать справочник и построить индексы; можно вызвать заранее в потоке"""
+        places, by_name, by_trigram, names = [], {}, {}, []
+        if os.path.exists(self.data_file):
+            with open(self.data_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            for entry in data.get("places", []):
+                place = Place(entry["country"], entry["item"], entry["name"], entry["lat"], entry["lon"])
+                places.append(place)
+                for key in {*name_variants(entry["item"]), normalize_name(entry["name"]),
+                            *(normalize_name(alias) for alias in entry.get("aliases", []))}:
+                    by_name.setdefault(key, place)
+            for key, place in by_name.items():
+                index = len(names)
+                names.append((key, place))
+                for gram in _trigrams(key):
+                    by_trigram.setdefault(gram, []).append(index)
+        # индексы подменяются целиком: поиск из event loop не увидит их наполовину собранными
+        self.places, self._by_name, self._by_trigram, self._names = places, by_name, by_trigram, names
+        self._tree = _build_kdtree(places)
+        self._loaded = True
+
+    def _ensure_loaded(self) -> None:
+        if not self._loaded:
+            self.load()
+
+    def search(self, query: str, country: Optional[str] = None, threshold: float = 0.45) -> Optional[Place]:
+        """Найти место по названию: точное совпадение, затем по сходству триграмм"""
+        self._ensure_loaded()
+        for key in name_variants(query):
+            place = self._by_name.get(key)
+            if place is not None and (country is None or place.country == country):
+                return place
+
+        grams = _trigrams(normalize_name(query))
+        counts = {}
+        for gram in grams:
+            for index in self._by_trigram.get(gram, ()):
+                counts[index] = counts.get(index, 0) + 1
+        best, best_score = None, threshold
+        for index, common in counts.items():
+            key, place = self._names[index]
+            if country is not None and place.country != country:
+                continue
+            # коэффициент Дайса по триграммам
+            score = 2 * common / (len(grams) + len(_trigrams(key)))
+            if score > best_score:
+                best, best_score = place, score
+        return best
+
+    def places_for_country(self, country: str) -> list:
+        self._ensure_loaded()
+        return [place for place in self.places if place.country == country]
+
+    def nearest(self, lat: float, lon: float, k: int = 3, exclude: Optional[Place] = None) -> list:
+        """k ближайших мест к точке: [(Place, км)] по возрастанию расстояния"""
+        self._ensure_loaded()
+        target = to_xyz(lat, lon)
+        heap = []  # max-heap через отрицательный квадрат расстояния
+
+        def visit(node: Optional[_KDNode]):
+            if node is None:
+                return
+            place = node.place
+            if place is not exclude:
+                d2 = sum((a - b) ** 2 for a, b in zip(place.xyz, target))
+                if len(heap) < k:
+                    heapq.heappush(heap, (-d2, id(place), place))
+                elif d2 < -heap[0][0]:
+                    heapq.heapreplace(heap, (-d2, id(place), place))
+            diff = target[node.axis] - place.xyz[node.axis]
+            near, far = (node.left, node.right) if diff < 0 else (node.right, node.left)
+            visit(near)
+            if len(heap) < k or diff * diff < -heap[0][0]:
+                visit(far)
+
+        visit(self._tree)
+        result = sorted(heap, reverse=True)
+        return [(place, chord_to_km(math.sqrt(-neg_d2))) for neg_d2, _, place in result]
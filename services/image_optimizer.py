@@ -0,0 +1,164 @@
+"""Сборка оптимизированных копий картинок из images/.
+
+Запуск: python -m services.image_optimizer [--format jpeg|webp]
+images_optimized/ не хранится в git: если копий нет или оригиналы с тех пор
+изменились, бот сам пересобирает их в фоне после старта.
+"""
+import argparse
+import hashlib
+import json
+import os
+
+from services.files import atomic_write
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp"}
+# Telegram всё равно ужимает фото до 1280px по длинной стороне
+MAX_SIDE = 1280
+QUALITY = 82
+MANIFEST_NAME = "manifest.json"
+
+
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def read_manifest(out_dir: str) -> dict:
+    path = os.path.join(out_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def check_manifest(src_dir: str, out_dir: str) -> tuple:
+    """(путь оригинала -> путь копии, имена оригиналов без актуальной записи в манифесте).
+
+    Запись годится, только если sha256 оригинала совпадает с записанным, а копия
+    на месте: изменённый оригинал отдаётся как есть, пока копию не пересоберут.
+    """
+    try:
+        entries = read_manifest(out_dir).get("files", {})
+    except (OSError, ValueError):
+        entries = {}
+    result, stale = {}, []
+    for name in sorted(os.listdir(src_dir)) if os.path.isdir(src_dir) else ():
+        src_path = os.path.join(src_dir, name)
+        if os.path.splitext(name)[1].lower() not in IMAGE_EXTENSIONS or not os.path.isfile(src_path):
+            continue
+        entry = entries.get(name)
+        output = entry and entry.get("output")
+        if (
+            entry is None
+            or entry.get("sha256") != file_sha256(src_path)
+            or (output and not os.path.exists(os.path.join(out_dir, output)))
+        ):
+            stale.append(name)
+        elif output:
+            result[src_path] = os.path.join(out_dir, output)
+    return result, stale
+
+
+def load_manifest(src_dir: str, out_dir: str) -> dict:
+    """Соответствие путь оригинала -> путь оптимизированной копии (только актуальные записи)"""
+    return check_manifest(src_dir, out_dir)[0]
+
+
+def _convert(src_path: str, dst_path: str, fmt: str) -> tuple:
+    from PIL import Image, ImageOps
+
+    with Image.open(src_path) as im:
+        # поворот по EXIF применяем до того, как метаданные будут отброшены
+        im = ImageOps.exif_transpose(im)
+        im.thumbnail((MAX_SIDE, MAX_SIDE), Image.LANCZOS)
+        if im.mode in ("RGBA", "LA", "P"):
+            im = im.convert("RGBA")
+            background = Image.new("RGB", im.size, (255, 255, 255))
+            background.paste(im, mask=im.split()[-1])
+            im = background
+        elif im.mode != "RGB":
+            im = im.convert("RGB")
+
+        # новые файлы пишутся без exif/icc/xmp
+        if fmt == "webp":
+            im.save(dst_path, "WEBP", quality=QUALITY, method=6)
+        else:
+            im.save(dst_path, "JPEG", quality=QUALITY, optimize=True, progressive=True)
+        return im.size
+
+
+def optimize(src_dir: str, out_dir: str, fmt: str = "jpeg", verbose: bool = True) -> dict:
+    """Пересобрать копии для новых и изменённых файлов и обновить манифест"""
+    os.makedirs(out_dir, exist_ok=True)
+    old_files = read_manifest(out_dir).get("files", {})
+    files = {}
+    ext = ".webp" if fmt == "webp" else ".jpg"
+
+    for name in sorted(os.listdir(src_dir)):
+        src_path = os.path.join(src_dir, name)
+        if os.path.splitext(name)[1].lower() not in IMAGE_EXTENSIONS or not os.path.isfile(src_path):
+            continue
+
+        digest = file_sha256(src_path)
+        old = old_files.get(name)
+        if (
+            old and old["sha256"] == digest and old["format"] == fmt
+            and (not old["output"] or os.path.exists(os.path.join(out_dir, old["output"])))
+        ):
+            files[name] = old
+            continue
+
+        output = f"{digest[:16]}{ext}"
+        dst_path = os.path.join(out_dir, output)
+        width, height = _convert(src_path, dst_path, fmt)
+        original_bytes = os.path.getsize(src_path)
+        optimized_bytes = os.path.getsize(dst_path)
+        if optimized_bytes >= original_bytes:
+            # оригинал и так меньше — отдаём его
+            os.remove(dst_path)
+            output, optimized_bytes, width, height = None, original_bytes, None, None
+
+        files[name] = {
+            "sha256": digest,
+            "format": fmt,
+            "output": output,
+            "width": width,
+            "height": height,
+            "original_bytes": original_bytes,
+            "optimized_bytes": optimized_bytes,
+            "saved_bytes": original_bytes - optimized_bytes,
+        }
+        if verbose:
+            print(f"{name}: {original_bytes} -> {optimized_bytes}")
+
+    # удаляем копии исчезнувших или пересобранных оригиналов
+    outputs = {entry["output"] for entry in files.values() if entry["output"]}
+    for name in os.listdir(out_dir):
+        if name != MANIFEST_NAME and name not in outputs:
+            os.remove(os.path.join(out_dir, name))
+
+    manifest = {
+        "max_side": MAX_SIDE,
+        "quality": QUALITY,
+        "original_bytes": sum(e["original_bytes"] for e in files.values()),
+        "optimized_bytes": sum(e["optimized_bytes"] for e in files.values()),
+        "files": files,
+    }
+    with atomic_write(os.path.join(out_dir, MANIFEST_NAME)) as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    return manifest
+
+
+if __name__ == "__main__":
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser(description="Оптимизация картинок для Telegram")
+    parser.add_argument("--src", default=os.path.join(base_dir, "images"))
+    parser.add_argument("--out", default=os.path.join(base_dir, "images_optimized"))
+    parser.add_argument("--format", choices=("jpeg", "webp"), default="jpeg")
+    args = parser.parse_args()
+
+    result = optimize(args.src, args.out, args.format)
+    print(f"Итого: {result['original_bytes']} -> {result['optimized_bytes']} байт")
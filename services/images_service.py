@@ -0,0 +1,153 @@
+import os
+import re
+import unicodedata
+from typing import Iterable, Optional
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp"}
+IMAGE_SECTIONS = ("Популярные места для посещения", "Национальная кухня")
+
+_QUOTES = str.maketrans({"«": "", "»": "", '"': "", "'": "", "–": "-", "—": "-"})
+_SPACES = re.compile(r"\s+")
+_PARENS = re.compile(r"\(([^)]*)\)")
+_COPY_SUFFIX = re.compile(r"\s+\d+$")
+_DESCRIPTION = re.compile(r"\s+[—–-]\s+|:")
+
+
+def normalize_name(name: str) -> str:
+    """Ключ для поиска: NFKC, без регистра, ё = е, без кавычек и лишних пробелов"""
+    name = unicodedata.normalize("NFKC", name).casefold().replace("ё", "е")
+    return _SPACES.sub(" ", name.translate(_QUOTES)).strip()
+
+
+def name_variants(name: str) -> list:
+    """Варианты названия пункта: целиком, без пояснения после «—»/«:», без скобок, из скобок
+    и, в последнюю очередь, с отброшенными словами в конце («... в Шанхае»)"""
+    head = _DESCRIPTION.split(_PARENS.sub("", name), maxsplit=1)[0]
+    variants = [name, _DESCRIPTION.split(name, maxsplit=1)[0], head]
+    variants.extend(_PARENS.findall(name))
+    variants.extend(re.split(r"\s*/\s*", head))
+    words = head.split()
+    variants.extend(" ".join(words[:n]) for n in range(len(words) - 1, 1, -1))
+    seen, result = set(), []
+    for variant in variants:
+        key = normalize_name(variant).rstrip(".")
+        if key and key not in seen:
+            seen.add(key)
+            result.append(key)
+    return result
+
+
+class ImageIndex:
+    """Индекс файлов images/, собранный одним проходом по каталогу"""
+
+    def __init__(self, images_dir: str):
+        self.images_dir = images_dir
+        self.files = {}
+        self.duplicates = []
+        names = sorted(os.listdir(images_dir)) if os.path.isdir(images_dir) else []
+        for name in names:
+            stem, ext = os.path.splitext(name)
+            if ext.lower() not in IMAGE_EXTENSIONS:
+                continue
+            path = os.path.join(images_dir, name)
+            self._add(normalize_name(stem), path)
+            # «эльбская филармония 1.jpg» находится и как «эльбская филармония»
+            base = _COPY_SUFFIX.sub("", stem)
+            if base != stem:
+                self.files.setdefault(normalize_name(base), path)
+
+    def _add(self, key: str, path: str) -> None:
+        if key in self.files:
+            self.duplicates.append(path)
+        else:
+            self.files[key] = path
+
+    def find(self, names: Iterable[str]) -> Optional[str]:
+        for name in names:
+            path = self.files.get(name)
+            if path:
+                return path
+        return None
+
+    def resolve_items(self, info: dict, hints: dict) -> dict:
+        """Сопоставить места и блюда одной страны с файлами: {пункт: путь}"""
+        resolved = {}
+        for section in IMAGE_SECTIONS:
+            for item in info.get(section, []):
+                keys = []
+                hint = hints.get(item)
+                if hint:
+                    keys.append(normalize_name(os.path.splitext(os.path.basename(hint))[0]))
+                keys.extend(name_variants(item))
+                path = self.find(keys)
+                if path:
+                    resolved[item] = path
+        return resolved
+
+    def resolve(self, countries: dict, hints: dict) -> tuple:
+        """Сопоставить все страны с файлами.
+
+        Возвращает ({страна: {пункт: путь}}, отчёт с ненайденными и лишними записями).
+        """
+        resolved = {}
+        unresolved = []
+        for country, info in countries.items():
+            resolved[country] = self.resolve_items(info, hints.get(country, {}))
+            unresolved.extend(
+                (country, item)
+                for section in IMAGE_SECTIONS
+                for item in info.get(section, [])
+                if item not in resolved[country]
+            )
+
+        used = {path for items in resolved.values() for path in items.values()}
+        report = {
+            "unresolved": unresolved,
+            "orphaned": sorted(set(self.files.values()) - used),
+            "duplicates": self.duplicates,
+            "unknown_countries": sorted(set(hints) - set(countries)),
+        }
+        return resolved, report
+
+
+def format_report(report: dict) -> str:
+    lines = [
+        f"Без картинки: {len(report['unresolved'])}",
+        *(f"  {country}: {item}" for country, item in report["unresolved"]),
+        f"Файлы без пункта: {len(report['orphaned'])}",
+        *(f"  {os.path.basename(path)}" for path in report["orphaned"]),
+    ]
+    if report["duplicates"]:
+        lines.append(f"Дубликаты имён: {len(report['duplicates'])}")
+        lines.extend(f"  {os.path.basename(path)}" for path in report["duplicates"])
+    if report["unknown_countries"]:
+        lines.append("Неизвестные страны в local_images: " + ", ".join(report["unknown_countries"]))
+    return "\n".join(lines)
+
+
+def summarize_report(report: dict, limit: int = 3) -> str:
+    """Отчёт одной строкой для лога: счётчики и первые limit имён"""
+    def first(names: list) -> str:
+        more = f", +{len(names) - limit}" if len(names) > limit else ""
+        return ", ".join(names[:limit]) + more
+
+    parts = [
+        f"{len(report['unresolved'])} items without a picture"
+        + (f" ({first([f'{country}: {item}' for country, item in report['unresolved']])})" if report["unresolved"] else ""),
+        f"{len(report['orphaned'])} orphaned files"
+        + (f" ({first([os.path.basename(path) for path in report['orphaned']])})" if report["orphaned"] else ""),
+    ]
+    if report["unknown_countries"]:
+        parts.append(f"unknown countries in local_images: {first(report['unknown_countries'])}")
+    return "; ".join(parts)
+
+
+if __name__ == "__main__":
+    import sys
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    os.environ.setdefault("BOT_TOKEN", "0:report")
+    import bot
+
+    _, images_report = ImageIndex(bot.IMAGES_DIR).resolve(bot.countries.load(), bot.local_images)
+    print(format_report(images_report))
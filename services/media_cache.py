@@ -0,0 +1,154 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from typing import Awaitable, Callable, List, Optional, Union
+
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import FSInputFile, Message
+
+from services.files import atomic_write
+from tracing import span
+
+logger = logging.getLogger(__name__)
+
+# так Telegram отвечает на file_id, который этому боту больше не годится
+STALE_FILE_ERRORS = ("file identifier", "file reference")
+
+
+class MediaCacheService:
+    """Кэш file_id, которые Telegram возвращает после первой загрузки фото.
+
+    file_id действует только для бота, который загрузил файл, поэтому id бота
+    входит в ключ. Кэш пишется на диск в потоке, а не в event loop; file_id,
+    появившиеся во время записи, уходят следующей записью.
+    """
+
+    def __init__(self, cache_file: str, base_dir: str, bot_id: int):
+        self.cache_file = cache_file
+        self.base_dir = base_dir
+        self.bot_id = bot_id
+        self.stats = {"hits": 0, "misses": 0, "stale": 0}
+        # path -> sha256 содержимого; файлы в images/ не меняются во время работы,
+        # поэтому хэш считается один раз за процесс
+        self._digests: dict = {}
+        self._file_ids: dict = self._read()
+        self._dirty = False
+        self._save_task: Optional[asyncio.Task] = None
+
+    def _read(self) -> dict:
+        if not os.path.exists(self.cache_file):
+            return {}
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write(self, file_ids: dict) -> None:
+        with atomic_write(self.cache_file) as f:
+            json.dump(file_ids, f, ensure_ascii=False, indent=1)
+
+    async def save(self) -> bool:
+        """Записать кэш на диск вне event loop, если он менялся; False, если не удалось"""
+        if not self._dirty:
+            return True
+        self._dirty = False
+        try:
+            await asyncio.to_thread(self._write, dict(self._file_ids))
+        except OSError as e:
+            self._dirty = True
+            logger.warning("media cache not saved: %r", e)
+            return False
+        return True
+
+    async def _save_pending(self) -> None:
+        while self._dirty:
+            if not await self.save():
+                break
+
+    def _changed(self) -> None:
+        # задача стартует, когда обработчик отдаст управление: все фото альбома — одна запись
+        self._dirty = True
+        if self._save_task is None or self._save_task.done():
+            self._save_task = asyncio.create_task(self._save_pending())
+
+    def _digest(self, path: str) -> str:
+        digest = self._digests.get(path)
+        if digest is None:
+            h = hashlib.sha256()
+            with span("fs.hash_image", path=os.path.basename(path)), open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 16), b""):
+                    h.update(chunk)
+            digest = self._digests[path] = h.hexdigest()
+        return digest
+
+    def _key(self, path: str, digest: str) -> str:
+        rel_path = os.path.relpath(path, self.base_dir).replace(os.sep, "/")
+        return f"{self.bot_id}:{rel_path}:{digest}"
+
+    async def get(self, path: str) -> Optional[str]:
+        """Получить сохранённый file_id для картинки"""
+        digest = self._digests.get(path)
+        if digest is None:
+            digest = await asyncio.to_thread(self._digest, path)
+        file_id = self._file_ids.get(self._key(path, digest))
+        self.stats["hits" if file_id else "misses"] += 1
+        return file_id
+
+    def set(self, path: str, file_id: str) -> None:
+        """Запомнить file_id; на диск кэш попадёт чуть позже"""
+        digest = self._digests.get(path)
+        if digest is None:
+            return
+        key = self._key(path, digest)
+        if self._file_ids.get(key) == file_id:
+            return
+        self._file_ids[key] = file_id
+        self._changed()
+
+    def forget(self, path: str) -> None:
+        """Забыть file_id, который Telegram не принял"""
+        digest = self._digests.get(path)
+        if digest is not None and self._file_ids.pop(self._key(path, digest), None) is not None:
+            self._changed()
+
+    def warm(self, paths) -> int:
+        """Заранее посчитать хэши картинок (вызывать в потоке); вернёт, у скольких уже есть file_id"""
+        cached = 0
+        for path in paths:
+            try:
+                digest = self._digest(path)
+            except OSError:
+                continue
+            cached += self._key(path, digest) in self._file_ids
+        return cached
+
+    async def photo(self, path: str) -> Union[str, FSInputFile]:
+        """file_id из кэша или файл для загрузки"""
+        return await self.get(path) or FSInputFile(path)
+
+    def remember(self, path: str, message: Message) -> None:
+        """Сохранить file_id из отправленного сообщения с фото"""
+        if message.photo:
+            self.set(path, message.photo[-1].file_id)
+
+    async def send(self, paths: List[str], send: Callable[[list], Awaitable]):
+        """Вызвать send со списком file_id или файлов для paths.
+
+        Если Telegram не принял сохранённые file_id (файл удалён, бот сменился),
+        они забываются и send повторяется с загрузкой файлов.
+        """
+        photos = [await self.photo(path) for path in paths]
+        try:
+            return await send(photos)
+        except TelegramBadRequest as e:
+            stale = [path for path, photo in zip(paths, photos) if isinstance(photo, str)]
+            if not stale or not any(error in e.message.lower() for error in STALE_FILE_ERRORS):
+                raise
+            logger.warning("Telegram rejected %d cached file_id(s), uploading again: %s", len(stale), e.message)
+            self.stats["stale"] += len(stale)
+            for path in stale:
+                self.forget(path)
+            return await send([FSInputFile(path) for path in paths])
@@ -1,10 +1,141 @@
+import math
+from collections import OrderedDict
+from typing import Optional
+
+from services.geo_service import GeoService, chord_to_km
+
+# до стольких точек маршрут считается точно (Хелд—Карп, O(2^n * n^2))
+EXACT_LIMIT = 9
+# до стольких точек ближайший сосед пробуется от каждой стартовой точки
+MULTI_START_LIMIT = 60
+
+
+def distance_matrix(places: list) -> list:
+    return [
+        [chord_to_km(math.dist(a.xyz, b.xyz)) for b in places]
+        for a in places
+    ]
+
+
+def path_length(order: list, dist: list) -> float:
+    return sum(dist[a][b] for a, b in zip(order, order[1:]))
+
+
+def solve_exact(dist: list) -> list:
+    """Кратчайший незамкнутый путь через все точки (динамика по подмножествам)"""
+    n = len(dist)
+    full = (1 << n) - 1
+    inf = float("inf")
+    cost = [[inf] * n for _ in range(1 << n)]
+    prev = [[-1] * n for _ in range(1 << n)]
+    for j in range(n):
+        cost[1 << j][j] = 0.0
+    for mask in range(1, full + 1):
+        row = cost[mask]
+        for j in range(n):
+            c = row[j]
+            if c == inf:
+                continue
+            dj = dist[j]
+            for k in range(n):
+                if mask & (1 << k):
+                    continue
+                nxt = mask | (1 << k)
+                nc = c + dj[k]
+                if nc < cost[nxt][k]:
+                    cost[nxt][k] = nc
+                    prev[nxt][k] = j
+    last = min(range(n), key=lambda j: cost[full][j])
+    order, mask = [], full
+    while last != -1:
+        order.append(last)
+        last, mask = prev[mask][last], mask & ~(1 << last)
+    return order[::-1]
+
+
+def nearest_neighbour(dist: list, start: int) -> list:
+    n = len(dist)
+    order, left = [start], set(range(n)) - {start}
+    while left:
+        row = dist[order[-1]]
+        nxt = min(left, key=row.__getitem__)
+        order.append(nxt)
+        left.remove(nxt)
+    return order
+
+
+def two_opt(order: list, dist: list) -> list:
+    """Разворачивать отрезки пути, пока это сокращает его длину"""
+    order = list(order)
+    n = len(order)
+    improved = True
+    while improved:
+        improved = False
+        for i in range(n - 1):
+            a_prev = order[i - 1] if i > 0 else None
+            a = order[i]
+            for j in range(i + 1, n):
+                b = order[j]
+                b_next = order[j + 1] if j + 1 < n else None
+                before = after = 0.0
+                if a_prev is not None:
+                    before += dist[a_prev][a]
+                    after += dist[a_prev][b]
+                if b_next is not None:
+                    before += dist[b][b_next]
+                    after += dist[a][b_next]
+                if after < before - 1e-9:
+                    order[i:j + 1] = order[i:j + 1][::-1]
+                    a = order[i]
+                    improved = True
+    return order
+
+
+def solve_heuristic(dist: list, starts: int = 3) -> list:
+    """Ближайший сосед + 2-opt для нескольких лучших стартовых точек"""
+    n = len(dist)
+    if n <= MULTI_START_LIMIT:
+        candidates = [nearest_neighbour(dist, s) for s in range(n)]
+        candidates.sort(key=lambda order: path_length(order, dist))
+        candidates = candidates[:starts]
+    else:
+        # старт от самой удалённой от остальных точки — обычно это край маршрута
+        candidates = [nearest_neighbour(dist, max(range(n), key=lambda i: sum(dist[i])))]
+    routes = [two_opt(order, dist) for order in candidates]
+    return min(routes, key=lambda order: path_length(order, dist))
+
+
 class RouteService:
-    def __init__(self):
-        self.routes = {
-            "france": ["Эйфелева башня", "Лувр", "Версаль"],
-            "italy": ["Колизей", "Ватикан", "Пиза"],
-            "spain": ["Саграда Фамилия", "Парк Гуэль", "Альгамбра"]
-        }
-
-    def get_places_for_country(self, country_key: str):
-        return self.routes.get(country_key.lower(), [])
+    def __init__(self, geo: Optional[GeoService] = None, cache_size: int = 256):
+        self.geo = geo or GeoService()
+        self.cache_size = cache_size
+        self._routes = OrderedDict()  # набор мест -> порядок обхода
+
+    def plan(self, places: list) -> list:
+        """Порядок обхода мест с минимальной суммарной дорогой (путь, не цикл)"""
+        if len(places) < 3:
+            return list(places)
+        key = tuple(sorted((p.lat, p.lon, p.name) for p in places))
+        cached = self._routes.get(key)
+        if cached is None:
+            # решаем для канонического порядка, чтобы кэш не зависел от порядка на входе
+            canonical = sorted(places, key=lambda p: (p.lat, p.lon, p.name))
+            dist = distance_matrix(canonical)
+            order = solve_exact(dist) if len(canonical) <= EXACT_LIMIT else solve_heuristic(dist)
+            cached = self._routes[key] = [key[i] for i in order]
+            while len(self._routes) > self.cache_size:
+                self._routes.popitem(last=False)
+        else:
+            self._routes.move_to_end(key)
+        by_key = {(p.lat, p.lon, p.name): p for p in places}
+        return [by_key[k] for k in cached]
+
+    def get_places_for_country(self, country_key: str) -> list:
+        """Места страны в порядке маршрута"""
+        return [place.item for place in self.plan(self.geo.places_for_country(country_key))]
+
+    def order_items(self, country_key: str, items: list) -> list:
+        """Упорядочить пункты раздела по маршруту; пункты без координат — в конце"""
+        places = {place.item: place for place in self.geo.places_for_country(country_key)}
+        known = [places[item] for item in items if item in places]
+        return [place.item for place in self.plan(known)] + [item for item in items if item not in places]
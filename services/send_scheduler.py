@@ -0,0 +1,224 @@
+import asyncio
+import contextlib
+import contextvars
+import heapq
+import itertools
+import logging
+import time
+from typing import Optional
+
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.exceptions import TelegramRetryAfter
+
+logger = logging.getLogger(__name__)
+
+# полосы приоритета: меньше — раньше
+INTERACTIVE = 0  # ответы на действия пользователя
+BROADCAST = 1    # рассылки и прочие фоновые отправки
+
+send_priority = contextvars.ContextVar("send_priority", default=INTERACTIVE)
+
+# методы, которые Telegram считает отправкой сообщений и ограничивает по частоте
+LIMITED_PREFIXES = ("send", "copy", "forward", "edit")
+# правки уже отправленного сообщения (навигация по экранам) считаются отдельно от
+# новых сообщений: у них своё, более щедрое ведро на чат
+EDIT_PREFIX = "edit"
+# 429 сразу в стольких чатах за GLOBAL_FLOOD_WINDOW секунд — это общий лимит, а не чата
+GLOBAL_FLOOD_CHATS = 3
+GLOBAL_FLOOD_WINDOW = 1.0
+# одинаковые запросы этих методов, пока первый не выполнен, объединяются в один:
+# повтор даёт тот же результат; send* сюда не входят — два одинаковых сообщения подряд
+# бывают законными
+COALESCED_METHODS = {
+    "editMessageText", "editMessageCaption", "editMessageMedia", "editMessageReplyMarkup",
+    "answerCallbackQuery", "sendChatAction",
+}
+
+
+@contextlib.contextmanager
+def priority(level: int):
+    """Отправки внутри блока идут в указанной полосе: with priority(BROADCAST): ..."""
+    token = send_priority.set(level)
+    try:
+        yield
+    finally:
+        send_priority.reset(token)
+
+
+class TokenBucket:
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, now: float, cost: float = 1) -> float:
+        """Занять токены (можно в долг) и вернуть, сколько секунд подождать"""
+        self._refill(now)
+        self.tokens -= min(cost, self.burst)
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def wait_time(self, now: float, cost: float = 1) -> float:
+        self._refill(now)
+        return max(0.0, (min(cost, self.burst) - self.tokens) / self.rate)
+
+    def take(self, cost: float = 1) -> None:
+        self.tokens -= min(cost, self.burst)
+
+    def pause(self, now: float, seconds: float) -> None:
+        """Не выдавать токены ближайшие seconds секунд (после retry_after)"""
+        self._refill(now)
+        self.tokens = min(self.tokens, -seconds * self.rate)
+
+    def idle(self, now: float) -> bool:
+        return self.tokens + (now - self.updated) * self.rate >= self.burst
+
+
+class PriorityGate:
+    """Общий лимит: токены выдаются ожидающим по приоритету, внутри полосы — по очереди"""
+
+    def __init__(self, bucket: TokenBucket):
+        self.bucket = bucket
+        self._waiters = []
+        self._seq = itertools.count()
+        self._pump_task: Optional[asyncio.Task] = None
+
+    async def acquire(self, level: int, cost: float = 1) -> None:
+        if not self._waiters and self.bucket.wait_time(time.monotonic(), cost) == 0:
+            self.bucket.take(cost)
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (level, next(self._seq), cost, future))
+        if self._pump_task is None or self._pump_task.done():
+            self._pump_task = asyncio.create_task(self._pump())
+        await future
+
+    async def _pump(self) -> None:
+        while self._waiters:
+            level, _, cost, future = self._waiters[0]
+            if future.done():  # ожидающего отменили
+                heapq.heappop(self._waiters)
+                continue
+            delay = self.bucket.wait_time(time.monotonic(), cost)
+            if delay > 0:
+                # после сна голова очереди могла смениться на более срочную отправку
+                await asyncio.sleep(delay)
+                continue
+            heapq.heappop(self._waiters)
+            self.bucket.take(cost)
+            future.set_result(None)
+
+
+class SendScheduler(BaseRequestMiddleware):
+    """Планировщик исходящих запросов к Bot API (подключается через bot.session.middleware).
+
+    Отправки сообщений проходят через лимиты: общий (global_rate в секунду),
+    на личный чат (chat_rate) и на группу (group_rate); правки сообщений в чате
+    ограничены отдельно (edit_rate), чтобы навигация не ждала за новыми
+    сообщениями. Ответ 429 выдерживает retry_after в своём чате, а общий лимит
+    придерживает, только если 429 пришёл сразу в нескольких чатах; затем запрос
+    повторяется. Одинаковые правки и ответы на callback в полёте объединяются.
+    Лимиты по умолчанию — около 85% от лимитов Telegram:
+    часы и задержки сети у нас и у Telegram разные, и ровно на пределе часть
+    запросов получает 429.
+    Остальные методы (answerCallbackQuery, setWebhook, ...) идут без ожидания.
+    """
+
+    def __init__(
+        self,
+        global_rate: float = 25,
+        chat_rate: float = 0.85,
+        chat_burst: float = 3,
+        group_rate: float = 17 / 60,
+        group_burst: float = 3,
+        edit_rate: float = 3,
+        edit_burst: float = 5,
+        max_retries: int = 3,
+    ):
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.group_rate = group_rate
+        self.group_burst = group_burst
+        self.edit_rate = edit_rate
+        self.edit_burst = edit_burst
+        self.max_retries = max_retries
+        self.gate = PriorityGate(TokenBucket(global_rate, global_rate, time.monotonic()))
+        self._chats = {}      # (chat_id, правка ли) -> TokenBucket
+        self._created = 0
+        self._flooded = {}    # chat_id -> когда в нём был последний 429
+        self._inflight = {}   # ключ запроса -> Task
+        self.stats = {"sent": 0, "throttled": 0, "retried": 0, "coalesced": 0}
+
+    def _chat_bucket(self, chat_id, now: float, edit: bool = False) -> TokenBucket:
+        bucket = self._chats.get((chat_id, edit))
+        if bucket is None:
+            self._created += 1
+            if self._created % 1024 == 0:
+                # забыть чаты, которые давно ничего не получали: их ведро всё равно полное
+                self._chats = {cid: b for cid, b in self._chats.items() if not b.idle(now)}
+            if edit:
+                rate, burst = self.edit_rate, self.edit_burst
+            elif isinstance(chat_id, str) or chat_id < 0:
+                rate, burst = self.group_rate, self.group_burst
+            else:
+                rate, burst = self.chat_rate, self.chat_burst
+            bucket = self._chats[(chat_id, edit)] = TokenBucket(rate, burst, now)
+        return bucket
+
+    def _retry_after(self, chat_id, bucket: TokenBucket, seconds: float) -> None:
+        """Выдержать retry_after: в чате всегда, общим лимитом — только при 429 в нескольких чатах"""
+        now = time.monotonic()
+        bucket.pause(now, seconds)
+        self._flooded[chat_id] = now
+        self._flooded = {cid: at for cid, at in self._flooded.items() if now - at <= GLOBAL_FLOOD_WINDOW}
+        if len(self._flooded) >= GLOBAL_FLOOD_CHATS:
+            logger.warning("429 in %d chats within %ss, pausing all sends for %ss", len(self._flooded), GLOBAL_FLOOD_WINDOW, seconds)
+            self.gate.bucket.pause(now, seconds)
+
+    async def __call__(self, make_request, bot, method):
+        name = method.__api_method__
+        if name in COALESCED_METHODS:
+            key = (bot.id, repr(method))
+            task = self._inflight.get(key)
+            if task is not None:
+                self.stats["coalesced"] += 1
+                return await asyncio.shield(task)
+            task = self._inflight[key] = asyncio.ensure_future(self._send(make_request, bot, method))
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+            return await asyncio.shield(task)
+        return await self._send(make_request, bot, method)
+
+    async def _send(self, make_request, bot, method):
+        chat_id = getattr(method, "chat_id", None)
+        if chat_id is None or not method.__api_method__.startswith(LIMITED_PREFIXES):
+            return await make_request(bot, method)
+        # альбом — это несколько сообщений для общего лимита
+        media = getattr(method, "media", None)
+        cost = len(media) if isinstance(media, list) else 1
+        level = send_priority.get()
+        edit = method.__api_method__.startswith(EDIT_PREFIX)
+        for attempt in range(self.max_retries + 1):
+            now = time.monotonic()
+            bucket = self._chat_bucket(chat_id, now, edit)
+            delay = bucket.reserve(now)
+            if delay > 0:
+                self.stats["throttled"] += 1
+                await asyncio.sleep(delay)
+            await self.gate.acquire(level, cost)
+            try:
+                response = await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                if attempt == self.max_retries:
+                    raise
+                logger.warning("%s to chat %s hit 429, retrying in %ss", method.__api_method__, chat_id, e.retry_after)
+                self.stats["retried"] += 1
+                self._retry_after(chat_id, bucket, e.retry_after)
+                continue
+            self.stats["sent"] += 1
+            return response
@@ -0,0 +1,207 @@
+import asyncio
+import hmac
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from aiogram import Bot, Dispatcher
+from aiogram.methods import TelegramMethod
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+# типы апдейтов, в которых объект сам содержит chat или from
+UPDATE_FIELDS = (
+    "message", "edited_message", "callback_query", "channel_post", "edited_channel_post",
+    "business_message", "edited_business_message", "my_chat_member", "chat_member",
+    "chat_join_request", "message_reaction", "inline_query", "chosen_inline_result",
+    "pre_checkout_query", "shipping_query", "poll_answer",
+)
+
+
+def chat_key(update: Dict[str, Any]):
+    """Ключ очереди апдейта: id чата, иначе id пользователя, иначе сам апдейт (без порядка)"""
+    for field in UPDATE_FIELDS:
+        event = update.get(field)
+        if event is None:
+            continue
+        chat = event.get("chat") or (event.get("message") or {}).get("chat")
+        if chat is not None:
+            return chat["id"]
+        user = event.get("from") or event.get("user")
+        if user is not None:
+            return user["id"]
+        break
+    return ("update", update.get("update_id"))
+
+
+class UpdateExecutor:
+    """Пул воркеров для апдейтов: у каждого чата своя очередь.
+
+    Апдейты одного чата обрабатываются строго по одному и по порядку, разные
+    чаты — параллельно, не больше workers одновременно; чаты с работой
+    обслуживаются по кругу. Всего в очередях не больше max_pending апдейтов и не
+    больше max_per_chat на чат: лишние отклоняются (submit возвращает False).
+    process получает бота, апдейт и момент его приёма (time.monotonic()).
+    """
+
+    def __init__(
+        self,
+        process: Callable[[Bot, Dict[str, Any], float], Awaitable[Any]],
+        workers: int = 16,
+        max_pending: int = 1000,
+        max_per_chat: int = 20,
+    ):
+        self.process = process
+        self.workers = workers
+        self.max_pending = max_pending
+        self.max_per_chat = max_per_chat
+        self._lanes: Dict[Any, deque] = {}  # чат -> апдейты, пока чат в работе или ждёт её
+        self._ready: Optional[asyncio.Queue] = None  # чаты, чей следующий апдейт можно брать
+        self._tasks = []
+        self._pending = 0
+        self._busy = 0
+        self._drained = asyncio.Event()
+        self._drained.set()
+        self.stats = {"submitted": 0, "processed": 0, "failed": 0, "shed": 0, "wait_total": 0.0, "wait_max": 0.0}
+
+    @property
+    def gauges(self) -> dict:
+        """Глубина очереди, число чатов с работой и занятых воркеров"""
+        return {"pending": self._pending, "chats": len(self._lanes), "busy": self._busy}
+
+    def _start(self) -> None:
+        self._ready = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    def submit(self, bot: Bot, update: Dict[str, Any]) -> bool:
+        if self._ready is None:
+            self._start()
+        key = chat_key(update)
+        lane = self._lanes.get(key)
+        if self._pending >= self.max_pending or (lane is not None and len(lane) >= self.max_per_chat):
+            self.stats["shed"] += 1
+            return False
+        if lane is None:
+            lane = self._lanes[key] = deque()
+            self._ready.put_nowait(key)
+        lane.append((time.monotonic(), bot, update))
+        self._pending += 1
+        self.stats["submitted"] += 1
+        self._drained.clear()
+        return True
+
+    async def _worker(self) -> None:
+        while True:
+            key = await self._ready.get()
+            lane = self._lanes[key]
+            queued_at, bot, update = lane.popleft()
+            self._pending -= 1
+            self._busy += 1
+            wait = time.monotonic() - queued_at
+            self.stats["wait_total"] += wait
+            self.stats["wait_max"] = max(self.stats["wait_max"], wait)
+            try:
+                await self.process(bot, update, queued_at)
+                self.stats["processed"] += 1
+            except Exception:
+                self.stats["failed"] += 1
+                logger.exception("update %s failed", update.get("update_id"))
+            finally:
+                self._busy -= 1
+                # следующий апдейт чата — в конец очереди, чтобы не задерживать другие чаты
+                if lane:
+                    self._ready.put_nowait(key)
+                else:
+                    del self._lanes[key]
+                if not self._pending and not self._busy:
+                    self._drained.set()
+
+    async def close(self, timeout: float = 10) -> None:
+        """Дождаться обработки принятых апдейтов и остановить воркеров"""
+        try:
+            await asyncio.wait_for(self._drained.wait(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("update executor closed with %d pending updates", self._pending)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._ready = None
+
+
+class RecentIds:
+    """Последние size id апдейтов: Telegram может доставить апдейт повторно"""
+
+    def __init__(self, size: int = 10000):
+        self.size = size
+        self._order = deque()
+        self._ids = set()
+
+    def __contains__(self, update_id) -> bool:
+        return update_id in self._ids
+
+    def add(self, update_id) -> None:
+        self._order.append(update_id)
+        self._ids.add(update_id)
+        if len(self._order) > self.size:
+            self._ids.discard(self._order.popleft())
+
+
+class ExecutorRequestHandler(SimpleRequestHandler):
+    """Webhook-обработчик, который отдаёт апдейты в UpdateExecutor.
+
+    Отвечает 200 сразу после проверки секрета и постановки в очередь, обработка
+    идёт в фоне. Повторно доставленные апдейты (тот же update_id) пропускаются.
+    Если очередь переполнена, Telegram получает 503 и доставит апдейт позже.
+    """
+
+    def __init__(
+        self,
+        dispatcher: Dispatcher,
+        bot: Bot,
+        secret_token: Optional[str] = None,
+        workers: int = 16,
+        max_pending: int = 1000,
+        **data: Any,
+    ):
+        super().__init__(dispatcher=dispatcher, bot=bot, handle_in_background=True, secret_token=secret_token, **data)
+        self.executor = UpdateExecutor(self._background_feed_update, workers=workers, max_pending=max_pending)
+        self.seen = RecentIds()
+        self.stats = {"unauthorized": 0, "invalid": 0, "duplicates": 0}
+
+    async def _background_feed_update(self, bot: Bot, update: Dict[str, Any], received_at: float) -> None:
+        # received_at доступен обработчикам как аргумент: по нему меряется время до ответа
+        result = await self.dispatcher.feed_raw_update(bot=bot, update=update, received_at=received_at, **self.data)
+        if isinstance(result, TelegramMethod):
+            await self.dispatcher.silent_call_request(bot=bot, result=result)
+
+    def verify_secret(self, telegram_secret_token: str, bot: Bot) -> bool:
+        # байты, а не str: compare_digest падает на не-ASCII в заголовке
+        if self.secret_token and not hmac.compare_digest(telegram_secret_token.encode(), self.secret_token.encode()):
+            self.stats["unauthorized"] += 1
+            return False
+        return True
+
+    async def _handle_request_background(self, bot: Bot, request: web.Request) -> web.Response:
+        try:
+            update = await request.json(loads=bot.session.json_loads)
+        except ValueError:
+            update = None
+        if not isinstance(update, dict) or not isinstance(update.get("update_id"), int):
+            self.stats["invalid"] += 1
+            return web.Response(status=400, text="Bad update")
+        update_id = update["update_id"]
+        if update_id in self.seen:
+            self.stats["duplicates"] += 1
+            return web.json_response({}, dumps=bot.session.json_dumps)
+        if not self.executor.submit(bot, update):
+            return web.Response(status=503, text="Overloaded")
+        self.seen.add(update_id)
+        return web.json_response({}, dumps=bot.session.json_dumps)
+
+    async def close(self) -> None:
+        await self.executor.close()
+        await super().close()
@@ -0,0 +1,70 @@
+import hashlib
+import json
+import logging
+from typing import Optional
+
+from aiogram import Bot
+
+from services.files import atomic_write
+
+logger = logging.getLogger(__name__)
+
+
+class WebhookService:
+    """Сверка webhook при старте: setWebhook вызывается, только если что-то изменилось.
+
+    URL и allowed_updates видны в getWebhookInfo, а секрет Telegram не
+    возвращает, поэтому отпечаток всех трёх параметров (хэш, не сам секрет)
+    хранится в state_file. Webhook при остановке не удаляется и накопленные
+    апдейты не сбрасываются: после перезапуска Telegram доставит их сам.
+    """
+
+    def __init__(self, bot: Bot, url: str, secret_token: str, state_file: str):
+        self.bot = bot
+        self.url = url
+        self.secret_token = secret_token
+        self.state_file = state_file
+
+    def _fingerprint(self, allowed_updates: list) -> str:
+        payload = json.dumps([self.url, self.secret_token, sorted(allowed_updates)])
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _read_fingerprint(self) -> Optional[str]:
+        try:
+            with open(self.state_file, "r", encoding="utf-8") as f:
+                return json.load(f).get("fingerprint")
+        except (OSError, ValueError):
+            return None
+
+    def _write_fingerprint(self, fingerprint: str) -> None:
+        with atomic_write(self.state_file) as f:
+            json.dump({"fingerprint": fingerprint}, f)
+
+    async def reconcile(self, allowed_updates: list) -> bool:
+        """Привести webhook к нужным параметрам; True, если пришлось вызвать setWebhook"""
+        info = await self.bot.get_webhook_info()
+        if info.pending_update_count:
+            logger.info("Webhook has %d pending updates, Telegram will deliver them", info.pending_update_count)
+        if info.last_error_message:
+            logger.warning("Last webhook delivery error: %s", info.last_error_message)
+
+        fingerprint = self._fingerprint(allowed_updates)
+        if (
+            info.url == self.url
+            and sorted(info.allowed_updates or []) == sorted(allowed_updates)
+            and self._read_fingerprint() == fingerprint
+        ):
+            return False
+
+        await self.bot.set_webhook(
+            self.url,
+            secret_token=self.secret_token,
+            allowed_updates=allowed_updates,
+            drop_pending_updates=False,
+        )
+        try:
+            self._write_fingerprint(fingerprint)
+        except OSError as e:
+            logger.warning("webhook state not saved: %r", e)
+        logger.info("Webhook registered: %s", self.url)
+        return True
@@ -0,0 +1,174 @@
+"""Тесты FSM-хранилищ: SQLite (чтение/запись, TTL, сброс после ошибки) и ветка Redis.
+
+Запуск: python -m pytest tests
+"""
+import asyncio
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiogram.fsm.storage.base import StorageKey  # noqa: E402
+
+from services.fsm_storage import SQLiteStorage, make_storage  # noqa: E402
+
+KEY = StorageKey(bot_id=1, chat_id=42, user_id=42)
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class FakeRedis:
+    """Минимальная замена redis.asyncio.Redis: только то, что вызывает RedisStorage"""
+
+    def __init__(self):
+        self.values = {}
+        self.expires = {}
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.values[key] = value.encode() if isinstance(value, str) else value
+        self.expires[key] = ex
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.values.pop(key, None)
+            self.expires.pop(key, None)
+
+    async def aclose(self, close_connection_pool=True):
+        pass
+
+
+def test_sqlite_set_get(tmp_path):
+    path = str(tmp_path / "fsm.sqlite3")
+
+    async def scenario():
+        storage = SQLiteStorage(path)
+        await storage.set_state(KEY, "Form:country")
+        await storage.set_data(KEY, {"country": "Италия"})
+        # до сброса чтение идёт из несброшенных записей
+        assert await storage.get_state(KEY) == "Form:country"
+        assert await storage.get_data(KEY) == {"country": "Италия"}
+        await storage.close()
+
+        reopened = SQLiteStorage(path)
+        try:
+            assert await reopened.get_state(KEY) == "Form:country"
+            assert await reopened.get_data(KEY) == {"country": "Италия"}
+            assert await reopened.get_data(StorageKey(bot_id=1, chat_id=7, user_id=7)) == {}
+        finally:
+            await reopened.close()
+
+    run(scenario())
+
+
+def test_sqlite_ttl_expiry(tmp_path):
+    async def scenario():
+        storage = SQLiteStorage(str(tmp_path / "fsm.sqlite3"), ttl=0.2)
+        try:
+            await storage.set_state(KEY, "Form:country")
+            await storage.set_data(KEY, {"country": "Италия"})
+            await storage.flush()
+            assert await storage.get_state(KEY) == "Form:country"
+            await asyncio.sleep(0.3)
+            assert await storage.get_state(KEY) is None
+            assert await storage.get_data(KEY) == {}
+            # просроченная сессия не оживает, если записать в неё только состояние
+            await storage.set_state(KEY, "Form:item")
+            await storage.flush()
+            assert await storage.get_data(KEY) == {}
+        finally:
+            await storage.close()
+
+    run(scenario())
+
+
+def test_sqlite_flush_after_failure(tmp_path):
+    path = str(tmp_path / "fsm.sqlite3")
+
+    async def scenario():
+        storage = SQLiteStorage(path)
+        flush_batch = storage._flush_batch
+        failures = [sqlite3.OperationalError("disk I/O error")]
+
+        def failing_flush(batch):
+            if failures:
+                raise failures.pop()
+            flush_batch(batch)
+
+        storage._flush_batch = failing_flush
+        await storage.set_data(KEY, {"country": "Италия"})
+        with pytest.raises(sqlite3.OperationalError):
+            await storage.flush()
+        # несохранённое вернулось в очередь и уйдёт со следующим сбросом вместе с новой записью
+        assert await storage.get_data(KEY) == {"country": "Италия"}
+        await storage.set_state(KEY, "Form:item")
+        await storage.flush()
+        await storage.close()
+
+        reopened = SQLiteStorage(path)
+        try:
+            assert await reopened.get_state(KEY) == "Form:item"
+            assert await reopened.get_data(KEY) == {"country": "Италия"}
+        finally:
+            await reopened.close()
+
+    run(scenario())
+
+
+def test_sqlite_flush_loop_retries(tmp_path):
+    async def scenario():
+        storage = SQLiteStorage(str(tmp_path / "fsm.sqlite3"), flush_interval=0.01)
+        flush_batch = storage._flush_batch
+        failures = [sqlite3.OperationalError("database is locked")]
+
+        def failing_flush(batch):
+            if failures:
+                raise failures.pop()
+            flush_batch(batch)
+
+        storage._flush_batch = failing_flush
+        try:
+            await storage.set_state(KEY, "Form:country")
+            # цикл сброса завершается, только когда всё записано
+            await asyncio.wait_for(storage._flush_task, 2)
+            assert not failures and not storage._pending
+            assert storage.gauges["sessions"] == 1
+        finally:
+            await storage.close()
+
+    run(scenario())
+
+
+def test_redis_storage_with_stand_in(tmp_path):
+    pytest.importorskip("redis")
+
+    async def scenario():
+        storage = make_storage("redis://localhost:6379/0", str(tmp_path / "fsm.sqlite3"), ttl=3600)
+        await storage.redis.aclose(close_connection_pool=True)  # соединений ещё не было
+        storage.redis = FakeRedis()
+        await storage.set_state(KEY, "Form:country")
+        await storage.set_data(KEY, {"country": "Италия"})
+        assert await storage.get_state(KEY) == "Form:country"
+        assert await storage.get_data(KEY) == {"country": "Италия"}
+        assert set(storage.redis.expires.values()) == {3600}
+        await storage.set_state(KEY, None)
+        assert await storage.get_state(KEY) is None
+        await storage.close()
+
+    run(scenario())
+
+
+def test_redis_without_package(tmp_path, monkeypatch):
+    # None в sys.modules — импорт падает с ImportError, как без установленного пакета
+    for name in [name for name in sys.modules if name == "redis" or name.startswith("redis.")] or ["redis"]:
+        monkeypatch.setitem(sys.modules, name, None)
+    monkeypatch.delitem(sys.modules, "aiogram.fsm.storage.redis", raising=False)
+    with pytest.raises(RuntimeError, match="requirements-redis.txt"):
+        make_storage("redis://localhost:6379/0", str(tmp_path / "fsm.sqlite3"), ttl=3600)
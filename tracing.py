@@ -0,0 +1,440 @@
+"""Трассировка апдейтов и профилирование по запросу.
+
+Каждый апдейт — трасса с корневым спаном, внутри которого дочерние спаны:
+обращения к FSM-хранилищу, чтения файлов и запросы к Bot API. Текущий спан
+лежит в contextvar, поэтому спаны вкладываются сами и переживают create_task
+и asyncio.to_thread. Без активной трассы span() ничего не делает.
+
+Спаны выгружаются пачками в JSON-lines файл или POST-ом в OTLP/HTTP (JSON)
+коллектор. Профайлер — поток, который снимает стек event loop и копит их
+в формате folded stacks (flamegraph.pl, speedscope).
+"""
+import abc
+import asyncio
+import contextvars
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, Optional
+
+import aiohttp
+from aiogram import BaseMiddleware
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.fsm.storage.base import BaseStorage
+
+logger = logging.getLogger(__name__)
+
+_current = contextvars.ContextVar("trace_span", default=None)
+
+
+class Span:
+    __slots__ = ("tracer", "trace_id", "span_id", "parent_id", "name", "attributes", "start", "end", "error", "_token")
+
+    def __init__(self, tracer: "Tracer", name: str, parent: Optional["Span"], attributes: dict):
+        self.tracer = tracer
+        self.trace_id = parent.trace_id if parent is not None else os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent is not None else None
+        self.name = name
+        self.attributes = attributes
+        self.start = 0
+        self.end = 0
+        self.error = None
+        self._token = None
+
+    def set(self, key: str, value) -> None:
+        self.attributes[key] = value
+
+    def __enter__(self):
+        self.start = time.time_ns()
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end = time.time_ns()
+        if exc is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        _current.reset(self._token)
+        self.tracer.finish(self)
+        return False
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start,
+            "duration_ms": round((self.end - self.start) / 1e6, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def set(self, key: str, value) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+def span(name: str, **attributes):
+    """Дочерний спан текущей трассы; вне трассы — пустышка"""
+    parent = _current.get()
+    if parent is None:
+        return NOOP_SPAN
+    return Span(parent.tracer, name, parent, attributes)
+
+
+class Tracer:
+    """Начинает трассы (с вероятностью sample_rate) и отдаёт готовые спаны экспортёру"""
+
+    def __init__(self, exporter=None, sample_rate: float = 1.0):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def trace(self, name: str, **attributes):
+        if self.exporter is None or (self.sample_rate < 1 and random.random() >= self.sample_rate):
+            return NOOP_SPAN
+        return Span(self, name, None, attributes)
+
+    def finish(self, finished: Span) -> None:
+        self.exporter.export(finished)
+
+
+# ==============================
+# Экспорт
+# ==============================
+class BatchExporter(abc.ABC):
+    """Копит спаны и выгружает их пачкой раз в interval секунд; куда — решает _send"""
+
+    def __init__(self, interval: float = 1.0, max_buffer: int = 10000):
+        self.interval = interval
+        self.max_buffer = max_buffer
+        self._buffer = []
+        self.stats = {"exported": 0, "dropped": 0}
+
+    def export(self, finished: Span) -> None:
+        # может вызываться и из потоков asyncio.to_thread: list.append атомарен
+        if len(self._buffer) >= self.max_buffer:
+            self.stats["dropped"] += 1
+            return
+        self._buffer.append(finished)
+
+    async def flush(self) -> None:
+        if not self._buffer:
+            return
+        batch, self._buffer = self._buffer, []
+        try:
+            await self._send(batch)
+            self.stats["exported"] += len(batch)
+        except Exception as e:
+            self.stats["dropped"] += len(batch)
+            logger.warning("Trace export failed: %s", e)
+
+    @abc.abstractmethod
+    async def _send(self, batch: list) -> None:
+        """Выгрузить пачку спанов; исключение — пачка теряется и попадает в stats["dropped"]"""
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
+
+    async def close(self) -> None:
+        await self.flush()
+
+
+class JsonLinesExporter(BatchExporter):
+    """Спаны построчно в файл: одна строка — один JSON-объект"""
+
+    def __init__(self, path: str, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+
+    def _write(self, lines: list) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.writelines(lines)
+
+    async def _send(self, batch: list) -> None:
+        lines = [json.dumps(s.to_dict(), ensure_ascii=False, default=str) + "\n" for s in batch]
+        await asyncio.to_thread(self._write, lines)
+
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_span(s: Span) -> dict:
+    result = {
+        "traceId": s.trace_id,
+        "spanId": s.span_id,
+        "name": s.name,
+        "kind": 2 if s.parent_id is None else 1,  # SERVER для апдейта, INTERNAL для остальных
+        "startTimeUnixNano": str(s.start),
+        "endTimeUnixNano": str(s.end),
+        "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in s.attributes.items()],
+        "status": {"code": 2, "message": s.error} if s.error else {"code": 1},
+    }
+    if s.parent_id is not None:
+        result["parentSpanId"] = s.parent_id
+    return result
+
+
+class OtlpExporter(BatchExporter):
+    """POST спанов в OTLP/HTTP коллектор в JSON-кодировке (например, http://localhost:4318/v1/traces)"""
+
+    def __init__(self, url: str, service_name: str = "trevelbot", **kwargs):
+        super().__init__(**kwargs)
+        self.url = url
+        self.service_name = service_name
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def _send(self, batch: list) -> None:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=10))
+        payload = {"resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}]},
+            "scopeSpans": [{"scope": {"name": "trevelbot"}, "spans": [_otlp_span(s) for s in batch]}],
+        }]}
+        async with self._session.post(self.url, json=payload) as resp:
+            resp.raise_for_status()
+
+    async def close(self) -> None:
+        await super().close()
+        if self._session is not None:
+            await self._session.close()
+
+
+def make_exporter(jsonl_path: Optional[str] = None, otlp_url: Optional[str] = None) -> Optional[BatchExporter]:
+    """OTLP, если задан адрес коллектора, иначе файл; None — трассировка выключена"""
+    if otlp_url:
+        return OtlpExporter(otlp_url)
+    if jsonl_path:
+        return JsonLinesExporter(jsonl_path)
+    return None
+
+
+# ==============================
+# Точки подключения
+# ==============================
+class TracingMiddleware(BaseMiddleware):
+    """Внешний middleware апдейтов: трасса на каждый апдейт"""
+
+    def __init__(self, tracer: Tracer):
+        self.tracer = tracer
+
+    async def __call__(self, handler, event, data):
+        root = self.tracer.trace(f"update.{event.event_type}", update_id=event.update_id)
+        if root is NOOP_SPAN:
+            return await handler(event, data)
+        received_at = data.get("received_at")
+        if received_at is not None:
+            root.set("queue_ms", round((time.monotonic() - received_at) * 1000, 3))
+        chat = data.get("event_chat")
+        if chat is not None:
+            root.set("chat_id", chat.id)
+        if event.callback_query is not None:
+            root.set("callback_data", event.callback_query.data or "")
+        with root:
+            return await handler(event, data)
+
+
+class TracingRequestMiddleware(BaseRequestMiddleware):
+    """Middleware сессии бота: спан на каждый запрос к Bot API"""
+
+    async def __call__(self, make_request, bot, method):
+        if _current.get() is None:
+            return await make_request(bot, method)
+        with span(f"api.{method.__api_method__}"):
+            return await make_request(bot, method)
+
+
+class TracedStorage(BaseStorage):
+    """Обёртка FSM-хранилища: спан на каждое обращение; остальные атрибуты — у исходного"""
+
+    def __init__(self, storage: BaseStorage):
+        self.storage = storage
+
+    def __getattr__(self, name: str):
+        return getattr(self.storage, name)
+
+    async def set_state(self, key, state=None) -> None:
+        with span("fsm.set_state"):
+            await self.storage.set_state(key, state)
+
+    async def get_state(self, key) -> Optional[str]:
+        with span("fsm.get_state"):
+            return await self.storage.get_state(key)
+
+    async def set_data(self, key, data) -> None:
+        with span("fsm.set_data"):
+            await self.storage.set_data(key, data)
+
+    async def get_data(self, key) -> Dict[str, Any]:
+        with span("fsm.get_data"):
+            return await self.storage.get_data(key)
+
+    async def update_data(self, key, data) -> Dict[str, Any]:
+        with span("fsm.update_data"):
+            return await self.storage.update_data(key, data)
+
+    async def close(self) -> None:
+        await self.storage.close()
+
+
+# ==============================
+# Профилирование
+# ==============================
+class Profile:
+    """Результат профилирования: число выборок по стекам"""
+
+    def __init__(self, stacks: Counter, idle: int, duration: float, updates: int, interval: float):
+        self.stacks = stacks
+        self.idle = idle
+        self.duration = duration
+        self.updates = updates
+        self.interval = interval
+
+    @property
+    def samples(self) -> int:
+        return sum(self.stacks.values())
+
+    def folded(self) -> str:
+        """Формат folded stacks: «кадр;кадр;кадр число» на строку"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def top(self, limit: int = 10) -> list:
+        """Функции, на которых стек чаще всего заканчивался (собственное время)"""
+        leaves = Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        return leaves.most_common(limit)
+
+    def summary(self, limit: int = 10) -> str:
+        busy = self.samples
+        lines = [
+            f"{self.updates} апдейтов за {self.duration:.1f} с, "
+            f"выборок: {busy} в работе, {self.idle} в ожидании (шаг {self.interval * 1000:.0f} мс)",
+        ]
+        for frame, count in self.top(limit):
+            lines.append(f"{count / max(busy, 1):6.1%}  {frame}")
+        return "\n".join(lines)
+
+
+class SamplingProfiler:
+    """Сэмплирующий профайлер потока event loop на следующие N апдейтов.
+
+    Фоновый поток раз в interval секунд снимает стек потока loop через
+    sys._current_frames(); сам loop при этом не замедляется. Выборки, где loop
+    ждёт событий в selectors, считаются отдельно как простой.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._stacks = Counter()
+        self._idle = 0
+        self._started = 0.0
+        self._remaining = 0
+        self._updates = 0
+        self.on_done: Optional[Callable] = None
+
+    @property
+    def active(self) -> bool:
+        return self._thread is not None
+
+    def start(self, updates: int, on_done: Callable) -> bool:
+        """Профилировать следующие updates апдейтов; on_done(profile) вызывается после последнего.
+
+        False, если профилирование уже идёт.
+        """
+        if self.active:
+            return False
+        self._stacks = Counter()
+        self._idle = 0
+        self._updates = 0
+        self._remaining = updates
+        self._started = time.monotonic()
+        self.on_done = on_done
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._sample, args=(threading.get_ident(),), name="sampling-profiler", daemon=True,
+        )
+        self._thread.start()
+        return True
+
+    def _sample(self, thread_id: int) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(thread_id)
+            if frame is None:
+                continue
+            if frame.f_code.co_filename.endswith("selectors.py"):
+                self._idle += 1
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self._stacks[";".join(reversed(stack))] += 1
+
+    def stop(self) -> Profile:
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        return Profile(self._stacks, self._idle, time.monotonic() - self._started, self._updates, self.interval)
+
+    def update_done(self) -> Optional[Profile]:
+        """Учесть обработанный апдейт; после последнего — остановиться и вернуть профиль"""
+        self._updates += 1
+        self._remaining -= 1
+        if self._remaining > 0:
+            return None
+        return self.stop()
+
+
+class ProfilingMiddleware(BaseMiddleware):
+    """Внешний middleware апдейтов: считает апдейты, начатые во время профилирования"""
+
+    def __init__(self, profiler: SamplingProfiler):
+        self.profiler = profiler
+
+    async def __call__(self, handler, event, data):
+        if not self.profiler.active:
+            return await handler(event, data)
+        try:
+            return await handler(event, data)
+        finally:
+            # профилирование могли остановить, пока шёл этот апдейт
+            if self.profiler.active:
+                on_done = self.profiler.on_done
+                profile = self.profiler.update_done()
+                if profile is not None:
+                    # чистый контекст: отправка отчёта — не часть трассы этого апдейта
+                    contextvars.Context().run(on_done, profile)
@@ -13,3 +13,24 @@ def format_country_message(country_key: str, country: dict) -> str:
         f"🗺 <b>Популярные места для посещения:</b>\n{places}"
     )
     return message
+
+
+def flag_emoji(code: str) -> str:
+    """Флаг из двухбуквенного кода ISO: "JP" -> 🇯🇵"""
+    return "".join(chr(0x1F1E6 + ord(c) - ord("A")) for c in code.upper())
+
+
+def format_country_meta(meta: dict) -> str:
+    currency = meta["currency"]
+    return (
+        f"🏛 Столица: {meta['capital']}\n"
+        f"💱 Валюта: {currency['name']} ({currency['code']}, {currency['symbol']})\n"
+        f"🗣 Языки: {', '.join(meta['languages'])}\n"
+        f"🕒 Часовые пояса: {', '.join(meta['timezones'])}\n"
+        f"📞 Телефонный код: {meta['calling_code']}"
+    )
+
+
+def format_nearest(places: list) -> str:
+    """Список [(Place, км)] для ответа пользователю"""
+    return "\n".join(f"📍 {place.name} ({place.country}) — {km:.0f} км" for place, km in places)